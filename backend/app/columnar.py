@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from sqlalchemy.engine import Row
+
+
+# Low-cardinality listing fields sent as indexes into `dictionaries` instead of repeated strings.
+DICTIONARY_FIELDS = ("source", "currency", "price_period")
+
+# Plain listing fields sent as one parallel array each (named after the ListingOut field).
+PLAIN_FIELDS = (
+    "source_url",
+    "title",
+    "price_value",
+    "monthly_price",
+    "lat",
+    "lng",
+    "location_text",
+    "captured_at",
+)
+
+
+def compare_columns(
+    rows: Iterable[Row[Any]], distances: Iterable[float | None]
+) -> tuple[dict[str, list[str]], dict[str, list[object]]]:
+    """
+    Turn compare rows into (dictionaries, columns): parallel arrays, one entry per listing.
+
+    Rows carry the listing columns (see `LISTING_OUT_COLUMNS`); `distances` holds each row's
+    distance to the target.
+
+    Dictionary-encoded fields hold the index of the value in `dictionaries[field]`.
+    """
+    dictionaries: dict[str, list[str]] = {field: [] for field in DICTIONARY_FIELDS}
+    codes: dict[str, dict[str, int]] = {field: {} for field in DICTIONARY_FIELDS}
+    columns: dict[str, list[object]] = {
+        "ids": [],
+        **{field: [] for field in DICTIONARY_FIELDS},
+        **{field: [] for field in PLAIN_FIELDS},
+        "distance_km": [],
+    }
+
+    for row, distance_km in zip(rows, distances):
+        columns["ids"].append(row.id)
+        for field in DICTIONARY_FIELDS:
+            value = getattr(row, field)
+            code = codes[field].get(value)
+            if code is None:
+                code = codes[field][value] = len(dictionaries[field])
+                dictionaries[field].append(value)
+            columns[field].append(code)
+        for field in PLAIN_FIELDS:
+            columns[field].append(getattr(row, field))
+        columns["distance_km"].append(distance_km)
+
+    return dictionaries, columns
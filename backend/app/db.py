@@ -1,13 +1,23 @@
 from __future__ import annotations
 
 import os
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from sqlalchemy import create_engine
-from sqlalchemy import inspect, text
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
+
+from .pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+from .query_stats import track_queries
 
 
 try:
@@ -48,157 +58,223 @@ def _resolve_database_url() -> str:
 
 DATABASE_URL = _resolve_database_url()
 
+def pool_kwargs(is_sqlite: bool, *, is_async: bool = False) -> dict[str, object]:
+    """Pool settings for file SQLite and Postgres (DB_POOL_* env vars)."""
+    pre_ping = os.getenv("DB_POOL_PRE_PING", "0" if is_sqlite else "1")
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT_S", "30")),
+        # Cloud SQL / proxies drop idle connections; recycle and ping them on server databases.
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_S", "-1" if is_sqlite else "1800")),
+        "pool_pre_ping": pre_ping not in {"0", "false", "False"},
+    }
+
+
+# File-based SQLite tuning (WAL + pragmas + serialized writers); set SQLITE_TUNING=0 to opt out.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") not in {"0", "false", "False"}
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+SQLITE_CACHE_SIZE_MB = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))
+
+_SQLITE_WRITER_KEY = "easyrelocate_sqlite_writer"
+
+
+def configure_sqlite_engine(
+    engine: Engine,
+    *,
+    busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS,
+    mmap_size_mb: int = SQLITE_MMAP_SIZE_MB,
+    cache_size_mb: int = SQLITE_CACHE_SIZE_MB,
+) -> None:
+    """
+    Let a file-based SQLite database serve concurrent readers and writers.
+
+    - WAL journal: readers never block on the writer (and vice versa).
+    - `synchronous=NORMAL` (safe with WAL), `busy_timeout`, memory-mapped I/O and a larger page
+      cache, set on every new connection.
+    - Connections bound with the `sqlite_writer` execution option (`WriteSessionLocal`) start
+      with `BEGIN IMMEDIATE` and queue on a process-wide lock, one writer at a time. A deferred
+      transaction that reads first and writes later can't wait for the write lock (SQLite fails
+      it with "database is locked"); an immediate one takes the lock up front and other
+      processes wait up to `busy_timeout` for it.
+    """
+    writer_lock = threading.Lock()
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        # SQLAlchemy emits BEGIN itself below (pysqlite's implicit BEGIN can't be IMMEDIATE).
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size_mb) * 1024 * 1024}")
+            # Negative cache_size is in KiB.
+            cursor.execute(f"PRAGMA cache_size={-int(cache_size_mb) * 1024}")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn) -> None:
+        if not conn.get_execution_options().get("sqlite_writer"):
+            conn.exec_driver_sql("BEGIN")
+            return
+        # On timeout, fall through to SQLite's own busy handling rather than failing here.
+        if writer_lock.acquire(timeout=busy_timeout_ms / 1000):
+            conn.info[_SQLITE_WRITER_KEY] = writer_lock
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        except Exception:
+            _release_writer(conn.info)
+            raise
+
+    def _release_writer(info: dict) -> None:
+        lock = info.pop(_SQLITE_WRITER_KEY, None)
+        if lock is not None:
+            lock.release()
+
+    event.listen(engine, "commit", lambda conn: _release_writer(conn.info))
+    event.listen(engine, "rollback", lambda conn: _release_writer(conn.info))
+    # Safety net: a connection returned to the pool without commit/rollback.
+    event.listen(engine, "checkin", lambda dbapi_conn, record: _release_writer(record.info))
+
+
+class _SerializedConnection:
+    """
+    A sqlite3 connection (and its cursors) that holds `lock` for every method call.
+
+    Only used for the in-memory database (tests), whose single connection both engines share.
+    """
+
+    def __init__(self, target, lock: threading.RLock) -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_lock", lock)
+
+    def __getattr__(self, name: str):
+        value = getattr(self._target, name)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            with self._lock:
+                result = value(*args, **kwargs)
+            if isinstance(result, sqlite3.Cursor):
+                return _SerializedConnection(result, self._lock)
+            return result
+
+        return call
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._target, name, value)
+
+
+def _connect_memory_db() -> _SerializedConnection:
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    return _SerializedConnection(conn, threading.RLock())
+
+
 engine_kwargs: dict[str, object] = {}
 if DATABASE_URL.startswith("sqlite"):
     engine_kwargs["connect_args"] = {"check_same_thread": False}
     if ":memory:" in DATABASE_URL:
         engine_kwargs["poolclass"] = StaticPool
+        engine_kwargs["creator"] = _connect_memory_db
+    else:
+        engine_kwargs.update(pool_kwargs(is_sqlite=True))
+else:
+    engine_kwargs.update(pool_kwargs(is_sqlite=False))
 
 engine = create_engine(DATABASE_URL, **engine_kwargs)
+instrument_engine(engine, "primary")
+track_queries(engine)
+if DATABASE_URL.startswith("sqlite") and ":memory:" not in DATABASE_URL and SQLITE_TUNING:
+    configure_sqlite_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# For requests that write: on tuned SQLite they begin IMMEDIATE and run one at a time.
+WriteSessionLocal = sessionmaker(
+    bind=engine.execution_options(sqlite_writer=True), autoflush=False, autocommit=False
+)
 
 
 def init_db() -> None:
     from . import models  # noqa: F401
+    from .migrations import migrate
+
+    migrate(engine, Base.metadata)
 
-    Base.metadata.create_all(bind=engine)
-    _migrate_schema_if_needed()
 
+def async_driver_url(url: str) -> URL:
+    """The same database through an asyncio driver (aiosqlite / psycopg async)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        # psycopg 3 serves both engines; SQLAlchemy picks its async dialect here.
+        return parsed.set(drivername="postgresql+psycopg")
+    raise RuntimeError(f"No async driver configured for {backend}; set DATABASE_URL_ASYNC")
 
-def _migrate_schema_if_needed() -> None:
+
+def _async_database_url(url: str) -> URL:
+    explicit = os.getenv("DATABASE_URL_ASYNC")
+    if explicit:
+        return make_url(explicit)
+    return async_driver_url(url)
+
+
+class _SharedMemoryConnection:
     """
-    Very small, safe migrations to keep local dev running without a full migration tool.
+    The sync engine's in-memory SQLite connection, minus `close()` (which would drop the DB).
 
-    For production, prefer proper migrations (e.g. Alembic).
+    Calls from aiosqlite's thread and the sync engine's threads are serialized by the
+    connection's lock (see `_SerializedConnection`).
     """
-    def _has_column(conn, table: str, column: str) -> bool:
-        cols = {c["name"] for c in inspect(conn).get_columns(table)}
-        return column in cols
 
-    def _add_column(conn, table: str, column: str, ddl: str) -> None:
-        if _has_column(conn, table, column):
-            return
-        conn.execute(text(ddl))
-
-    dialect = engine.dialect.name
-
-    with engine.begin() as conn:
-        insp = inspect(conn)
-        tables = set(insp.get_table_names())
-
-        # 1) workspaces.expires_at
-        if "workspaces" in tables:
-            if not _has_column(conn, "workspaces", "expires_at"):
-                if dialect == "sqlite":
-                    _add_column(
-                        conn,
-                        "workspaces",
-                        "expires_at",
-                        "ALTER TABLE workspaces ADD COLUMN expires_at DATETIME",
-                    )
-                elif dialect in {"postgresql", "postgres"}:
-                    _add_column(
-                        conn,
-                        "workspaces",
-                        "expires_at",
-                        "ALTER TABLE workspaces ADD COLUMN expires_at TIMESTAMPTZ",
-                    )
-
-        # 2) listings/targets.workspace_id (for older local SQLite DBs)
-        if dialect == "sqlite":
-            if "listings" in tables and not _has_column(conn, "listings", "workspace_id"):
-                _add_column(
-                    conn,
-                    "listings",
-                    "workspace_id",
-                    "ALTER TABLE listings ADD COLUMN workspace_id TEXT",
-                )
-                conn.execute(
-                    text(
-                        "CREATE INDEX IF NOT EXISTS idx_listings_workspace_id "
-                        "ON listings(workspace_id)"
-                    )
-                )
-            if "targets" in tables and not _has_column(conn, "targets", "workspace_id"):
-                _add_column(
-                    conn,
-                    "targets",
-                    "workspace_id",
-                    "ALTER TABLE targets ADD COLUMN workspace_id TEXT",
-                )
-                conn.execute(
-                    text(
-                        "CREATE INDEX IF NOT EXISTS idx_targets_workspace_id "
-                        "ON targets(workspace_id)"
-                    )
-                )
-
-            needs_backfill = False
-            if "listings" in tables and _has_column(conn, "listings", "workspace_id"):
-                r = conn.execute(
-                    text(
-                        "SELECT 1 FROM listings WHERE workspace_id IS NULL OR workspace_id = '' LIMIT 1"
-                    )
-                ).fetchone()
-                needs_backfill = needs_backfill or (r is not None)
-            if "targets" in tables and _has_column(conn, "targets", "workspace_id"):
-                r = conn.execute(
-                    text(
-                        "SELECT 1 FROM targets WHERE workspace_id IS NULL OR workspace_id = '' LIMIT 1"
-                    )
-                ).fetchone()
-                needs_backfill = needs_backfill or (r is not None)
-
-            if needs_backfill and "workspaces" in tables:
-                # Create a new workspace token for legacy local rows so existing data remains accessible.
-                from datetime import datetime, timezone
-                import uuid
-
-                from .workspaces import generate_workspace_token, hash_workspace_token
-
-                token = generate_workspace_token()
-                token_hash = hash_workspace_token(token)
-                ws_id = str(uuid.uuid4())
-                created_at = datetime.now(timezone.utc).isoformat()
-
-                conn.execute(
-                    text(
-                        "INSERT INTO workspaces (id, token_hash, created_at, expires_at) "
-                        "VALUES (:id, :token_hash, :created_at, NULL)"
-                    ),
-                    {"id": ws_id, "token_hash": token_hash, "created_at": created_at},
-                )
-
-                try:
-                    token_path = (
-                        Path(__file__).resolve().parents[1]
-                        / ".easyrelocate_local_workspace_token"
-                    )
-                    token_path.write_text(token + "\n", encoding="utf-8")
-                except Exception:
-                    pass
-
-                print(
-                    "[EasyRelocate] Migrated existing local rows into a new workspace. "
-                    "Token saved to backend/.easyrelocate_local_workspace_token"
-                )
-
-                if "listings" in tables:
-                    conn.execute(
-                        text(
-                            "UPDATE listings SET workspace_id = :ws_id "
-                            "WHERE workspace_id IS NULL OR workspace_id = ''"
-                        ),
-                        {"ws_id": ws_id},
-                    )
-                if "targets" in tables:
-                    conn.execute(
-                        text(
-                            "UPDATE targets SET workspace_id = :ws_id "
-                            "WHERE workspace_id IS NULL OR workspace_id = ''"
-                        ),
-                        {"ws_id": ws_id},
-                    )
+    def __init__(self, conn) -> None:
+        object.__setattr__(self, "_conn", conn)
+
+    def close(self) -> None:
+        pass
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._conn, name, value)
+
+
+async def _connect_shared_memory_db():
+    # A second ":memory:" connection would be a different, empty database.
+    import aiosqlite
+
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+    finally:
+        raw.close()
+    return await aiosqlite.Connection(lambda: _SharedMemoryConnection(conn), iter_chunk_size=64)
+
+
+async_engine_kwargs: dict[str, object] = {}
+if DATABASE_URL.startswith("sqlite"):
+    if ":memory:" in DATABASE_URL:
+        async_engine_kwargs["poolclass"] = NullPool
+        async_engine_kwargs["async_creator"] = _connect_shared_memory_db
+    else:
+        async_engine_kwargs.update(pool_kwargs(is_sqlite=True, is_async=True))
+else:
+    async_engine_kwargs.update(pool_kwargs(is_sqlite=False, is_async=True))
+
+async_engine = create_async_engine(_async_database_url(DATABASE_URL), **async_engine_kwargs)
+instrument_engine(async_engine.sync_engine, "primary (async)")
+track_queries(async_engine.sync_engine)
+if DATABASE_URL.startswith("sqlite") and ":memory:" not in DATABASE_URL and SQLITE_TUNING:
+    configure_sqlite_engine(async_engine.sync_engine)
+# expire_on_commit=False: attribute access after a commit must not lazy-load (no implicit IO).
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -207,3 +283,16 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_write_db() -> Generator[Session, None, None]:
+    db = WriteSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_EVENTS_BACKEND = os.getenv("WORKSPACE_EVENTS_BACKEND", "auto").strip().lower()
+WORKSPACE_EVENTS_POLL_S = float(os.getenv("WORKSPACE_EVENTS_POLL_S", "2"))
+PG_NOTIFY_CHANNEL = "easyrelocate_workspace_changes"
+
+_PENDING_KEY = "easyrelocate_workspace_versions"
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, version: int) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue[int] = asyncio.Queue()
+        # Newest workspace version the subscriber has (read on connect, then published).
+        self.version = version
+
+
+class WorkspaceEventHub:
+    """
+    In-process fan-out of "workspace changed" notifications to open event streams.
+
+    `publish` is thread-safe (sync endpoints run in the threadpool); each subscriber receives the
+    new workspace versions on its own event loop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[_Subscriber]] = {}
+        self._listeners: list[Callable[[str, int], None]] = []
+
+    def add_listener(self, listener: Callable[[str, int], None]) -> None:
+        """Call `listener(workspace_id, version)` on every publish (from the publishing thread)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, int], None]) -> None:
+        self._listeners.remove(listener)
+
+    @contextmanager
+    def subscribe(self, workspace_id: str, version: int) -> Iterator[asyncio.Queue[int]]:
+        """Receive the workspace's versions after `version` (the one the subscriber already read)."""
+        sub = _Subscriber(asyncio.get_running_loop(), version)
+        with self._lock:
+            self._subscribers.setdefault(workspace_id, set()).add(sub)
+        try:
+            yield sub.queue
+        finally:
+            with self._lock:
+                subs = self._subscribers.get(workspace_id)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[workspace_id]
+
+    def subscribed_versions(self) -> dict[str, int]:
+        """The oldest version any subscriber of each workspace has."""
+        with self._lock:
+            return {
+                workspace_id: min(sub.version for sub in subs)
+                for workspace_id, subs in self._subscribers.items()
+            }
+
+    def publish(self, workspace_id: str, version: int) -> None:
+        for listener in self._listeners:
+            listener(workspace_id, version)
+        with self._lock:
+            subs = list(self._subscribers.get(workspace_id, ()))
+            for sub in subs:
+                sub.version = max(sub.version, version)
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.queue.put_nowait, version)
+            except RuntimeError:
+                # Loop already closed (shutdown); the stream is gone anyway.
+                pass
+
+
+hub = WorkspaceEventHub()
+
+
+def record_workspace_version(db: Session, workspace_id: str, version: int) -> None:
+    """Queue a notification that is published once `db` commits (dropped on rollback)."""
+    db.info.setdefault(_PENDING_KEY, {})[workspace_id] = version
+    notifier.on_version_bump(db, workspace_id, version)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for workspace_id, version in pending.items():
+            hub.publish(workspace_id, version)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class ChangeNotifier:
+    """
+    Cross-worker delivery of workspace changes.
+
+    The base class only covers the current process (commits publish to `hub` directly), which is
+    enough for a single uvicorn worker.
+    """
+
+    def on_version_bump(self, db: Session, workspace_id: str, version: int) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PollingChangeNotifier(ChangeNotifier):
+    """
+    Stand-in for databases without LISTEN/NOTIFY (SQLite with several workers).
+
+    While at least one stream is open in this process, one query every `interval_s` reads the
+    versions of all subscribed workspaces and publishes the ones newer than a subscriber has. The
+    baseline is each subscriber's own version, so a change committed between a stream reading its
+    version and the first poll is still delivered.
+    """
+
+    def __init__(self, engine: Engine, interval_s: float) -> None:
+        self._engine = engine
+        self._interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="workspace-events-poll", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval_s + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_s):
+            self.poll()
+
+    def poll(self) -> None:
+        from .models import Workspace
+
+        subscribed = hub.subscribed_versions()
+        if not subscribed:
+            return
+        try:
+            with self._engine.connect() as conn:
+                rows = conn.execute(
+                    select(Workspace.id, Workspace.version).where(Workspace.id.in_(list(subscribed)))
+                ).all()
+        except Exception:
+            logger.exception("Workspace change poll failed")
+            return
+        for workspace_id, version in rows:
+            if version > subscribed[workspace_id]:
+                hub.publish(workspace_id, version)
+
+
+class PostgresChangeNotifier(ChangeNotifier):
+    """
+    Postgres LISTEN/NOTIFY: writers `pg_notify` inside their transaction (delivered on commit) and
+    one listener connection per process republishes to `hub`. Idle streams cost no queries.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self._conninfo = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def on_version_bump(self, db: Session, workspace_id: str, version: int) -> None:
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": PG_NOTIFY_CHANNEL, "payload": f"{workspace_id}:{version}"},
+        )
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="workspace-events-listen", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        import psycopg
+
+        backoff_s = 1.0
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self._conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {PG_NOTIFY_CHANNEL}")
+                    backoff_s = 1.0
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            workspace_id, _, version = notify.payload.rpartition(":")
+                            if workspace_id and version.isdigit():
+                                hub.publish(workspace_id, int(version))
+            except Exception:
+                logger.exception("Workspace change listener failed; reconnecting")
+                self._stop.wait(backoff_s)
+                backoff_s = min(backoff_s * 2, 30.0)
+
+
+def _build_notifier() -> ChangeNotifier:
+    from .db import engine
+
+    backend = WORKSPACE_EVENTS_BACKEND
+    if backend == "auto":
+        if engine.dialect.name == "postgresql":
+            backend = "postgres"
+        elif engine.url.database in {None, "", ":memory:"}:
+            # Private to this process: nothing to hear from other workers.
+            backend = "local"
+        else:
+            backend = "poll"
+    if backend == "postgres":
+        return PostgresChangeNotifier(engine)
+    if backend == "poll":
+        return PollingChangeNotifier(engine, WORKSPACE_EVENTS_POLL_S)
+    if backend == "local":
+        return ChangeNotifier()
+    raise RuntimeError(f"Unknown WORKSPACE_EVENTS_BACKEND: {WORKSPACE_EVENTS_BACKEND}")
+
+
+notifier = _build_notifier()
+
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+from dataclasses import dataclass
+from typing import Iterator
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from .listing_metrics import distance_or_fallback
+from .models import ListingTargetMetric
+from .queries import listings_newest_first, with_target_distance
+from .schemas import ExportFormat, ListingExportRow, ListingOut
+from .serialization import LISTING_OUT_COLUMNS, listing_row
+
+
+# Rows fetched (and written to the response) per round trip. On Postgres the rows come from a
+# server-side cursor, so memory stays flat however many listings a workspace has.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+EXPORT_FIELDS = (*ListingOut.model_fields, "distance_km")
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+_row_adapter: TypeAdapter[ListingExportRow] = TypeAdapter(ListingExportRow)
+_batch_adapter: TypeAdapter[list[ListingExportRow]] = TypeAdapter(list[ListingExportRow])
+
+
+@dataclass(frozen=True)
+class ExportTarget:
+    """The target distances are measured to (plain values: the export outlives the request)."""
+
+    id: str
+    lat: float
+    lng: float
+
+
+def export_batches(
+    db: Session,
+    workspace_id: str,
+    target: ExportTarget | None,
+    *,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[list[ListingExportRow]]:
+    """A workspace's listings, newest first, `batch_size` rows at a time."""
+    if target is None:
+        stmt = listings_newest_first(workspace_id, *LISTING_OUT_COLUMNS)
+    else:
+        stmt = with_target_distance(
+            listings_newest_first(
+                workspace_id,
+                *LISTING_OUT_COLUMNS,
+                ListingTargetMetric.distance_km.label("distance_km"),
+            ),
+            target.id,
+        )
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        batch: list[ListingExportRow] = []
+        for row in partition:
+            distance_km = None
+            if target is not None:
+                distance_km = distance_or_fallback(row.distance_km, row.lat, row.lng, target)
+            batch.append({**listing_row(row), "distance_km": distance_km})
+        yield batch
+
+
+def _ndjson_chunks(batches: Iterator[list[ListingExportRow]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(_row_adapter.dump_json(row) + b"\n" for row in batch)
+
+
+def _csv_chunks(batches: Iterator[list[ListingExportRow]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in batches:
+        # Same value formatting as the JSON endpoints (ISO timestamps, plain numbers).
+        for row in _batch_adapter.dump_python(batch, mode="json"):
+            writer.writerow([row[field] for field in EXPORT_FIELDS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export.
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_listings(
+    db: Session,
+    workspace_id: str,
+    target: ExportTarget | None,
+    format: ExportFormat,
+    *,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """The encoded export, one chunk per batch of rows."""
+    batches = export_batches(db, workspace_id, target, batch_size=batch_size)
+    if format == "csv":
+        return _csv_chunks(batches)
+    return _ndjson_chunks(batches)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import math
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision stored on listings (~4.8m x 4.8m cells). Queries use shorter prefixes of it.
+GEOHASH_PRECISION = 9
+
+# Upper bound on the number of prefix ranges a single bounding-box query expands to.
+MAX_COVER_CELLS = 32
+
+# Sorts after every base32 character, so `prefix <= h < prefix + PREFIX_END` is a prefix match
+# that a plain B-tree index can serve (unlike LIKE on SQLite's default collation).
+PREFIX_END = "{"
+
+# Slightly below the true ~111.19 km per degree so derived boxes always contain the circle.
+_KM_PER_DEG_LAT = 111.0
+
+
+def encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars: list[str] = []
+    bits = 0
+    n_bits = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        n_bits += 1
+        if n_bits == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            n_bits = 0
+    return "".join(chars)
+
+
+def cell_size_deg(precision: int) -> tuple[float, float]:
+    """(lat_degrees, lng_degrees) spanned by one cell at `precision`."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _cells_for_box(
+    south: float, west: float, north: float, east: float, precision: int
+) -> set[str]:
+    lat_step, lng_step = cell_size_deg(precision)
+    i0 = math.floor((south + 90.0) / lat_step)
+    i1 = math.floor((min(north, 90.0 - 1e-9) + 90.0) / lat_step)
+    j0 = math.floor((west + 180.0) / lng_step)
+    j1 = math.floor((min(east, 180.0 - 1e-9) + 180.0) / lng_step)
+    cells: set[str] = set()
+    for i in range(i0, i1 + 1):
+        lat = -90.0 + (i + 0.5) * lat_step
+        for j in range(j0, j1 + 1):
+            cells.add(encode(lat, -180.0 + (j + 0.5) * lng_step, precision))
+    return cells
+
+
+def _count_cells(south: float, west: float, north: float, east: float, precision: int) -> int:
+    lat_step, lng_step = cell_size_deg(precision)
+    rows = math.floor((north + 90.0) / lat_step) - math.floor((south + 90.0) / lat_step) + 1
+    cols = math.floor((east + 180.0) / lng_step) - math.floor((west + 180.0) / lng_step) + 1
+    return rows * cols
+
+
+def cover_bbox(south: float, west: float, north: float, east: float) -> list[str]:
+    """
+    Geohash prefixes whose cells together cover the bounding box.
+
+    Picks the finest precision that keeps the cover under `MAX_COVER_CELLS`. A box with
+    `west > east` crosses the antimeridian and is split in two.
+    """
+    south = max(-90.0, min(90.0, south))
+    north = max(-90.0, min(90.0, north))
+    if south > north:
+        return []
+    boxes = [(south, west, north, east)]
+    if west > east:
+        boxes = [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if sum(_count_cells(*box, precision) for box in boxes) <= MAX_COVER_CELLS:
+            break
+    cells: set[str] = set()
+    for box in boxes:
+        cells |= _cells_for_box(*box, precision)
+    return sorted(cells)
+
+
+def bbox_around(lat: float, lng: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Bounding box (south, west, north, east) that contains the circle of `radius_km`."""
+    d_lat = radius_km / _KM_PER_DEG_LAT
+    south = max(-90.0, lat - d_lat)
+    north = min(90.0, lat + d_lat)
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat <= 1e-9 or radius_km / (_KM_PER_DEG_LAT * cos_lat) >= 180.0:
+        return south, -180.0, north, 180.0
+    d_lng = radius_km / (_KM_PER_DEG_LAT * cos_lat)
+    west = lng - d_lng
+    east = lng + d_lng
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return south, west, north, east
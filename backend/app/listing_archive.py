@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.orm import Session
+
+from .geohash import encode as geohash_encode
+from .listing_metrics import refresh_listings_metrics
+from .models import ArchivedListing, Listing, ListingTargetMetric, ListingTombstone, Workspace
+from .workspace_counters import record_listings_deleted, record_listings_saved
+from .workspace_versions import bump_workspace_version, record_listing_tombstones
+
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the in-process scheduler (run scripts/archive_listings.py from cron instead).
+LISTING_ARCHIVE_INTERVAL_S = float(os.getenv("LISTING_ARCHIVE_INTERVAL_S", "0"))
+
+DEFAULT_ARCHIVE_BATCH = 500
+DEFAULT_WORKSPACE_BATCH = 100
+
+# Columns copied between `listings` and `archived_listings`. geohash, change_seq and the metric
+# rows are derived data: dropped on the way out, rebuilt on restore.
+_ARCHIVED_FIELDS = (
+    "id",
+    "workspace_id",
+    "source",
+    "source_url",
+    "title",
+    "price_value",
+    "currency",
+    "price_period",
+    "monthly_price",
+    "lat",
+    "lng",
+    "location_text",
+    "captured_at",
+)
+
+
+@dataclass
+class ArchiveReport:
+    workspaces: int = 0
+    listings: int = 0
+
+
+def _expired_listings(workspace_id: str, cutoff: datetime, limit: int):
+    # Oldest first along ix_listings_workspace_captured_at; restored listings get a fresh period.
+    return (
+        select(*(getattr(Listing, name) for name in _ARCHIVED_FIELDS))
+        .where(
+            Listing.workspace_id == workspace_id,
+            Listing.captured_at < cutoff,
+            or_(Listing.restored_at.is_(None), Listing.restored_at < cutoff),
+        )
+        .order_by(Listing.captured_at, Listing.id)
+        .limit(limit)
+    )
+
+
+def archive_listing_batch(
+    db: Session, workspace_id: str, cutoff: datetime, *, now: datetime, batch_size: int
+) -> int:
+    """
+    Move up to `batch_size` of the workspace's listings captured before `cutoff` into
+    `archived_listings` (the caller commits). Returns the number moved.
+
+    Clients see the move as deletes: the workspace version is bumped and tombstones are left for
+    delta sync, like `DELETE /api/listings/{id}`.
+    """
+    if db.scalar(_expired_listings(workspace_id, cutoff, 1).with_only_columns(Listing.id)) is None:
+        # Nothing to move: don't touch (or lock) the workspace row.
+        return 0
+    change_seq = bump_workspace_version(db, workspace_id)
+    if change_seq is None:
+        # Purged concurrently; its listings go with it.
+        return 0
+    rows = db.execute(_expired_listings(workspace_id, cutoff, batch_size)).mappings().all()
+    if not rows:
+        return 0
+    ids = [row["id"] for row in rows]
+    # A URL archived earlier, captured again and now expiring again: keep the newest copy.
+    db.execute(
+        delete(ArchivedListing).where(
+            ArchivedListing.workspace_id == workspace_id,
+            ArchivedListing.source_url.in_([row["source_url"] for row in rows]),
+        )
+    )
+    db.execute(insert(ArchivedListing), [{**row, "archived_at": now} for row in rows])
+    db.execute(delete(ListingTargetMetric).where(ListingTargetMetric.listing_id.in_(ids)))
+    db.execute(delete(Listing).where(Listing.id.in_(ids)))
+    record_listing_tombstones(db, workspace_id, ids, change_seq)
+    record_listings_deleted(db, workspace_id, ids)
+    return len(ids)
+
+
+def archive_expired_listings(
+    session_factory: Callable[[], Session],
+    *,
+    now: datetime | None = None,
+    batch_size: int = DEFAULT_ARCHIVE_BATCH,
+    workspace_batch: int = DEFAULT_WORKSPACE_BATCH,
+) -> ArchiveReport:
+    """
+    Apply every workspace's `listing_retention_days`, `batch_size` listings per transaction.
+
+    Safe to run from several workers at once: each batch re-reads what is still expired after
+    taking the workspace row lock, and an interrupted run resumes on the next one.
+    """
+    now = now or datetime.now(timezone.utc)
+    report = ArchiveReport()
+    after = ""
+    while True:
+        with session_factory() as db:
+            settings = db.execute(
+                select(Workspace.id, Workspace.listing_retention_days)
+                .where(Workspace.listing_retention_days.is_not(None), Workspace.id > after)
+                .order_by(Workspace.id)
+                .limit(workspace_batch)
+            ).all()
+        if not settings:
+            return report
+        after = settings[-1].id
+        for workspace_id, retention_days in settings:
+            cutoff = now - timedelta(days=retention_days)
+            moved = 0
+            while True:
+                with session_factory() as db:
+                    batch = archive_listing_batch(
+                        db, workspace_id, cutoff, now=now, batch_size=batch_size
+                    )
+                    db.commit()
+                moved += batch
+                if batch < batch_size:
+                    break
+            if moved:
+                logger.info("Archived %d listings of workspace %s", moved, workspace_id)
+                report.workspaces += 1
+                report.listings += moved
+
+
+def restore_archived_listings(
+    db: Session, workspace_id: str, listing_ids: list[str], *, change_seq: int, now: datetime
+) -> list[Listing]:
+    """
+    Move archived listings back into `listings` (the caller bumps the version and commits).
+
+    An archived listing whose URL was captured again since is dropped: the live row is newer.
+    Restored listings keep their `captured_at`; retention counts from `restored_at` for them.
+    """
+    archived = list(
+        db.scalars(
+            select(ArchivedListing).where(
+                ArchivedListing.workspace_id == workspace_id,
+                ArchivedListing.id.in_(listing_ids),
+            )
+        )
+    )
+    if not archived:
+        return []
+    live = set(
+        db.scalars(
+            select(Listing.source_url).where(
+                Listing.workspace_id == workspace_id,
+                Listing.source_url.in_([row.source_url for row in archived]),
+            )
+        )
+    )
+    restored = [
+        Listing(
+            **{name: getattr(row, name) for name in _ARCHIVED_FIELDS},
+            geohash=(
+                geohash_encode(row.lat, row.lng)
+                if row.lat is not None and row.lng is not None
+                else None
+            ),
+            change_seq=change_seq,
+            restored_at=now,
+        )
+        for row in archived
+        if row.source_url not in live
+    ]
+    db.execute(delete(ArchivedListing).where(ArchivedListing.id.in_([row.id for row in archived])))
+    if not restored:
+        return []
+    restored_ids = [listing.id for listing in restored]
+    # The archive left tombstones under these ids; a delta sync must not delete them again.
+    db.execute(delete(ListingTombstone).where(ListingTombstone.listing_id.in_(restored_ids)))
+    db.add_all(restored)
+    db.flush()
+    refresh_listings_metrics(db, workspace_id, restored)
+    record_listings_saved(
+        db, workspace_id, [(listing.id, listing.captured_at, True) for listing in restored]
+    )
+    return restored
+
+
+class ListingArchiveScheduler:
+    """Optional background archival every `interval_s` seconds (`LISTING_ARCHIVE_INTERVAL_S`)."""
+
+    def __init__(self, session_factory: Callable[[], Session], interval_s: float) -> None:
+        self._session_factory = session_factory
+        self._interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._interval_s <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="listing-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_s):
+            try:
+                archive_expired_listings(self._session_factory)
+            except Exception:
+                logger.exception("Listing archival failed")
+
+
+def _build_scheduler() -> ListingArchiveScheduler:
+    from .db import WriteSessionLocal
+
+    return ListingArchiveScheduler(WriteSessionLocal, LISTING_ARCHIVE_INTERVAL_S)
+
+
+scheduler = _build_scheduler()
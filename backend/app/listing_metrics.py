@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import and_, delete, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .distance import haversine_km
+from .models import InterestingTarget, Listing, ListingTargetMetric, Target
+
+
+TARGET_KIND = "target"
+INTERESTING_TARGET_KIND = "interesting"
+
+
+def _insert_metric_rows(db: Session, rows: list[dict[str, object]]) -> None:
+    if rows:
+        db.execute(insert(ListingTargetMetric), rows)
+
+
+def refresh_listing_metrics(db: Session, listing: Listing) -> None:
+    """
+    Recompute the metric rows of one listing against every target in its workspace.
+
+    Call after the listing's coordinates changed (the listing must already be flushed).
+    """
+    refresh_listings_metrics(db, listing.workspace_id, [listing])
+
+
+def refresh_listings_metrics(db: Session, workspace_id: str, listings: list[Listing]) -> None:
+    """`refresh_listing_metrics` for several listings of one workspace (one DELETE, one INSERT)."""
+    if not listings:
+        return
+    db.execute(
+        delete(ListingTargetMetric).where(
+            ListingTargetMetric.listing_id.in_([listing.id for listing in listings])
+        )
+    )
+    located = [
+        listing for listing in listings if listing.lat is not None and listing.lng is not None
+    ]
+    if not located:
+        return
+
+    rows: list[dict[str, object]] = []
+    for kind, model in ((TARGET_KIND, Target), (INTERESTING_TARGET_KIND, InterestingTarget)):
+        for target_id, lat, lng in db.execute(
+            select(model.id, model.lat, model.lng).where(model.workspace_id == workspace_id)
+        ):
+            for listing in located:
+                rows.append(
+                    {
+                        "listing_id": listing.id,
+                        "target_kind": kind,
+                        "target_id": target_id,
+                        "workspace_id": workspace_id,
+                        "distance_km": haversine_km(listing.lat, listing.lng, lat, lng),
+                    }
+                )
+    _insert_metric_rows(db, rows)
+
+
+def refresh_target_metrics(db: Session, target: Target | InterestingTarget, kind: str) -> None:
+    """Recompute the metric rows of one target against every located listing in its workspace."""
+    delete_target_metrics(db, target.id, kind)
+    listings = db.execute(
+        select(Listing.id, Listing.lat, Listing.lng).where(
+            Listing.workspace_id == target.workspace_id,
+            Listing.lat.is_not(None),
+            Listing.lng.is_not(None),
+        )
+    )
+    _insert_metric_rows(
+        db,
+        [
+            {
+                "listing_id": listing_id,
+                "target_kind": kind,
+                "target_id": target.id,
+                "workspace_id": target.workspace_id,
+                "distance_km": haversine_km(lat, lng, target.lat, target.lng),
+            }
+            for listing_id, lat, lng in listings
+        ],
+    )
+
+
+def delete_target_metrics(db: Session, target_id: str, kind: str) -> None:
+    db.execute(
+        delete(ListingTargetMetric).where(
+            ListingTargetMetric.target_kind == kind, ListingTargetMetric.target_id == target_id
+        )
+    )
+
+
+def delete_listing_metrics(db: Session, listing_id: str) -> None:
+    db.execute(delete(ListingTargetMetric).where(ListingTargetMetric.listing_id == listing_id))
+
+
+def ensure_target_metrics(db: Session | Connection, target: Any, kind: str) -> int:
+    """
+    Fill in metric rows missing for `target` (anything with id, workspace_id, lat and lng).
+
+    Used by the metrics backfill migration for rows written before the table existed. Returns the
+    number of rows inserted.
+    """
+    missing = db.execute(
+        select(Listing.id, Listing.lat, Listing.lng)
+        .outerjoin(
+            ListingTargetMetric,
+            and_(
+                ListingTargetMetric.listing_id == Listing.id,
+                ListingTargetMetric.target_kind == kind,
+                ListingTargetMetric.target_id == target.id,
+            ),
+        )
+        .where(
+            Listing.workspace_id == target.workspace_id,
+            Listing.lat.is_not(None),
+            Listing.lng.is_not(None),
+            ListingTargetMetric.listing_id.is_(None),
+        )
+    ).all()
+    _insert_metric_rows(
+        db,
+        [
+            {
+                "listing_id": listing_id,
+                "target_kind": kind,
+                "target_id": target.id,
+                "workspace_id": target.workspace_id,
+                "distance_km": haversine_km(lat, lng, target.lat, target.lng),
+            }
+            for listing_id, lat, lng in missing
+        ],
+    )
+    return len(missing)
+
+
+def distance_or_fallback(
+    distance_km: float | None, lat: float | None, lng: float | None, target: Any
+) -> float | None:
+    """
+    The stored distance, or one computed inline for a located listing without a metric row.
+
+    Reads never write: the write paths and the backfill migration keep the table complete, and
+    this covers whatever slips between them.
+    """
+    if distance_km is not None or lat is None or lng is None:
+        return distance_km
+    return haversine_km(lat, lng, target.lat, target.lng)
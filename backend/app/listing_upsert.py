@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
+
+from .models import Listing
+from .pricing import monthly_price_expr
+
+
+def listing_upsert(dialect: str, values: dict[str, Any], overwrite: Iterable[str]) -> Insert:
+    """
+    `INSERT ... ON CONFLICT (workspace_id, source_url) DO UPDATE` for one listing.
+
+    On conflict, `captured_at` and `change_seq` always take the new values. The `overwrite`
+    fields take them only when they are not NULL (`COALESCE`), and every other column is kept.
+    `monthly_price` is recomputed from the merged price. `geohash` is kept only while the
+    coordinates are unchanged and becomes NULL otherwise, so the caller can tell from the
+    returned row that it has to encode it and refresh the listing's metrics.
+    """
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(Listing).values(**values)
+    old = Listing.__table__.c
+    new = stmt.excluded
+
+    merged = {field: func.coalesce(new[field], old[field]) for field in overwrite}
+    lat = merged.get("lat", old.lat)
+    lng = merged.get("lng", old.lng)
+    set_ = {
+        **merged,
+        "captured_at": new.captured_at,
+        "change_seq": new.change_seq,
+        "monthly_price": monthly_price_expr(
+            merged.get("price_value", old.price_value), merged.get("price_period", old.price_period)
+        ),
+        "geohash": case(
+            (
+                and_(old.lat.is_not_distinct_from(lat), old.lng.is_not_distinct_from(lng)),
+                old.geohash,
+            ),
+            else_=None,
+        ),
+    }
+    return stmt.on_conflict_do_update(index_elements=[old.workspace_id, old.source_url], set_=set_)
@@ -2,21 +2,56 @@ from __future__ import annotations
 
 import os
 import re
+import uuid
 import hashlib
 from urllib.parse import urlsplit, urlunsplit
+import asyncio
+import json
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
-from typing import Annotated
+from typing import Annotated, AsyncGenerator, Generator, Iterator
 
-from fastapi import Depends, FastAPI, HTTPException, Query, Header
+from fastapi import Depends, FastAPI, HTTPException, Query, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from httpx import HTTPError
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .db import get_db, init_db
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    # Optional: only needed for `/api/compare?format=msgpack`.
+    msgpack = None
+
+from .columnar import compare_columns
+from .db import (
+    AsyncSessionLocal,
+    SessionLocal,
+    async_engine,
+    get_async_db,
+    get_db,
+    get_write_db,
+    init_db,
+)
+from .events import hub as workspace_events, notifier as change_notifier
 from .distance import haversine_km
+from .export import EXPORT_MEDIA_TYPES, ExportTarget, export_listings
+from .geohash import PREFIX_END, bbox_around, cover_bbox, encode as geohash_encode
+from .listing_upsert import listing_upsert
+from .listing_metrics import (
+    INTERESTING_TARGET_KIND,
+    TARGET_KIND,
+    delete_listing_metrics,
+    delete_target_metrics,
+    distance_or_fallback,
+    refresh_listing_metrics,
+    refresh_listings_metrics,
+    refresh_target_metrics,
+)
 from .geocoding import (
+    ENABLE_GEOCODING,
     approx_street_from_address,
     geocode_address,
     GeocodingConfigError,
@@ -24,20 +59,83 @@ from .geocoding import (
     reverse_geocode,
     rough_location_from_address,
 )
-from .models import InterestingTarget, Listing, Target, Workspace
+from .models import (
+    ArchivedListing,
+    InterestingTarget,
+    Listing,
+    ListingTargetMetric,
+    ListingTombstone,
+    Target,
+    Workspace,
+)
 from .openrouter import (
     extract_housing_post,
     OpenRouterConfigError,
     OpenRouterProviderError,
 )
+from .pool_metrics import pool_snapshots
+from .query_stats import QueryStatsMiddleware
+from .pricing import monthly_price
+from .ranking import (
+    FeatureRange,
+    ListingScorer,
+    RankingWeights,
+    timestamp as ranking_timestamp,
+    top_k,
+)
+from .pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+    keyset_order_by,
+)
+from .replicas import read_from_replica, router as replica_router
+from .queries import (
+    compare_rows,
+    latest_target,
+    listings_page,
+    targets_newest_first,
+    with_target_distance,
+)
+from .serialization import (
+    LISTING_OUT_COLUMNS,
+    compare_rows_adapter,
+    json_response,
+    listing_changes_adapter,
+    listing_row,
+    listing_rows_adapter,
+)
+from .workspace_cache import AuthenticatedWorkspace, cache as workspace_auth_cache
+from .workspace_counters import record_listings_deleted, record_listings_saved
+from .workspace_gc import scheduler as workspace_gc_scheduler
+from .listing_archive import restore_archived_listings, scheduler as listing_archive_scheduler
+from .workspace_versions import bump_workspace_version, record_listing_tombstones
 from .workspaces import hash_workspace_token
 from .schemas import (
+    ArchiveRestoreIn,
+    ArchivedListingOut,
+    ArchivedListingsOut,
+    BulkItemStatus,
+    CompareColumnarResponse,
+    CompareFormat,
+    CompareItem,
     CompareResponse,
+    CompareSort,
+    DbPoolStatsOut,
+    ExportFormat,
     GeocodeResultOut,
+    ListingBulkIn,
+    ListingBulkItemOut,
+    ListingBulkOut,
+    ListingChangesOut,
     ListingOut,
     ListingFromTextIn,
+    ListingRetention,
+    ListingSource,
     ListingSummaryOut,
     ListingUpsert,
+    RankedCompareResponse,
     ReverseGeocodeOut,
     InterestingTargetOut,
     InterestingTargetUpsert,
@@ -66,7 +164,19 @@ ENABLE_LISTING_GEOCODE_FALLBACK = os.getenv(
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     init_db()
-    yield
+    change_notifier.start()
+    workspace_gc_scheduler.start()
+    listing_archive_scheduler.start()
+    replica_router.start()
+    try:
+        yield
+    finally:
+        replica_router.stop()
+        listing_archive_scheduler.stop()
+        workspace_gc_scheduler.stop()
+        change_notifier.stop()
+        await replica_router.dispose()
+        await async_engine.dispose()
 
 
 app = FastAPI(title="EasyRelocate API", version="0.1.0", lifespan=lifespan)
@@ -86,10 +196,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
+app.add_middleware(QueryStatsMiddleware)
 
 
 DbDep = Annotated[Session, Depends(get_db)]
+# Mutating endpoints: serialized writer transactions on SQLite (see db.configure_sqlite_engine).
+WriteDbDep = Annotated[Session, Depends(get_write_db)]
+# Hot read paths (auth, listings, summary, compare) run on the event loop, not the threadpool.
+AsyncDbDep = Annotated[AsyncSession, Depends(get_async_db)]
 AuthHeader = Annotated[str | None, Header(alias="Authorization")]
 
 _RE_HTTP_URL = re.compile(r"^https?://", re.IGNORECASE)
@@ -120,24 +236,168 @@ def _extract_bearer_token(auth: str | None) -> str | None:
     return None
 
 
-def get_workspace(db: DbDep, authorization: AuthHeader = None) -> Workspace:
+async def get_workspace(authorization: AuthHeader = None) -> AuthenticatedWorkspace:
+    """
+    The workspace of the bearer token.
+
+    A cache miss reads it through its own short-lived session, released before the endpoint opens
+    its (sync, async, writer or replica) session, so a request never holds two connections.
+    """
     token = _extract_bearer_token(authorization)
     if not token:
         raise HTTPException(status_code=401, detail="Missing workspace token")
 
     token_hash = hash_workspace_token(token)
-    ws = db.scalar(select(Workspace).where(Workspace.token_hash == token_hash))
-    if ws:
-        if ws.expires_at is not None:
-            exp = _as_utc(ws.expires_at)
-            if exp <= _utcnow():
-                raise HTTPException(status_code=401, detail="Workspace token expired")
-            ws.expires_at = exp
-        return ws
-    raise HTTPException(status_code=401, detail="Invalid workspace token")
+    ws = workspace_auth_cache.get(token_hash)
+    if ws is None:
+        generation = workspace_auth_cache.generation()
+        async with AsyncSessionLocal() as db:
+            row = (
+                await db.execute(
+                    select(Workspace.id, Workspace.expires_at).where(
+                        Workspace.token_hash == token_hash
+                    )
+                )
+            ).first()
+        if row is None:
+            raise HTTPException(status_code=401, detail="Invalid workspace token")
+        ws = AuthenticatedWorkspace(
+            id=row.id, expires_at=_as_utc(row.expires_at) if row.expires_at else None
+        )
+        workspace_auth_cache.put(token_hash, ws, generation)
+    if ws.is_expired(_utcnow()):
+        raise HTTPException(status_code=401, detail="Workspace token expired")
+    return ws
+
+
+WorkspaceDep = Annotated[AuthenticatedWorkspace, Depends(get_workspace)]
+
+
+def get_read_db(ws: WorkspaceDep) -> Generator[Session, None, None]:
+    with replica_router.session(ws.id) as db:
+        yield db
+
+
+async def get_async_read_db(ws: WorkspaceDep) -> AsyncGenerator[AsyncSession, None]:
+    async with replica_router.async_session(ws.id) as db:
+        yield db
+
+
+# Read-only workspace endpoints: a read replica when one is configured, caught up, and the
+# workspace hasn't just written (see app.replicas); the primary otherwise.
+ReadDbDep = Annotated[Session, Depends(get_read_db)]
+AsyncReadDbDep = Annotated[AsyncSession, Depends(get_async_read_db)]
+
+
+def _checked_version(ws: AuthenticatedWorkspace, version: int | None) -> int:
+    if version is None:
+        # Deleted after its token was cached.
+        workspace_auth_cache.invalidate_workspaces([ws.id])
+        raise HTTPException(status_code=401, detail="Invalid workspace token")
+    return version
+
+
+def _workspace_version(db: Session, ws: AuthenticatedWorkspace) -> int:
+    """Current change version (read fresh: the auth cache only holds id and expiry)."""
+    return _checked_version(ws, db.scalar(select(Workspace.version).where(Workspace.id == ws.id)))
+
+
+async def _workspace_version_async(db: AsyncSession, ws: AuthenticatedWorkspace) -> int:
+    version = await db.scalar(select(Workspace.version).where(Workspace.id == ws.id))
+    return _checked_version(ws, version)
+
+
+def _bump_workspace_version(db: Session, ws: AuthenticatedWorkspace) -> int:
+    return _checked_version(ws, bump_workspace_version(db, ws.id))
+
 
+def _workspace_etag(ws: AuthenticatedWorkspace, version: int) -> str:
+    # The workspace id keeps browser caches from matching across tokens that share a URL.
+    return f'W/"{ws.id}-{version}"'
 
-WorkspaceDep = Annotated[Workspace, Depends(get_workspace)]
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(",")
+    )
+
+
+def _not_modified(
+    request: Request, response: Response, ws: AuthenticatedWorkspace, version: int
+) -> Response | None:
+    """
+    Conditional GET support for workspace-scoped reads.
+
+    Sets validator headers on `response` and returns a 304 response when the client's
+    `If-None-Match` already matches the workspace version, before any rows are loaded.
+    """
+    etag = _workspace_etag(ws, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _validator_headers(response: Response) -> dict[str, str]:
+    """The headers `_not_modified` set, for endpoints that build their own Response."""
+    return {
+        name: response.headers[name]
+        for name in ("ETag", "Cache-Control", "Vary")
+        if name in response.headers
+    }
+
+
+# An event stream ends after this long; clients reconnect (SSE `retry`), which keeps proxies happy.
+WORKSPACE_EVENTS_STREAM_S = float(os.getenv("WORKSPACE_EVENTS_STREAM_S", "300"))
+WORKSPACE_EVENTS_KEEPALIVE_S = 20.0
+
+
+def _sse_message(event: str, data: dict[str, object]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/api/workspace/events")
+async def workspace_events_stream(db: AsyncDbDep, ws: WorkspaceDep) -> StreamingResponse:
+    """
+    Server-Sent Events stream of workspace changes (replaces summary polling).
+
+    Sends `version` with the current workspace version on connect, then `change` whenever a
+    listing/target/interesting-target mutation commits. Clients should refresh on both.
+    """
+    workspace_id = ws.id
+    version = await _workspace_version_async(db, ws)
+    # Don't hold a pooled connection for the lifetime of the stream.
+    await db.close()
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + WORKSPACE_EVENTS_STREAM_S
+        last_version = version
+        with workspace_events.subscribe(workspace_id, version) as queue:
+            yield "retry: 3000\n" + _sse_message("version", {"version": version})
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    new_version = await asyncio.wait_for(
+                        queue.get(), timeout=min(WORKSPACE_EVENTS_KEEPALIVE_S, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if new_version > last_version:
+                    last_version = new_version
+                    yield _sse_message("change", {"version": new_version})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 ENABLE_PUBLIC_WORKSPACE_ISSUE = os.getenv("ENABLE_PUBLIC_WORKSPACE_ISSUE", "0") not in {
@@ -151,7 +411,7 @@ ADMIN_STATS_TOKEN = os.getenv("ADMIN_STATS_TOKEN", "").strip()
 
 
 @app.post("/api/workspaces/issue", response_model=WorkspaceIssueOut)
-def issue_public_workspace(db: DbDep) -> WorkspaceIssueOut:
+def issue_public_workspace(db: WriteDbDep) -> WorkspaceIssueOut:
     """
     Create a new workspace token for anonymous users (no login).
 
@@ -192,62 +452,41 @@ def get_stats(db: DbDep) -> StatsOut:
     return StatsOut(workspaces=workspaces, listings=listings, targets=targets)
 
 
-def _upsert_listing_for_workspace(db: Session, ws: Workspace, payload: ListingUpsert) -> Listing:
-    existing = db.scalar(
-        select(Listing).where(
-            Listing.workspace_id == ws.id, Listing.source_url == payload.source_url
-        )
-    )
-    data = payload.model_dump(exclude_unset=True)
-    captured_at = data.get("captured_at") or _utcnow()
-
-    if existing:
-        existing.captured_at = captured_at
-        for field in [
-            "title",
-            "price_value",
-            "currency",
-            "price_period",
-            "lat",
-            "lng",
-            "location_text",
-        ]:
-            if field in data and data[field] is not None:
-                setattr(existing, field, data[field])
-
-        if ENABLE_LISTING_GEOCODE_FALLBACK:
-            if (
-                (existing.lat is None or existing.lng is None)
-                and existing.location_text is not None
-                and existing.location_text.strip() != ""
-            ):
-                try:
-                    candidates = geocode_address(existing.location_text, limit=1)
-                    if candidates:
-                        existing.lat = existing.lat or candidates[0].lat
-                        existing.lng = existing.lng or candidates[0].lng
-                except (HTTPError, GeocodingConfigError, GeocodingProviderError):
-                    pass
-
-        if (
-            existing.location_text is None
-            and existing.lat is not None
-            and existing.lng is not None
-        ):
-            try:
-                rev = reverse_geocode(existing.lat, existing.lng, zoom=10)
-                rough = rough_location_from_address(rev.address)
-                if rough:
-                    existing.location_text = rough
-            except (HTTPError, GeocodingConfigError, GeocodingProviderError):
-                pass
+@app.get(
+    "/api/stats/db_pool",
+    response_model=DbPoolStatsOut,
+    dependencies=[Depends(require_admin_stats_token)],
+)
+def get_db_pool_stats() -> DbPoolStatsOut:
+    """
+    Connection pool saturation since process start (checkout waits, overflow, timeouts), one entry
+    per pool: the primary's sync and async engines, then each replica's.
+    """
+    return DbPoolStatsOut(pools=pool_snapshots())
 
-        db.add(existing)
-        db.commit()
-        db.refresh(existing)
-        return existing
 
-    listing = Listing(
+def _listing_geohash(listing: Listing) -> str | None:
+    if listing.lat is None or listing.lng is None:
+        return None
+    return geohash_encode(listing.lat, listing.lng)
+
+
+# Fields an upsert of an existing listing overwrites when the payload sets them (not None).
+_LISTING_UPDATE_FIELDS = (
+    "title",
+    "price_value",
+    "currency",
+    "price_period",
+    "lat",
+    "lng",
+    "location_text",
+)
+
+
+def _new_listing(
+    ws: AuthenticatedWorkspace, payload: ListingUpsert, captured_at: datetime
+) -> Listing:
+    return Listing(
         workspace_id=ws.id,
         source=payload.source,
         source_url=payload.source_url,
@@ -260,40 +499,240 @@ def _upsert_listing_for_workspace(db: Session, ws: Workspace, payload: ListingUp
         location_text=payload.location_text,
         captured_at=captured_at,
     )
+
+
+def _merge_listing_update(listing: Listing, payload: ListingUpsert, captured_at: datetime) -> None:
+    data = payload.model_dump(exclude_unset=True)
+    listing.captured_at = captured_at
+    for field in _LISTING_UPDATE_FIELDS:
+        if field in data and data[field] is not None:
+            setattr(listing, field, data[field])
+
+
+# (lat, lng, location_text)
+ListingLocation = tuple[float | None, float | None, str | None]
+
+
+def _needs_geocoding(location: ListingLocation) -> bool:
+    lat, lng, location_text = location
+    if location_text is None:
+        return lat is not None and lng is not None
+    return ENABLE_LISTING_GEOCODE_FALLBACK and (lat is None or lng is None) and bool(
+        location_text.strip()
+    )
+
+
+def _geocoded_location(location: ListingLocation) -> ListingLocation:
+    """Best-effort geocoding of missing coordinates / location text (calls the provider)."""
+    lat, lng, location_text = location
     if ENABLE_LISTING_GEOCODE_FALLBACK:
-        if (
-            (listing.lat is None or listing.lng is None)
-            and listing.location_text is not None
-            and listing.location_text.strip() != ""
-        ):
+        if (lat is None or lng is None) and location_text is not None and location_text.strip():
             try:
-                candidates = geocode_address(listing.location_text, limit=1)
+                candidates = geocode_address(location_text, limit=1)
                 if candidates:
-                    listing.lat = listing.lat or candidates[0].lat
-                    listing.lng = listing.lng or candidates[0].lng
+                    lat = lat or candidates[0].lat
+                    lng = lng or candidates[0].lng
             except (HTTPError, GeocodingConfigError, GeocodingProviderError):
                 pass
-    if listing.location_text is None and listing.lat is not None and listing.lng is not None:
+    if location_text is None and lat is not None and lng is not None:
         try:
-            rev = reverse_geocode(listing.lat, listing.lng, zoom=10)
-            rough = rough_location_from_address(rev.address)
-            if rough:
-                listing.location_text = rough
+            rev = reverse_geocode(lat, lng, zoom=10)
+            location_text = rough_location_from_address(rev.address)
         except (HTTPError, GeocodingConfigError, GeocodingProviderError):
             pass
-    db.add(listing)
+    return lat, lng, location_text
+
+
+def _complete_listing(listing: Listing, location: ListingLocation) -> None:
+    """
+    Fill missing coordinates / location text from `location` (geocoded before the write
+    transaction by `_geocode_before_write`), then the derived columns.
+    """
+    lat, lng, location_text = location
+    if listing.lat is None:
+        listing.lat = lat
+    if listing.lng is None:
+        listing.lng = lng
+    if listing.location_text is None:
+        listing.location_text = location_text
+    listing.monthly_price = monthly_price(listing.price_value, listing.price_period)
+    listing.geohash = _listing_geohash(listing)
+
+
+def _geocode_before_write(
+    ws: AuthenticatedWorkspace, items: list[ListingUpsert]
+) -> dict[str, ListingLocation]:
+    """
+    Geocode what the upserted listings will be missing, per `source_url`, before the write
+    transaction starts: provider calls must not hold the (SQLite) writer lock or the workspace
+    row lock.
+
+    Items are merged like the upsert merges them (last non-null value wins) over the stored row,
+    which is read on a separate connection only when some item may need the geocoder.
+    """
+    if not ENABLE_GEOCODING:
+        return {}
+    merged: dict[str, ListingLocation] = {}
+    for item in items:
+        lat, lng, location_text = merged.get(item.source_url, (None, None, None))
+        merged[item.source_url] = (
+            item.lat if item.lat is not None else lat,
+            item.lng if item.lng is not None else lng,
+            item.location_text if item.location_text is not None else location_text,
+        )
+    pending = {url for url, location in merged.items() if _needs_geocoding(location)}
+    if not pending:
+        return {}
+    with SessionLocal() as read_db:
+        for url, lat, lng, location_text in read_db.execute(
+            select(Listing.source_url, Listing.lat, Listing.lng, Listing.location_text).where(
+                Listing.workspace_id == ws.id, Listing.source_url.in_(pending)
+            )
+        ):
+            item_lat, item_lng, item_text = merged[url]
+            merged[url] = (
+                item_lat if item_lat is not None else lat,
+                item_lng if item_lng is not None else lng,
+                item_text if item_text is not None else location_text,
+            )
+    return {
+        url: _geocoded_location(merged[url])
+        for url in pending
+        if _needs_geocoding(merged[url])
+    }
+
+
+def _upsert_listing_for_workspace(
+    db: Session, ws: AuthenticatedWorkspace, payload: ListingUpsert
+) -> Listing:
+    # Before the first statement: the write session begins its transaction on it.
+    location = _geocode_before_write(ws, [payload]).get(payload.source_url)
+    # One INSERT ... ON CONFLICT DO UPDATE instead of a lookup followed by an INSERT or UPDATE:
+    # concurrent captures of the same URL merge instead of failing on the unique constraint.
+    data = payload.model_dump(exclude_unset=True)
+    new_id = str(uuid.uuid4())
+    stmt = listing_upsert(
+        db.get_bind().dialect.name,
+        {
+            "id": new_id,
+            "workspace_id": ws.id,
+            "source": payload.source,
+            "source_url": payload.source_url,
+            "title": payload.title,
+            "price_value": payload.price_value,
+            "currency": payload.currency,
+            "price_period": payload.price_period,
+            "monthly_price": monthly_price(payload.price_value, payload.price_period),
+            "lat": payload.lat,
+            "lng": payload.lng,
+            "location_text": payload.location_text,
+            "geohash": None,
+            "captured_at": payload.captured_at or _utcnow(),
+            "change_seq": _bump_workspace_version(db, ws),
+        },
+        overwrite=[field for field in _LISTING_UPDATE_FIELDS if field in data],
+    )
+    listing = db.scalars(
+        stmt.returning(Listing), execution_options={"populate_existing": True}
+    ).one()
+    created = listing.id == new_id
+
+    # Geocoding fallbacks and the geohash need the merged row; this flushes an UPDATE only when
+    # they change something (geohash is NULL after an insert or a coordinate change).
+    geohash = listing.geohash
+    _complete_listing(listing, location or (listing.lat, listing.lng, listing.location_text))
+    db.flush()
+    if listing.geohash != geohash:
+        refresh_listing_metrics(db, listing)
+    record_listings_saved(db, ws.id, [(listing.id, _as_utc(listing.captured_at), created)])
     db.commit()
     db.refresh(listing)
     return listing
 
 
 @app.post("/api/listings", response_model=ListingOut)
-def upsert_listing(payload: ListingUpsert, db: DbDep, ws: WorkspaceDep) -> Listing:
+def upsert_listing(payload: ListingUpsert, db: WriteDbDep, ws: WorkspaceDep) -> Listing:
     return _upsert_listing_for_workspace(db, ws, payload)
 
 
+@app.post("/api/listings/bulk", response_model=ListingBulkOut)
+def bulk_upsert_listings(
+    payload: ListingBulkIn, db: WriteDbDep, ws: WorkspaceDep
+) -> ListingBulkOut:
+    """
+    Upsert a batch of listings (wishlist imports, offline extension queues) in one transaction.
+
+    Missing locations are geocoded first, outside the transaction. Existing rows are then resolved
+    with a single `IN` query and every distinct `source_url` is written once: new rows in one
+    multi-row INSERT, changed ones in one executemany UPDATE.
+    """
+    locations = _geocode_before_write(ws, payload.items)
+    listings = {
+        listing.source_url: listing
+        for listing in db.scalars(
+            select(Listing).where(
+                Listing.workspace_id == ws.id,
+                Listing.source_url.in_({item.source_url for item in payload.items}),
+            )
+        )
+    }
+    previous_coords = {url: (listing.lat, listing.lng) for url, listing in listings.items()}
+
+    now = _utcnow()
+    applied: list[tuple[Listing, BulkItemStatus]] = []
+    for item in payload.items:
+        captured_at = item.captured_at or now
+        listing = listings.get(item.source_url)
+        if listing is None:
+            listing = listings[item.source_url] = _new_listing(ws, item, captured_at)
+            applied.append((listing, "created"))
+        else:
+            _merge_listing_update(listing, item, captured_at)
+            applied.append((listing, "updated"))
+
+    for url, listing in listings.items():
+        # Never the geocoder here: the write transaction is open.
+        _complete_listing(
+            listing, locations.get(url, (listing.lat, listing.lng, listing.location_text))
+        )
+    db.add_all(listing for url, listing in listings.items() if url not in previous_coords)
+    version = _bump_workspace_version(db, ws)
+    for listing in listings.values():
+        listing.change_seq = version
+    db.flush()
+
+    refresh_listings_metrics(
+        db,
+        ws.id,
+        [
+            listing
+            for url, listing in listings.items()
+            if (listing.lat, listing.lng) != previous_coords.get(url)
+        ],
+    )
+    record_listings_saved(
+        db,
+        ws.id,
+        [
+            (listing.id, _as_utc(listing.captured_at), url not in previous_coords)
+            for url, listing in listings.items()
+        ],
+    )
+    # Built before the commit expires the listings (reading them afterwards reloads each row).
+    out = ListingBulkOut(
+        items=[
+            ListingBulkItemOut(id=listing.id, source_url=listing.source_url, status=status)
+            for listing, status in applied
+        ]
+    )
+    db.commit()
+    return out
+
+
 @app.post("/api/listings/from_text", response_model=ListingOut)
-def create_listing_from_text(payload: ListingFromTextIn, db: DbDep, ws: WorkspaceDep) -> Listing:
+def create_listing_from_text(
+    payload: ListingFromTextIn, db: WriteDbDep, ws: WorkspaceDep
+) -> Listing:
     if not _RE_HTTP_URL.match(payload.page_url):
         raise HTTPException(status_code=400, detail="page_url must start with http:// or https://")
 
@@ -340,53 +779,354 @@ def create_listing_from_text(payload: ListingFromTextIn, db: DbDep, ws: Workspac
 
 
 @app.get("/api/listings", response_model=list[ListingOut])
-def list_listings(db: DbDep, ws: WorkspaceDep) -> list[Listing]:
-    return list(
-        db.scalars(
-            select(Listing)
-            .where(Listing.workspace_id == ws.id)
-            .order_by(Listing.captured_at.desc())
+async def list_listings(
+    request: Request,
+    response: Response,
+    db: AsyncReadDbDep,
+    ws: WorkspaceDep,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = Query(default=None, max_length=1024),
+) -> list[Listing] | Response:
+    """
+    The workspace's listings, newest first (`captured_at`, then `id`).
+
+    Without `limit` every listing is returned. With it, `X-Next-Cursor` holds the `cursor` of the
+    next page (absent on the last one). `X-Total-Count` is the workspace's listing count.
+    """
+    after: tuple[object, str] | None = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, "listings")
+            if not isinstance(after[0], datetime):
+                raise InvalidCursorError("Invalid cursor")
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    # The maintained counter (app/workspace_counters.py) rides along with the ETag's version.
+    workspace = (
+        await db.execute(
+            select(Workspace.version, Workspace.listing_count).where(Workspace.id == ws.id)
         )
+    ).first()
+    version = _checked_version(ws, workspace.version if workspace else None)
+    if not_modified := _not_modified(request, response, ws, version):
+        return not_modified
+
+    # One extra row tells whether there is a next page.
+    page_size = limit + 1 if limit is not None else None
+    rows = (await db.execute(listings_page(ws.id, after, page_size, *LISTING_OUT_COLUMNS))).all()
+
+    headers = _validator_headers(response)
+    headers["X-Total-Count"] = str(workspace.listing_count)
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor("listings", rows[-1].captured_at, rows[-1].id)
+    return json_response(listing_rows_adapter, [listing_row(row) for row in rows], headers)
+
+
+@app.get("/api/listings/changes", response_model=ListingChangesOut)
+def listing_changes(
+    db: ReadDbDep,
+    ws: WorkspaceDep,
+    since: str | None = Query(default=None, max_length=1024),
+) -> Response:
+    """
+    Listings created, updated or deleted since `since` (a cursor from a previous call).
+
+    Without `since` (or with a cursor the server can no longer honor) the response is a full
+    snapshot with `reset: true`. The returned `cursor` is the workspace version read before the
+    rows, so a change racing this request is re-sent next time rather than missed.
+    """
+    since_seq: int | None = None
+    if since:
+        try:
+            since_seq, cursor_ws = decode_cursor(since, "listing_changes")
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        if cursor_ws != ws.id or not isinstance(since_seq, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    version, pruned_seq = _change_feed_state(db, ws)
+    if since_seq is not None and since_seq > version and read_from_replica(db):
+        # The cursor came from a database further ahead than this replica.
+        with SessionLocal() as primary:
+            return _listing_changes(primary, ws, since_seq, *_change_feed_state(primary, ws))
+    return _listing_changes(db, ws, since_seq, version, pruned_seq)
+
+
+def _change_feed_state(db: Session, ws: AuthenticatedWorkspace) -> tuple[int, int]:
+    """The workspace version and its tombstone low-water mark, in one read."""
+    row = db.execute(
+        select(Workspace.version, Workspace.tombstones_pruned_seq).where(Workspace.id == ws.id)
+    ).one_or_none()
+    version = _checked_version(ws, None if row is None else row.version)
+    assert row is not None
+    return version, row.tombstones_pruned_seq
+
+
+def _listing_changes(
+    db: Session,
+    ws: AuthenticatedWorkspace,
+    since_seq: int | None,
+    version: int,
+    pruned_seq: int,
+) -> Response:
+    if since_seq is not None and not pruned_seq <= since_seq <= version:
+        # Cursor from the future (e.g. the database was restored), or older than the retained
+        # tombstones (deletes may be missing): start over.
+        since_seq = None
+
+    stmt = select(*LISTING_OUT_COLUMNS).where(Listing.workspace_id == ws.id)
+    deleted: list[str] = []
+    if since_seq is not None:
+        stmt = stmt.where(Listing.change_seq > since_seq)
+        deleted = list(
+            db.scalars(
+                select(ListingTombstone.listing_id)
+                .where(
+                    ListingTombstone.workspace_id == ws.id,
+                    ListingTombstone.change_seq > since_seq,
+                )
+                .order_by(ListingTombstone.change_seq)
+            )
+        )
+    upserted = db.execute(stmt.order_by(Listing.change_seq, Listing.id))
+    return json_response(
+        listing_changes_adapter,
+        {
+            "cursor": encode_cursor("listing_changes", version, ws.id),
+            "reset": since_seq is None,
+            "upserted": [listing_row(row) for row in upserted],
+            "deleted": deleted,
+        },
     )
 
 
+@app.get(
+    "/api/listings/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "One `ListingOut` plus `distance_km` per line (NDJSON) or row (CSV).",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        }
+    },
+)
+def export_workspace_listings(
+    db: ReadDbDep,
+    ws: WorkspaceDep,
+    format: ExportFormat = Query(default="ndjson"),
+    target_id: str | None = Query(default=None),
+) -> StreamingResponse:
+    """
+    Every listing of the workspace, newest first, with its distance to `target_id` (default: the
+    most recently updated target; no distances without targets).
+
+    Rows are streamed in batches of `EXPORT_BATCH_SIZE`, so memory use doesn't grow with the
+    workspace. `X-Export-Target-Id` names the target the distances refer to.
+    """
+    if target_id:
+        target = db.scalar(
+            select(Target).where(Target.workspace_id == ws.id, Target.id == target_id)
+        )
+        if not target:
+            raise HTTPException(status_code=404, detail="Target not found")
+    else:
+        target = db.scalar(latest_target(ws.id))
+    export_target = ExportTarget(target.id, target.lat, target.lng) if target else None
+
+    def chunks() -> Iterator[bytes]:
+        # The request's session closes before the body is sent; stream from a session of its own.
+        with replica_router.session(ws.id) as export_db:
+            yield from export_listings(export_db, ws.id, export_target, format)
+
+    filename = f"easyrelocate-listings-{_utcnow():%Y%m%d}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if export_target is not None:
+        headers["X-Export-Target-Id"] = export_target.id
+    return StreamingResponse(chunks(), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+
 @app.get("/api/listings/summary", response_model=ListingSummaryOut)
-def listing_summary(db: DbDep, ws: WorkspaceDep) -> ListingSummaryOut:
-    total = int(
-        db.scalar(select(func.count(Listing.id)).where(Listing.workspace_id == ws.id)) or 0
-    )
-    row = db.execute(
-        select(Listing.id, Listing.captured_at)
-        .where(Listing.workspace_id == ws.id)
-        .order_by(Listing.captured_at.desc())
-        .limit(1)
+async def listing_summary(db: AsyncReadDbDep, ws: WorkspaceDep) -> ListingSummaryOut:
+    # Counters maintained by the listing writers: one primary-key read per poll.
+    row = (
+        await db.execute(
+            select(
+                Workspace.listing_count, Workspace.latest_listing_id, Workspace.latest_captured_at
+            ).where(Workspace.id == ws.id)
+        )
     ).first()
-    latest_id: str | None = None
-    latest_captured_at: datetime | None = None
-    if row:
-        latest_id = row[0]
-        latest_captured_at = row[1]
-        if isinstance(latest_captured_at, datetime) and latest_captured_at.tzinfo is None:
-            latest_captured_at = latest_captured_at.replace(tzinfo=timezone.utc)
+    if row is None:
+        _checked_version(ws, None)
+    latest_captured_at = row.latest_captured_at
     return ListingSummaryOut(
-        count=total, latest_id=latest_id, latest_captured_at=latest_captured_at
+        count=row.listing_count,
+        latest_id=row.latest_listing_id,
+        latest_captured_at=_as_utc(latest_captured_at) if latest_captured_at else None,
+    )
+
+
+def _geohash_cells_clause(cells: list[str]):
+    return or_(
+        *[and_(Listing.geohash >= cell, Listing.geohash < cell + PREFIX_END) for cell in cells]
+    )
+
+
+@app.get("/api/listings/nearby", response_model=list[CompareItem])
+def listings_nearby(
+    db: ReadDbDep,
+    ws: WorkspaceDep,
+    lat: float = Query(ge=-90, le=90),
+    lng: float = Query(ge=-180, le=180),
+    radius_km: float = Query(gt=0, le=500),
+    limit: int | None = Query(default=None, ge=1, le=500),
+) -> list[dict[str, object]]:
+    cells = cover_bbox(*bbox_around(lat, lng, radius_km))
+    candidates = db.scalars(
+        select(Listing).where(Listing.workspace_id == ws.id, _geohash_cells_clause(cells))
+    )
+    hits: list[tuple[float, Listing]] = []
+    for listing in candidates:
+        if listing.lat is None or listing.lng is None:
+            continue
+        distance_km = haversine_km(listing.lat, listing.lng, lat, lng)
+        if distance_km <= radius_km:
+            hits.append((distance_km, listing))
+    hits.sort(key=lambda hit: (hit[0], hit[1].id))
+    if limit is not None:
+        hits = hits[:limit]
+    return [
+        {"listing": ListingOut.model_validate(listing), "metrics": {"distance_km": distance_km}}
+        for distance_km, listing in hits
+    ]
+
+
+@app.get("/api/listings/within", response_model=list[ListingOut])
+def listings_within(
+    db: ReadDbDep,
+    ws: WorkspaceDep,
+    south: float = Query(ge=-90, le=90),
+    west: float = Query(ge=-180, le=180),
+    north: float = Query(ge=-90, le=90),
+    east: float = Query(ge=-180, le=180),
+) -> list[Listing]:
+    """Listings inside a map viewport. `west > east` means the box crosses the antimeridian."""
+    if south > north:
+        raise HTTPException(status_code=400, detail="south must not be greater than north")
+
+    if west <= east:
+        in_lng = and_(Listing.lng >= west, Listing.lng <= east)
+    else:
+        in_lng = or_(Listing.lng >= west, Listing.lng <= east)
+    return list(
+        db.scalars(
+            select(Listing)
+            .where(
+                Listing.workspace_id == ws.id,
+                _geohash_cells_clause(cover_bbox(south, west, north, east)),
+                Listing.lat >= south,
+                Listing.lat <= north,
+                in_lng,
+            )
+            .order_by(Listing.captured_at.desc())
+        )
     )
 
 
 @app.delete("/api/listings/{listing_id}")
-def delete_listing(listing_id: str, db: DbDep, ws: WorkspaceDep) -> dict[str, bool]:
+def delete_listing(listing_id: str, db: WriteDbDep, ws: WorkspaceDep) -> dict[str, bool]:
     listing = db.scalar(
         select(Listing).where(Listing.workspace_id == ws.id, Listing.id == listing_id)
     )
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
+    delete_listing_metrics(db, listing.id)
     db.delete(listing)
+    record_listing_tombstones(db, ws.id, [listing.id], _bump_workspace_version(db, ws))
+    db.flush()
+    record_listings_deleted(db, ws.id, [listing.id])
     db.commit()
     return {"deleted": True}
 
 
+@app.get("/api/workspace/retention", response_model=ListingRetention)
+def get_listing_retention(db: DbDep, ws: WorkspaceDep) -> ListingRetention:
+    retention_days = db.scalar(
+        select(Workspace.listing_retention_days).where(Workspace.id == ws.id)
+    )
+    return ListingRetention(listing_retention_days=retention_days)
+
+
+@app.put("/api/workspace/retention", response_model=ListingRetention)
+def set_listing_retention(
+    payload: ListingRetention, db: WriteDbDep, ws: WorkspaceDep
+) -> ListingRetention:
+    """Listings are archived by the next background run (`LISTING_ARCHIVE_INTERVAL_S`)."""
+    workspace = db.get(Workspace, ws.id)
+    if workspace is None:
+        _checked_version(ws, None)
+    workspace.listing_retention_days = payload.listing_retention_days
+    db.commit()
+    return payload
+
+
+@app.get("/api/listings/archive", response_model=ArchivedListingsOut)
+def list_archived_listings(
+    db: ReadDbDep,
+    ws: WorkspaceDep,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, max_length=1024),
+) -> ArchivedListingsOut:
+    """Listings moved out by the retention setting, newest first (restore them by id)."""
+    stmt = select(ArchivedListing).where(ArchivedListing.workspace_id == ws.id)
+    if cursor:
+        try:
+            last_key, last_id = decode_cursor(cursor, "archive")
+            if not isinstance(last_key, datetime):
+                raise InvalidCursorError("Invalid cursor")
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        stmt = stmt.where(
+            keyset_after(
+                ArchivedListing.captured_at,
+                ArchivedListing.id,
+                last_key,
+                last_id,
+                descending=True,
+                nullable=False,
+            )
+        )
+    order_by = keyset_order_by(
+        ArchivedListing.captured_at, ArchivedListing.id, descending=True, nullable=False
+    )
+    rows = list(db.scalars(stmt.order_by(*order_by).limit(limit + 1)))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("archive", rows[-1].captured_at, rows[-1].id)
+    return ArchivedListingsOut(
+        items=[ArchivedListingOut.model_validate(row) for row in rows], next_cursor=next_cursor
+    )
+
+
+@app.post("/api/listings/archive/restore", response_model=list[ListingOut])
+def restore_listings(
+    payload: ArchiveRestoreIn, db: WriteDbDep, ws: WorkspaceDep
+) -> list[ListingOut]:
+    """
+    Move archived listings back into the workspace. Unknown ids are ignored, and so are listings
+    whose URL has been saved again since it was archived (the archived copy is discarded).
+    """
+    restored = restore_archived_listings(
+        db, ws.id, payload.ids, change_seq=_bump_workspace_version(db, ws), now=_utcnow()
+    )
+    out = [ListingOut.model_validate(listing) for listing in restored]
+    db.commit()
+    return out
+
+
 @app.post("/api/targets", response_model=TargetOut)
-def upsert_target(payload: TargetUpsert, db: DbDep, ws: WorkspaceDep) -> Target:
+def upsert_target(payload: TargetUpsert, db: WriteDbDep, ws: WorkspaceDep) -> Target:
     now = _utcnow()
     data = payload.model_dump(exclude_unset=True)
 
@@ -420,11 +1160,10 @@ def upsert_target(payload: TargetUpsert, db: DbDep, ws: WorkspaceDep) -> Target:
     if payload.id:
         target = db.scalar(select(Target).where(Target.workspace_id == ws.id, Target.id == payload.id))
     if not target:
-        target = db.scalar(
-            select(Target).where(Target.workspace_id == ws.id).order_by(Target.updated_at.desc())
-        )
+        target = db.scalar(latest_target(ws.id))
 
     if target:
+        coords_changed = (target.lat, target.lng) != (lat, lng)
         if "name" in data:
             target.name = payload.name
         target.address = address
@@ -432,6 +1171,9 @@ def upsert_target(payload: TargetUpsert, db: DbDep, ws: WorkspaceDep) -> Target:
         target.lng = lng
         target.updated_at = now
         db.add(target)
+        if coords_changed:
+            refresh_target_metrics(db, target, TARGET_KIND)
+        _bump_workspace_version(db, ws)
         db.commit()
         db.refresh(target)
         return target
@@ -448,6 +1190,9 @@ def upsert_target(payload: TargetUpsert, db: DbDep, ws: WorkspaceDep) -> Target:
         create_kwargs["id"] = payload.id
     target = Target(**create_kwargs)
     db.add(target)
+    db.flush()
+    refresh_target_metrics(db, target, TARGET_KIND)
+    _bump_workspace_version(db, ws)
     db.commit()
     db.refresh(target)
     return target
@@ -493,16 +1238,18 @@ def api_reverse_geocode(
 
 
 @app.get("/api/targets", response_model=list[TargetOut])
-def list_targets(db: DbDep, ws: WorkspaceDep) -> list[Target]:
-    return list(
-        db.scalars(select(Target).where(Target.workspace_id == ws.id).order_by(Target.updated_at.desc()))
-    )
+def list_targets(
+    request: Request, response: Response, db: ReadDbDep, ws: WorkspaceDep
+) -> list[Target] | Response:
+    if not_modified := _not_modified(request, response, ws, _workspace_version(db, ws)):
+        return not_modified
+    return list(db.scalars(targets_newest_first(ws.id)))
 
 
 @app.post("/api/interesting_targets", response_model=InterestingTargetOut)
 def upsert_interesting_target(
     payload: InterestingTargetUpsert,
-    db: DbDep,
+    db: WriteDbDep,
     ws: WorkspaceDep,
 ) -> InterestingTarget:
     now = _utcnow()
@@ -545,12 +1292,16 @@ def upsert_interesting_target(
         )
 
     if target:
+        coords_changed = (target.lat, target.lng) != (lat, lng)
         target.name = payload.name
         target.address = address
         target.lat = lat
         target.lng = lng
         target.updated_at = now
         db.add(target)
+        if coords_changed:
+            refresh_target_metrics(db, target, INTERESTING_TARGET_KIND)
+        _bump_workspace_version(db, ws)
         db.commit()
         db.refresh(target)
         return target
@@ -567,24 +1318,25 @@ def upsert_interesting_target(
         create_kwargs["id"] = payload.id
     target = InterestingTarget(**create_kwargs)
     db.add(target)
+    db.flush()
+    refresh_target_metrics(db, target, INTERESTING_TARGET_KIND)
+    _bump_workspace_version(db, ws)
     db.commit()
     db.refresh(target)
     return target
 
 
 @app.get("/api/interesting_targets", response_model=list[InterestingTargetOut])
-def list_interesting_targets(db: DbDep, ws: WorkspaceDep) -> list[InterestingTarget]:
-    return list(
-        db.scalars(
-            select(InterestingTarget)
-            .where(InterestingTarget.workspace_id == ws.id)
-            .order_by(InterestingTarget.updated_at.desc())
-        )
-    )
+def list_interesting_targets(
+    request: Request, response: Response, db: ReadDbDep, ws: WorkspaceDep
+) -> list[InterestingTarget] | Response:
+    if not_modified := _not_modified(request, response, ws, _workspace_version(db, ws)):
+        return not_modified
+    return list(db.scalars(targets_newest_first(ws.id, InterestingTarget)))
 
 
 @app.delete("/api/interesting_targets/{target_id}")
-def delete_interesting_target(target_id: str, db: DbDep, ws: WorkspaceDep) -> dict[str, bool]:
+def delete_interesting_target(target_id: str, db: WriteDbDep, ws: WorkspaceDep) -> dict[str, bool]:
     target = db.scalar(
         select(InterestingTarget).where(
             InterestingTarget.workspace_id == ws.id,
@@ -593,47 +1345,263 @@ def delete_interesting_target(target_id: str, db: DbDep, ws: WorkspaceDep) -> di
     )
     if not target:
         raise HTTPException(status_code=404, detail="Interesting target not found")
+    delete_target_metrics(db, target.id, INTERESTING_TARGET_KIND)
     db.delete(target)
+    _bump_workspace_version(db, ws)
     db.commit()
     return {"deleted": True}
 
 
-@app.get("/api/compare", response_model=CompareResponse)
-def compare(
-    db: DbDep,
-    ws: WorkspaceDep,
-    target_id: str | None = Query(default=None),
-) -> CompareResponse:
+def _resolve_compare_target(
+    db: Session, ws: AuthenticatedWorkspace, target_id: str | None
+) -> Target:
+    """The requested target, or the most recently updated one."""
     target: Target | None = None
     if target_id:
         target = db.scalar(select(Target).where(Target.workspace_id == ws.id, Target.id == target_id))
         if not target:
             raise HTTPException(status_code=404, detail="Target not found")
     else:
-        target = db.scalar(
-            select(Target).where(Target.workspace_id == ws.id).order_by(Target.updated_at.desc())
-        )
+        target = db.scalar(latest_target(ws.id))
         if not target:
             raise HTTPException(
                 status_code=404,
                 detail="No target set yet. POST /api/targets first.",
             )
+    return target
 
-    listings = list(
-        db.scalars(
-            select(Listing).where(Listing.workspace_id == ws.id).order_by(Listing.captured_at.desc())
+
+@app.get(
+    "/api/compare",
+    response_model=CompareResponse,
+    responses={
+        200: {
+            "description": "`CompareResponse`, or `CompareColumnarResponse` for "
+            "`format=columnar` (MessagePack-encoded for `format=msgpack`).",
+            "content": {"application/msgpack": {}},
+        }
+    },
+)
+async def compare(
+    request: Request,
+    response: Response,
+    db: AsyncReadDbDep,
+    ws: WorkspaceDep,
+    target_id: str | None = Query(default=None),
+    sort: CompareSort = Query(default="captured_at"),
+    max_distance_km: float | None = Query(default=None, ge=0),
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    source: list[ListingSource] | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = Query(default=None, max_length=1024),
+    format: CompareFormat = Query(default="rows"),
+) -> CompareResponse | Response:
+    if format == "msgpack" and msgpack is None:
+        raise HTTPException(
+            status_code=406, detail="MessagePack output requires the `msgpack` package"
+        )
+    version = await _workspace_version_async(db, ws)
+    if not_modified := _not_modified(request, response, ws, version):
+        return not_modified
+    target = await db.run_sync(_resolve_compare_target, ws, target_id)
+    distance_km_col = ListingTargetMetric.distance_km
+    # sort key -> (column, descending, nullable)
+    sort_columns = {
+        "captured_at": (Listing.captured_at, True, False),
+        "distance": (distance_km_col, False, True),
+        "price": (Listing.monthly_price, False, True),
+    }
+    sort_col, descending, nullable = sort_columns[sort]
+
+    stmt = compare_rows(ws.id, target.id)
+    if source:
+        stmt = stmt.where(Listing.source.in_(source))
+    if max_distance_km is not None:
+        stmt = stmt.where(distance_km_col <= max_distance_km)
+    if min_price is not None:
+        stmt = stmt.where(Listing.monthly_price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Listing.monthly_price <= max_price)
+    if cursor:
+        try:
+            last_key, last_id = decode_cursor(cursor, sort)
+            if sort == "captured_at":
+                valid_key = isinstance(last_key, datetime)
+            else:
+                # Distances and prices are numbers, or NULL (sorted last).
+                valid_key = last_key is None or (
+                    isinstance(last_key, (int, float)) and not isinstance(last_key, bool)
+                )
+            if not valid_key:
+                raise InvalidCursorError("Invalid cursor")
+            stmt = stmt.where(
+                keyset_after(
+                    sort_col, Listing.id, last_key, last_id, descending=descending, nullable=nullable
+                )
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    stmt = stmt.order_by(
+        *keyset_order_by(sort_col, Listing.id, descending=descending, nullable=nullable)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor: str | None = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_sort_key = {
+            "captured_at": last.captured_at,
+            "distance": last.distance_km,
+            "price": last.monthly_price,
+        }[sort]
+        next_cursor = encode_cursor(sort, last_sort_key, last.id)
+
+    distances = [
+        distance_or_fallback(row.distance_km, row.lat, row.lng, target) for row in rows
+    ]
+    if format != "rows":
+        dictionaries, columns = compare_columns(rows, distances)
+        columnar = CompareColumnarResponse(
+            target=TargetOut.model_validate(target),
+            count=len(rows),
+            dictionaries=dictionaries,
+            columns=columns,
+            next_cursor=next_cursor,
+        )
+        headers = _validator_headers(response)
+        if format == "msgpack":
+            return Response(
+                msgpack.packb(columnar.model_dump(mode="json")),
+                media_type="application/msgpack",
+                headers=headers,
+            )
+        return Response(columnar.model_dump_json(), media_type="application/json", headers=headers)
+
+    items = [
+        {"listing": listing_row(row), "metrics": {"distance_km": distance_km}}
+        for row, distance_km in zip(rows, distances)
+    ]
+    return json_response(
+        compare_rows_adapter,
+        {"target": TargetOut.model_validate(target), "items": items, "next_cursor": next_cursor},
+        _validator_headers(response),
+    )
+
+
+@app.get("/api/compare/top", response_model=RankedCompareResponse)
+def compare_top(
+    request: Request,
+    response: Response,
+    db: ReadDbDep,
+    ws: WorkspaceDep,
+    target_id: str | None = Query(default=None),
+    k: int = Query(default=10, ge=1, le=100),
+    w_distance: float = Query(default=1.0, ge=0),
+    w_price: float = Query(default=1.0, ge=0),
+    w_recency: float = Query(default=0.25, ge=0),
+) -> RankedCompareResponse | Response:
+    """
+    The `k` best listings for a target by a weighted score of distance, monthly price and freshness.
+
+    Each feature is min-max scaled over the workspace (one aggregate query), then rows are streamed
+    from the DB into a bounded heap, so only the winning `k` listings are loaded and serialized.
+    """
+    weights = RankingWeights(distance=w_distance, price=w_price, recency=w_recency)
+    if weights.total <= 0:
+        raise HTTPException(status_code=400, detail="At least one weight must be positive")
+    if not_modified := _not_modified(request, response, ws, _workspace_version(db, ws)):
+        return not_modified
+
+    target = _resolve_compare_target(db, ws, target_id)
+    distance_km_col = ListingTargetMetric.distance_km
+
+    bounds = db.execute(
+        with_target_distance(
+            select(
+                func.min(distance_km_col),
+                func.max(distance_km_col),
+                func.min(Listing.monthly_price),
+                func.max(Listing.monthly_price),
+                func.min(Listing.captured_at),
+                func.max(Listing.captured_at),
+            ),
+            target.id,
+        ).where(Listing.workspace_id == ws.id)
+    ).one()
+    # Located listings without a stored distance are scored with `distance_or_fallback`; widen
+    # the range with those (normally none once migration 12 has backfilled the metrics).
+    distance_lo, distance_hi = bounds[0], bounds[1]
+    for lat, lng in db.execute(
+        with_target_distance(select(Listing.lat, Listing.lng), target.id).where(
+            Listing.workspace_id == ws.id,
+            distance_km_col.is_(None),
+            Listing.lat.is_not(None),
+            Listing.lng.is_not(None),
         )
+    ):
+        fallback_km = haversine_km(lat, lng, target.lat, target.lng)
+        distance_lo = fallback_km if distance_lo is None else min(distance_lo, fallback_km)
+        distance_hi = fallback_km if distance_hi is None else max(distance_hi, fallback_km)
+    scorer = ListingScorer(
+        weights=weights,
+        distance=FeatureRange(distance_lo, distance_hi),
+        price=FeatureRange(bounds[2], bounds[3]),
+        captured_at=FeatureRange(ranking_timestamp(bounds[4]), ranking_timestamp(bounds[5])),
+    )
+
+    rows = db.execute(
+        with_target_distance(
+            select(
+                Listing.id,
+                distance_km_col,
+                Listing.lat,
+                Listing.lng,
+                Listing.monthly_price,
+                Listing.captured_at,
+            ),
+            target.id,
+        )
+        .where(Listing.workspace_id == ws.id)
+        .execution_options(yield_per=500)
     )
+    best = top_k(
+        (
+            (
+                scorer.score(
+                    distance_or_fallback(distance_km, lat, lng, target), price, captured_at
+                ),
+                listing_id,
+            )
+            for listing_id, distance_km, lat, lng, price, captured_at in rows
+        ),
+        k,
+    )
+
+    by_id = {
+        listing.id: (listing, distance_km)
+        for listing, distance_km in db.execute(
+            with_target_distance(select(Listing, distance_km_col), target.id).where(
+                Listing.id.in_([listing_id for _, listing_id in best])
+            )
+        )
+    }
     items = []
-    for listing in listings:
-        distance_km: float | None = None
-        if listing.lat is not None and listing.lng is not None:
-            distance_km = haversine_km(listing.lat, listing.lng, target.lat, target.lng)
+    for score, listing_id in best:
+        listing, distance_km = by_id[listing_id]
         items.append(
             {
                 "listing": ListingOut.model_validate(listing),
-                "metrics": {"distance_km": distance_km},
+                "metrics": {
+                    "distance_km": distance_or_fallback(
+                        distance_km, listing.lat, listing.lng, target
+                    )
+                },
+                "score": score,
             }
         )
-
     return {"target": TargetOut.model_validate(target), "items": items}
@@ -0,0 +1,461 @@
+from __future__ import annotations
+
+import logging
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    inspect,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+
+logger = logging.getLogger(__name__)
+
+# Kept out of the models' metadata: it describes the schema rather than being part of it.
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+# Key for pg_advisory_lock, shared by every process migrating this database.
+_PG_LOCK_KEY = zlib.crc32(b"easyrelocate.schema_migrations")
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    One schema step, applied at most once per database.
+
+    A regular migration runs in a single transaction together with its `schema_migrations` row.
+    A `batched` one (large backfills) commits after every batch and must be idempotent: if the
+    process dies halfway, the next start picks up the remaining rows.
+    """
+
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    batched: bool = False
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    if not _has_column(conn, table, column):
+        conn.execute(text(ddl))
+
+
+# workspaces.expires_at / workspaces.version
+def _workspace_expiry_and_version(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        _add_column(
+            conn,
+            "workspaces",
+            "expires_at",
+            "ALTER TABLE workspaces ADD COLUMN expires_at DATETIME",
+        )
+    elif dialect in {"postgresql", "postgres"}:
+        _add_column(
+            conn,
+            "workspaces",
+            "expires_at",
+            "ALTER TABLE workspaces ADD COLUMN expires_at TIMESTAMPTZ",
+        )
+    _add_column(
+        conn,
+        "workspaces",
+        "version",
+        "ALTER TABLE workspaces ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    )
+
+
+# listings/targets.workspace_id (for older local SQLite DBs)
+def _legacy_workspace_ids(conn: Connection) -> None:
+    if conn.dialect.name != "sqlite":
+        return
+    if not _has_column(conn, "listings", "workspace_id"):
+        conn.execute(text("ALTER TABLE listings ADD COLUMN workspace_id TEXT"))
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_listings_workspace_id ON listings(workspace_id)")
+        )
+    if not _has_column(conn, "targets", "workspace_id"):
+        conn.execute(text("ALTER TABLE targets ADD COLUMN workspace_id TEXT"))
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_targets_workspace_id ON targets(workspace_id)")
+        )
+
+    needs_backfill = False
+    for table in ("listings", "targets"):
+        r = conn.execute(
+            text(f"SELECT 1 FROM {table} WHERE workspace_id IS NULL OR workspace_id = '' LIMIT 1")
+        ).fetchone()
+        needs_backfill = needs_backfill or (r is not None)
+    if not needs_backfill:
+        return
+
+    # Create a new workspace token for legacy local rows so existing data remains accessible.
+    import uuid
+
+    from .workspaces import generate_workspace_token, hash_workspace_token
+
+    token = generate_workspace_token()
+    token_hash = hash_workspace_token(token)
+    ws_id = str(uuid.uuid4())
+    created_at = datetime.now(timezone.utc).isoformat()
+
+    conn.execute(
+        text(
+            "INSERT INTO workspaces (id, token_hash, created_at, expires_at) "
+            "VALUES (:id, :token_hash, :created_at, NULL)"
+        ),
+        {"id": ws_id, "token_hash": token_hash, "created_at": created_at},
+    )
+
+    try:
+        token_path = Path(__file__).resolve().parents[1] / ".easyrelocate_local_workspace_token"
+        token_path.write_text(token + "\n", encoding="utf-8")
+    except Exception:
+        pass
+
+    print(
+        "[EasyRelocate] Migrated existing local rows into a new workspace. "
+        "Token saved to backend/.easyrelocate_local_workspace_token"
+    )
+
+    for table in ("listings", "targets"):
+        conn.execute(
+            text(
+                f"UPDATE {table} SET workspace_id = :ws_id "
+                "WHERE workspace_id IS NULL OR workspace_id = ''"
+            ),
+            {"ws_id": ws_id},
+        )
+
+
+# listings.geohash (spatial cell id for radius/bounding-box queries)
+def _listing_geohash(conn: Connection) -> None:
+    _add_column(
+        conn, "listings", "geohash", "ALTER TABLE listings ADD COLUMN geohash VARCHAR(12)"
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_listings_workspace_geohash "
+            "ON listings(workspace_id, geohash)"
+        )
+    )
+
+
+def _backfill_listing_geohashes(conn: Connection, batch_size: int = 500) -> None:
+    from .geohash import encode
+
+    while True:
+        with conn.begin():
+            rows = conn.execute(
+                text(
+                    "SELECT id, lat, lng FROM listings "
+                    "WHERE geohash IS NULL AND lat IS NOT NULL AND lng IS NOT NULL "
+                    "LIMIT :limit"
+                ),
+                {"limit": batch_size},
+            ).fetchall()
+            if not rows:
+                return
+            conn.execute(
+                text("UPDATE listings SET geohash = :geohash WHERE id = :id"),
+                [{"id": r[0], "geohash": encode(r[1], r[2])} for r in rows],
+            )
+
+
+# listings.monthly_price (price normalized to a month for DB-side price queries)
+def _listing_monthly_price(conn: Connection) -> None:
+    _add_column(
+        conn, "listings", "monthly_price", "ALTER TABLE listings ADD COLUMN monthly_price FLOAT"
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_listings_workspace_monthly_price "
+            "ON listings(workspace_id, monthly_price)"
+        )
+    )
+
+
+def _backfill_listing_monthly_prices(conn: Connection, batch_size: int = 1000) -> None:
+    from .pricing import MONTHLY_PRICE_FACTORS, monthly_price_case_sql
+
+    periods = ", ".join(f"'{p}'" for p in MONTHLY_PRICE_FACTORS)
+    stmt = text(
+        f"UPDATE listings SET monthly_price = {monthly_price_case_sql()} "
+        "WHERE id IN ("
+        "SELECT id FROM listings WHERE monthly_price IS NULL AND price_value IS NOT NULL "
+        f"AND price_period IN ({periods}) LIMIT :limit)"
+    )
+    while True:
+        with conn.begin():
+            if not conn.execute(stmt, {"limit": batch_size}).rowcount:
+                return
+
+
+# listings.change_seq (delta sync)
+def _listing_change_seq(conn: Connection) -> None:
+    _add_column(
+        conn,
+        "listings",
+        "change_seq",
+        "ALTER TABLE listings ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0",
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_listings_workspace_change_seq "
+            "ON listings(workspace_id, change_seq)"
+        )
+    )
+
+
+# Newest-first indexes for the polled workspace reads (see app/queries.py)
+def _workspace_recency_indexes(conn: Connection) -> None:
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_listings_workspace_captured_at "
+        "ON listings(workspace_id, captured_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_targets_workspace_updated_at "
+        "ON targets(workspace_id, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_interesting_targets_workspace_updated_at "
+        "ON interesting_targets(workspace_id, updated_at)",
+    ):
+        conn.execute(text(ddl))
+
+
+# workspaces.listing_count / latest_listing_id / latest_captured_at (listing summary)
+def _workspace_listing_counters(conn: Connection) -> None:
+    timestamp = "TIMESTAMPTZ" if conn.dialect.name == "postgresql" else "DATETIME"
+    _add_column(
+        conn,
+        "workspaces",
+        "listing_count",
+        "ALTER TABLE workspaces ADD COLUMN listing_count INTEGER NOT NULL DEFAULT 0",
+    )
+    _add_column(
+        conn,
+        "workspaces",
+        "latest_listing_id",
+        "ALTER TABLE workspaces ADD COLUMN latest_listing_id VARCHAR(36)",
+    )
+    _add_column(
+        conn,
+        "workspaces",
+        "latest_captured_at",
+        f"ALTER TABLE workspaces ADD COLUMN latest_captured_at {timestamp}",
+    )
+
+
+def _backfill_workspace_listing_counters(conn: Connection, batch_size: int = 500) -> None:
+    # Recomputing is idempotent, so an interrupted run just starts over from the first batch.
+    from .workspace_counters import recompute_workspace_counters
+
+    after = ""
+    while True:
+        with conn.begin():
+            ids = list(
+                conn.scalars(
+                    text("SELECT id FROM workspaces WHERE id > :after ORDER BY id LIMIT :limit"),
+                    {"after": after, "limit": batch_size},
+                )
+            )
+            if not ids:
+                return
+            recompute_workspace_counters(conn, ids)
+        after = ids[-1]
+
+
+# workspaces.listing_retention_days / listings.restored_at (archived_listings is a new table)
+def _listing_retention(conn: Connection) -> None:
+    timestamp = "TIMESTAMPTZ" if conn.dialect.name == "postgresql" else "DATETIME"
+    _add_column(
+        conn,
+        "workspaces",
+        "listing_retention_days",
+        "ALTER TABLE workspaces ADD COLUMN listing_retention_days INTEGER",
+    )
+    _add_column(
+        conn,
+        "listings",
+        "restored_at",
+        f"ALTER TABLE listings ADD COLUMN restored_at {timestamp}",
+    )
+
+
+# listing_target_metrics rows for listings/targets saved before the table existed (reads don't
+# fill them in).
+def _backfill_listing_target_metrics(conn: Connection, batch_size: int = 100) -> None:
+    from .listing_metrics import INTERESTING_TARGET_KIND, TARGET_KIND, ensure_target_metrics
+
+    for kind, table in ((TARGET_KIND, "targets"), (INTERESTING_TARGET_KIND, "interesting_targets")):
+        after = ""
+        while True:
+            with conn.begin():
+                targets = conn.execute(
+                    text(
+                        f"SELECT id, workspace_id, lat, lng FROM {table} "
+                        "WHERE id > :after ORDER BY id LIMIT :limit"
+                    ),
+                    {"after": after, "limit": batch_size},
+                ).all()
+                for target in targets:
+                    ensure_target_metrics(conn, target, kind)
+            if not targets:
+                break
+            after = targets[-1].id
+
+
+# workspaces.tombstones_pruned_seq
+def _tombstone_low_water_mark(conn: Connection) -> None:
+    _add_column(
+        conn,
+        "workspaces",
+        "tombstones_pruned_seq",
+        "ALTER TABLE workspaces ADD COLUMN tombstones_pruned_seq INTEGER NOT NULL DEFAULT 0",
+    )
+
+
+# Append only: never renumber or edit a migration that has shipped.
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "workspace_expiry_and_version", _workspace_expiry_and_version),
+    Migration(2, "legacy_workspace_ids", _legacy_workspace_ids),
+    Migration(3, "listing_geohash", _listing_geohash),
+    Migration(4, "backfill_listing_geohash", _backfill_listing_geohashes, batched=True),
+    Migration(5, "listing_monthly_price", _listing_monthly_price),
+    Migration(6, "backfill_listing_monthly_price", _backfill_listing_monthly_prices, batched=True),
+    Migration(7, "listing_change_seq", _listing_change_seq),
+    Migration(8, "workspace_recency_indexes", _workspace_recency_indexes),
+    Migration(9, "workspace_listing_counters", _workspace_listing_counters),
+    Migration(
+        10,
+        "backfill_workspace_listing_counters",
+        _backfill_workspace_listing_counters,
+        batched=True,
+    ),
+    Migration(11, "listing_retention", _listing_retention),
+    Migration(
+        12,
+        "backfill_listing_target_metrics",
+        _backfill_listing_target_metrics,
+        batched=True,
+    ),
+    Migration(13, "tombstone_low_water_mark", _tombstone_low_water_mark),
+)
+
+HEAD = MIGRATIONS[-1].version
+
+
+def current_version(conn: Connection) -> int:
+    """Highest applied migration, or 0 for a database that has never been migrated."""
+    try:
+        with conn.begin():
+            return int(conn.scalar(select(func.max(schema_migrations.c.version))) or 0)
+    except DBAPIError:
+        # No schema_migrations table yet.
+        return 0
+
+
+@contextmanager
+def _migration_lock(conn: Connection) -> Iterator[None]:
+    """Serialize migrations across processes starting at the same time."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+            conn.commit()
+        return
+
+    database = conn.engine.url.database
+    if conn.dialect.name != "sqlite" or database in {None, "", ":memory:"}:
+        # In-memory SQLite is private to this process.
+        yield
+        return
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover
+        # Windows dev boxes run a single worker.
+        yield
+        return
+    with open(f"{database}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        insert(schema_migrations).values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=datetime.now(timezone.utc),
+        )
+    )
+
+
+def migrate(engine: Engine, metadata: MetaData) -> int:
+    """
+    Bring the database up to `HEAD` and return the number of migrations applied.
+
+    When the schema is already current this is a single `SELECT max(version)`: no reflection
+    and no `create_all`. Otherwise one process at a time (advisory lock on Postgres, a lock file
+    next to a SQLite database) creates missing tables and runs the pending migrations in order.
+    """
+    with engine.connect() as conn:
+        if current_version(conn) >= HEAD:
+            return 0
+
+        with _migration_lock(conn):
+            # Another worker may have finished while we waited for the lock.
+            version = current_version(conn)
+            if version >= HEAD:
+                return 0
+
+            with conn.begin():
+                _metadata.create_all(conn)
+                # New tables are created at their latest shape; the migrations below patch
+                # tables that predate a column.
+                metadata.create_all(conn)
+
+            applied = 0
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                logger.info("Applying migration %d_%s", migration.version, migration.name)
+                if migration.batched:
+                    migration.upgrade(conn)
+                    with conn.begin():
+                        _record(conn, migration)
+                else:
+                    with conn.begin():
+                        migration.upgrade(conn)
+                        _record(conn, migration)
+                applied += 1
+            return applied
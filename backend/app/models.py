@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Float, String, ForeignKey, UniqueConstraint
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .db import Base
@@ -26,12 +26,35 @@ class Workspace(Base):
         DateTime(timezone=True), nullable=False, default=_utcnow
     )
     expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # Bumped by every listing/target/interesting-target mutation; backs ETags and change feeds.
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Maintained with every listing insert/delete (see app/workspace_counters.py); backs the
+    # listing summary.
+    listing_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    latest_listing_id: Mapped[str | None] = mapped_column(String(36))
+    latest_captured_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # Listings captured longer ago are moved to `archived_listings` (see app/listing_archive.py);
+    # NULL keeps them forever.
+    listing_retention_days: Mapped[int | None] = mapped_column(Integer)
+    # Highest change_seq of a listing tombstone pruned by the GC: older delta cursors may have
+    # missed deletes and get a full snapshot instead.
+    tombstones_pruned_seq: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
 
 class Listing(Base):
     __tablename__ = "listings"
     __table_args__ = (
         UniqueConstraint("workspace_id", "source_url", name="uq_listings_workspace_source_url"),
+        Index("ix_listings_workspace_geohash", "workspace_id", "geohash"),
+        Index("ix_listings_workspace_monthly_price", "workspace_id", "monthly_price"),
+        Index("ix_listings_workspace_change_seq", "workspace_id", "change_seq"),
+        # Newest-first listing reads and compare's default (captured_at, id) keyset order;
+        # both engines walk it backwards for DESC.
+        Index("ix_listings_workspace_captured_at", "workspace_id", "captured_at", "id"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid_str)
@@ -49,20 +72,82 @@ class Listing(Base):
     price_period: Mapped[str] = mapped_column(
         String(16), nullable=False, default="unknown"
     )
+    # Derived from price_value/price_period on write (see app/pricing.py); NULL when the period
+    # can't be normalized to a month.
+    monthly_price: Mapped[float | None] = mapped_column(Float)
 
     lat: Mapped[float | None] = mapped_column(Float)
     lng: Mapped[float | None] = mapped_column(Float)
     location_text: Mapped[str | None] = mapped_column(String(512))
+    # Derived from lat/lng on write (see app/geohash.py); NULL when the listing has no coordinates.
+    geohash: Mapped[str | None] = mapped_column(String(12))
 
     captured_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, default=_utcnow
     )
+    # Workspace version of the last change to this row (see /api/listings/changes).
+    change_seq: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # Set when the listing comes back from the archive; retention counts from here instead of
+    # captured_at, so it isn't archived again on the next run.
+    restored_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class ArchivedListing(Base):
+    """A listing moved out of `listings` by the workspace's retention setting."""
+
+    __tablename__ = "archived_listings"
+    __table_args__ = (
+        UniqueConstraint(
+            "workspace_id", "source_url", name="uq_archived_listings_workspace_source_url"
+        ),
+        Index("ix_archived_listings_workspace_captured_at", "workspace_id", "captured_at", "id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    workspace_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False
+    )
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    source_url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    title: Mapped[str | None] = mapped_column(String(512))
+    price_value: Mapped[float | None] = mapped_column(Float)
+    currency: Mapped[str] = mapped_column(String(8), nullable=False)
+    price_period: Mapped[str] = mapped_column(String(16), nullable=False)
+    monthly_price: Mapped[float | None] = mapped_column(Float)
+    lat: Mapped[float | None] = mapped_column(Float)
+    lng: Mapped[float | None] = mapped_column(Float)
+    location_text: Mapped[str | None] = mapped_column(String(512))
+    captured_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow
+    )
+
+
+class ListingTombstone(Base):
+    """Marker left by a deleted listing so delta-sync clients can drop it from their mirror."""
+
+    __tablename__ = "listing_tombstones"
+    __table_args__ = (
+        Index("ix_listing_tombstones_workspace_change_seq", "workspace_id", "change_seq"),
+    )
+
+    listing_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    workspace_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False
+    )
+    change_seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow
+    )
 
 
 class Target(Base):
     __tablename__ = "targets"
     __table_args__ = (
         UniqueConstraint("workspace_id", "name", name="uq_targets_workspace_name"),
+        Index("ix_targets_workspace_updated_at", "workspace_id", "updated_at"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid_str)
@@ -80,6 +165,9 @@ class Target(Base):
 
 class InterestingTarget(Base):
     __tablename__ = "interesting_targets"
+    __table_args__ = (
+        Index("ix_interesting_targets_workspace_updated_at", "workspace_id", "updated_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid_str)
     workspace_id: Mapped[str] = mapped_column(
@@ -92,3 +180,28 @@ class InterestingTarget(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, default=_utcnow
     )
+
+
+class ListingTargetMetric(Base):
+    """
+    Materialized listing -> target metrics (currently straight-line distance).
+
+    Rows are maintained incrementally whenever a listing's or a target's coordinates change, so
+    `/api/compare` can join them instead of recomputing every distance on each poll.
+    `target_kind` is `target` or `interesting` (the two target tables share this one).
+    """
+
+    __tablename__ = "listing_target_metrics"
+    __table_args__ = (
+        Index("ix_listing_target_metrics_target", "target_kind", "target_id", "distance_km"),
+    )
+
+    listing_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("listings.id", ondelete="CASCADE"), primary_key=True
+    )
+    target_kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    target_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    workspace_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    distance_km: Mapped[float] = mapped_column(Float, nullable=False)
@@ -7,6 +7,8 @@ from dataclasses import dataclass
 
 import httpx
 
+from .pricing import NIGHTS_PER_MONTH, WEEKS_PER_MONTH
+
 
 OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip(
     "/"
@@ -156,8 +158,8 @@ def extract_housing_post(text: str, *, page_url: str | None = None) -> HousingPo
         "Rules:\n"
         "- Focus on MONTHLY rent only. Ignore deposits, application fees, and one-time fees.\n"
         "- If the post gives weekly/daily pricing, convert to an estimated monthly rent:\n"
-        "  - weekly -> weekly * 4.345\n"
-        "  - nightly/daily -> nightly * 30\n"
+        f"  - weekly -> weekly * {WEEKS_PER_MONTH}\n"
+        f"  - nightly/daily -> nightly * {NIGHTS_PER_MONTH}\n"
         "- If multiple rents are mentioned, pick the primary rent.\n"
         "- If currency is unclear, use USD.\n"
         "- Location: prefer the most specific geocodable, privacy-preserving location mentioned.\n"
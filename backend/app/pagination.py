@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(kind: str, key: Any, row_id: str) -> str:
+    """
+    Encode an opaque keyset cursor for the row that ended a page.
+
+    `kind` names the ordering the cursor belongs to, so a cursor can't be replayed against a
+    different sort.
+    """
+    if isinstance(key, datetime):
+        key = {"dt": key.isoformat()}
+    raw = json.dumps({"s": kind, "k": key, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: str) -> tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(data, dict) or data.get("s") != kind or not isinstance(data.get("id"), str):
+        raise InvalidCursorError("Invalid cursor")
+
+    key = data.get("k")
+    if isinstance(key, dict):
+        try:
+            key = datetime.fromisoformat(key["dt"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+    elif key is not None and not isinstance(key, (int, float)):
+        raise InvalidCursorError("Invalid cursor")
+    return key, data["id"]
+
+
+def keyset_order_by(
+    key: ColumnElement[Any],
+    row_id: ColumnElement[Any],
+    *,
+    descending: bool,
+    nullable: bool = True,
+) -> tuple[ColumnElement[Any], ...]:
+    """ORDER BY clauses matching `keyset_after` (NULL keys sort last, `row_id` breaks ties)."""
+    clauses = (key.desc(), row_id.desc()) if descending else (key.asc(), row_id.asc())
+    if nullable:
+        return (key.is_(None), *clauses)
+    return clauses
+
+
+def keyset_after(
+    key: ColumnElement[Any],
+    row_id: ColumnElement[Any],
+    last_key: Any,
+    last_id: str,
+    *,
+    descending: bool,
+    nullable: bool = True,
+) -> ColumnElement[bool]:
+    """WHERE clause selecting the rows that come after (`last_key`, `last_id`)."""
+    if last_key is None:
+        if not nullable:
+            raise InvalidCursorError("Invalid cursor")
+        tie = row_id < last_id if descending else row_id > last_id
+        return and_(key.is_(None), tie)
+
+    if descending:
+        after = or_(key < last_key, and_(key == last_key, row_id < last_id))
+    else:
+        after = or_(key > last_key, and_(key == last_key, row_id > last_id))
+    if nullable:
+        return or_(after, key.is_(None))
+    return after
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+logger = logging.getLogger(__name__)
+
+# Log a warning whenever getting a connection from the pool takes longer than this.
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+
+
+class PoolMetrics:
+    """Connection pool counters of one engine (thread-safe)."""
+
+    def __init__(self, name: str, slow_checkout_ms: float) -> None:
+        self._lock = threading.Lock()
+        self.name = name
+        self.slow_checkout_ms = slow_checkout_ms
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+            self.slow_checkouts = 0
+            self.overflow_checkouts = 0
+            self.timeouts = 0
+            self.in_use = 0
+            self.peak_in_use = 0
+
+    def record_wait(self, seconds: float, *, overflowed: bool) -> None:
+        slow = seconds * 1000 >= self.slow_checkout_ms
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_s += seconds
+            self.wait_max_s = max(self.wait_max_s, seconds)
+            self.slow_checkouts += slow
+            self.overflow_checkouts += overflowed
+        if slow:
+            logger.warning(
+                "Waited %.0f ms for a database connection (%s)", seconds * 1000, self.name
+            )
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+        logger.warning(
+            "Timed out after %.0f ms waiting for a database connection (%s)",
+            seconds * 1000,
+            self.name,
+        )
+
+    def on_checkout(self, *_: Any) -> None:
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_checkin(self, *_: Any) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def snapshot(self, engine: Engine) -> dict[str, Any]:
+        pool = engine.pool
+        with self._lock:
+            wait_avg_s = self.wait_total_s / self.checkouts if self.checkouts else 0.0
+            data: dict[str, Any] = {
+                "name": self.name,
+                "pool": type(pool).__name__,
+                "size": None,
+                "overflow": None,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "wait_avg_ms": wait_avg_s * 1000,
+                "wait_max_ms": self.wait_max_s * 1000,
+                "slow_checkouts": self.slow_checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+            }
+        if isinstance(pool, QueuePool):
+            data["size"] = pool.size()
+            data["overflow"] = max(0, pool.overflow())
+        return data
+
+
+# Instrumented engines, in registration order (dropped once an engine is garbage collected).
+_engines: weakref.WeakKeyDictionary[Engine, PoolMetrics] = weakref.WeakKeyDictionary()
+
+# Set while a checkout is being timed. A context variable rather than thread-local state: the
+# async pool's waiting checkouts all run on the event loop thread, one greenlet/task each.
+_timing_checkout: ContextVar[bool] = ContextVar("pool_timing_checkout", default=False)
+
+
+class _CheckoutTimingMixin:
+    """Reports how long each checkout waited and whether it used overflow."""
+
+    _pool_metrics: PoolMetrics | None = None
+
+    def recreate(self):  # type: ignore[override]
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same metrics.
+        pool = super().recreate()
+        pool._pool_metrics = self._pool_metrics
+        return pool
+
+    def _do_get(self):  # type: ignore[override]
+        metrics = self._pool_metrics
+        # QueuePool._do_get retries by calling itself; only time the outermost call.
+        if metrics is None or _timing_checkout.get():
+            return super()._do_get()
+        token = _timing_checkout.set(True)
+        start = time.perf_counter()
+        overflow_before = self._overflow
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            metrics.record_timeout(time.perf_counter() - start)
+            raise
+        finally:
+            _timing_checkout.reset(token)
+        metrics.record_wait(
+            time.perf_counter() - start,
+            overflowed=self._overflow > max(overflow_before, 0),
+        )
+        return record
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """
+    Give `engine` its own metrics, reported as `name`.
+
+    Connections in use are tracked with every pool class (including SQLite's StaticPool); checkout
+    waits, overflow and timeouts with the instrumented pools.
+    """
+    metrics = PoolMetrics(name, DB_POOL_SLOW_CHECKOUT_MS)
+    if isinstance(engine.pool, _CheckoutTimingMixin):
+        engine.pool._pool_metrics = metrics
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+    _engines[engine] = metrics
+    return metrics
+
+
+def pool_snapshots() -> list[dict[str, Any]]:
+    """One `PoolMetrics.snapshot` per instrumented engine (primary, async, replicas)."""
+    return [metrics.snapshot(engine) for engine, metrics in list(_engines.items())]
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import case
+from sqlalchemy.sql.elements import ColumnElement
+
+
+# Conversions to an estimated monthly rent. The LLM extraction prompt (app/openrouter.py) asks the
+# model to apply the same factors, so stored and extracted prices agree.
+NIGHTS_PER_MONTH = 30
+WEEKS_PER_MONTH = 4.345
+
+# price_period -> multiplier to get a monthly price. "total" and "unknown" cover an unknown
+# duration and have no monthly equivalent.
+MONTHLY_PRICE_FACTORS: dict[str, float] = {
+    "month": 1.0,
+    "night": float(NIGHTS_PER_MONTH),
+}
+
+
+def monthly_price(price_value: float | None, price_period: str | None) -> float | None:
+    if price_value is None or price_period is None:
+        return None
+    factor = MONTHLY_PRICE_FACTORS.get(price_period)
+    if factor is None:
+        return None
+    return price_value * factor
+
+
+def monthly_price_case_sql(price_col: str = "price_value", period_col: str = "price_period") -> str:
+    """SQL `CASE` computing `monthly_price` from raw columns (for bulk backfills)."""
+    whens = " ".join(
+        f"WHEN '{period}' THEN {price_col} * {factor!r}"
+        for period, factor in MONTHLY_PRICE_FACTORS.items()
+    )
+    return f"CASE {period_col} {whens} END"
+
+
+def monthly_price_expr(
+    price_value: ColumnElement[Any], price_period: ColumnElement[Any]
+) -> ColumnElement[Any]:
+    """`monthly_price` as a SQL expression over arbitrary price/period expressions (for upserts)."""
+    return case(
+        {period: price_value * factor for period, factor in MONTHLY_PRICE_FACTORS.items()},
+        value=price_period,
+    )
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import Select, and_, select
+
+from .listing_metrics import TARGET_KIND
+from .models import InterestingTarget, Listing, ListingTargetMetric, Target
+from .pagination import keyset_after
+from .serialization import LISTING_OUT_COLUMNS
+
+
+# Workspace-scoped statements behind the endpoints clients poll. Each one is served by a
+# `(workspace_id, <sort column>)` index without a sort step; `app/query_plans.py` checks that.
+
+
+def listings_newest_first(workspace_id: Any, *columns: Any) -> Select[Any]:
+    return (
+        select(*(columns or (Listing,)))
+        .where(Listing.workspace_id == workspace_id)
+        .order_by(Listing.captured_at.desc(), Listing.id.desc())
+    )
+
+
+def listings_page(
+    workspace_id: Any, after: tuple[Any, str] | None, limit: int | None, *columns: Any
+) -> Select[Any]:
+    """`listings_newest_first` from after the (captured_at, id) `after`, at most `limit` rows."""
+    stmt = listings_newest_first(workspace_id, *columns)
+    if after is not None:
+        stmt = stmt.where(
+            keyset_after(Listing.captured_at, Listing.id, *after, descending=True, nullable=False)
+        )
+    return stmt.limit(limit)
+
+
+def latest_listing(workspace_id: Any, *columns: Any) -> Select[Any]:
+    return listings_newest_first(workspace_id, *(columns or (Listing.id,))).limit(1)
+
+
+def targets_newest_first(
+    workspace_id: str, model: type[Target] | type[InterestingTarget] = Target
+) -> Select[Any]:
+    return select(model).where(model.workspace_id == workspace_id).order_by(model.updated_at.desc())
+
+
+def latest_target(workspace_id: str) -> Select[Any]:
+    return targets_newest_first(workspace_id).limit(1)
+
+
+def with_target_distance(stmt: Select[Any], target_id: str) -> Select[Any]:
+    """LEFT JOIN the stored listing -> target metrics onto a statement selecting from listings."""
+    return stmt.outerjoin(
+        ListingTargetMetric,
+        and_(
+            ListingTargetMetric.listing_id == Listing.id,
+            ListingTargetMetric.target_kind == TARGET_KIND,
+            ListingTargetMetric.target_id == target_id,
+        ),
+    )
+
+
+def compare_rows(workspace_id: str, target_id: str) -> Select[Any]:
+    """`/api/compare` rows (listing columns + `distance_km`) before filters and ordering."""
+    return with_target_distance(
+        select(*LISTING_OUT_COLUMNS, ListingTargetMetric.distance_km.label("distance_km")),
+        target_id,
+    ).where(Listing.workspace_id == workspace_id)
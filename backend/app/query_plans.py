@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Select
+from sqlalchemy.engine import Connection
+
+from .models import InterestingTarget, Listing
+from .pagination import keyset_order_by
+from .queries import (
+    compare_rows,
+    latest_listing,
+    latest_target,
+    listings_newest_first,
+    listings_page,
+    targets_newest_first,
+)
+from .serialization import LISTING_OUT_COLUMNS
+
+
+# SQLite: `SCAN t` / `SCAN t USING INDEX i` read the whole table; a temp B-tree is a sort step.
+_SQLITE_PROBLEMS = re.compile(r"^SCAN \w+|USE TEMP B-TREE FOR ORDER BY")
+# Postgres: a sequential scan or a (possibly incremental) Sort node.
+_POSTGRES_PROBLEMS = re.compile(r"Seq Scan on|(^|-> +)(Incremental )?Sort\b")
+
+
+def hot_queries(
+    workspace_id: str = "plan-check", target_id: str = "plan-check"
+) -> dict[str, Select[Any]]:
+    """The statements behind the polled endpoints, as the endpoints build them."""
+    return {
+        "list_listings": listings_newest_first(workspace_id, *LISTING_OUT_COLUMNS),
+        "list_listings_page": listings_page(
+            workspace_id, (datetime(2026, 1, 1), "plan-check"), 101, *LISTING_OUT_COLUMNS
+        ),
+        # Recomputes the workspace's latest listing after it is deleted (app/workspace_counters.py).
+        "latest_listing": latest_listing(workspace_id, Listing.id, Listing.captured_at),
+        "compare": compare_rows(workspace_id, target_id).order_by(
+            *keyset_order_by(Listing.captured_at, Listing.id, descending=True, nullable=False)
+        ).limit(51),
+        "list_targets": targets_newest_first(workspace_id),
+        "latest_target": latest_target(workspace_id),
+        "list_interesting_targets": targets_newest_first(workspace_id, InterestingTarget),
+    }
+
+
+def explain(conn: Connection, stmt: Select[Any]) -> list[str]:
+    """The query plan of `stmt`, one line per step (SQLite or Postgres)."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    with conn.begin() as tx:
+        # Empty or tiny tables make a seq scan look free; ask for the plan a large table gets.
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        lines = [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+        tx.rollback()
+    return lines
+
+
+def plan_problems(dialect: str, lines: list[str]) -> list[str]:
+    """Plan lines showing a full scan or an explicit sort."""
+    pattern = _SQLITE_PROBLEMS if dialect == "sqlite" else _POSTGRES_PROBLEMS
+    return [line for line in lines if pattern.search(line.strip())]
+
+
+def check_hot_queries(conn: Connection) -> dict[str, list[str]]:
+    """EXPLAIN every hot query; returns {query name: offending plan lines} for regressions."""
+    failures: dict[str, list[str]] = {}
+    for name, stmt in hot_queries().items():
+        problems = plan_problems(conn.dialect.name, explain(conn, stmt))
+        if problems:
+            failures[name] = problems
+    return failures
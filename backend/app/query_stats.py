@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Add X-DB-Queries / X-DB-Time-Ms to every response (debugging aid; off in production).
+SQL_QUERY_STATS_HEADER = os.getenv("SQL_QUERY_STATS_HEADER", "0") not in {"0", "false", "False"}
+
+_START_KEY = "easyrelocate_query_started"
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_time_s: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.statements += 1
+        self.db_time_s += seconds
+
+
+# Stats of the request being handled. Sync endpoints run in the threadpool with a copy of the
+# context, which still points at the same (mutable) QueryStats.
+_request_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+# Process-wide captures opened by `capture_queries` (tests).
+_captures_lock = threading.Lock()
+_captures: list[QueryStats] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info[_START_KEY].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add(elapsed)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.add(elapsed)
+
+
+def track_queries(engine: Engine) -> None:
+    """Count statements and DB time per request (pass `async_engine.sync_engine` for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Count every statement run on a tracked engine, from any thread, while the block runs."""
+    stats = QueryStats()
+    with _captures_lock:
+        _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(stats)
+
+
+class QueryStatsMiddleware:
+    """Collects `QueryStats` per request; reports them as headers with `SQL_QUERY_STATS_HEADER=1`."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_stats(message) -> None:
+            if message["type"] == "http.response.start" and SQL_QUERY_STATS_HEADER:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.statements).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.db_time_s * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _request_stats.reset(token)
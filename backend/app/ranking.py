@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class RankingWeights:
+    distance: float = 1.0
+    price: float = 1.0
+    recency: float = 0.25
+
+    @property
+    def total(self) -> float:
+        return self.distance + self.price + self.recency
+
+
+@dataclass(frozen=True)
+class FeatureRange:
+    """Min/max of one feature over the candidate set, used to scale it into [0, 1]."""
+
+    lo: float | None
+    hi: float | None
+
+    def normalize(self, value: float | None) -> float:
+        # A missing value ranks like the worst observed one.
+        if value is None or self.lo is None or self.hi is None:
+            return 1.0
+        if self.hi <= self.lo:
+            return 0.0
+        # Clamped: a value outside the range must not push the score out of [0, 1].
+        return min(1.0, max(0.0, (value - self.lo) / (self.hi - self.lo)))
+
+
+def timestamp(dt: datetime | None) -> float | None:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@dataclass(frozen=True)
+class ListingScorer:
+    weights: RankingWeights
+    distance: FeatureRange
+    price: FeatureRange
+    captured_at: FeatureRange  # POSIX timestamps
+
+    def score(
+        self, distance_km: float | None, monthly_price: float | None, captured_at: datetime
+    ) -> float:
+        """Weighted score in [0, 1]; lower is better (closer, cheaper, fresher)."""
+        w = self.weights
+        staleness = 1.0 - self.captured_at.normalize(timestamp(captured_at))
+        raw = (
+            w.distance * self.distance.normalize(distance_km)
+            + w.price * self.price.normalize(monthly_price)
+            + w.recency * staleness
+        )
+        return raw / w.total
+
+
+def top_k(scored: Iterable[tuple[float, str]], k: int) -> list[tuple[float, str]]:
+    """
+    The `k` lowest-scoring `(score, id)` pairs, best first.
+
+    Keeps a bounded max-heap, so it runs in O(n log k) time and O(k) memory over a stream.
+    Ties are broken by id for a stable order.
+    """
+    if k <= 0:
+        return []
+    heap: list[tuple[float, _ReversedStr]] = []
+    for score, row_id in scored:
+        entry = (-score, _ReversedStr(row_id))
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    return sorted((-neg_score, str(rid)) for neg_score, rid in heap)
+
+
+class _ReversedStr(str):
+    """str with inverted ordering, so the max-heap evicts the larger id among equal scores."""
+
+    def __lt__(self, other: str) -> bool:  # type: ignore[override]
+        return str.__gt__(self, other)
+
+    def __gt__(self, other: str) -> bool:  # type: ignore[override]
+        return str.__lt__(self, other)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator
+
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .db import AsyncSessionLocal, SessionLocal, async_driver_url, pool_kwargs
+from .events import hub
+from .pool_metrics import instrument_engine
+from .query_stats import track_queries
+
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated read replica URLs. Unset: every request uses the primary (DATABASE_URL).
+DATABASE_URL_REPLICA = os.getenv("DATABASE_URL_REPLICA", "")
+# Replicas further behind the primary than this are skipped until they catch up.
+REPLICA_MAX_LAG_S = float(os.getenv("REPLICA_MAX_LAG_S", "2"))
+REPLICA_LAG_CHECK_S = float(os.getenv("REPLICA_LAG_CHECK_S", "1"))
+# After a workspace changes, its reads stay on the primary this long (read-your-writes).
+REPLICA_STICKY_S = float(os.getenv("REPLICA_STICKY_S", "5"))
+
+# Session.info key: name of the replica the session reads from (None for the primary).
+REPLICA_INFO_KEY = "easyrelocate_replica"
+
+_STICKY_PRUNE_SIZE = 10_000
+
+# 0 on a standby that is streaming from the primary and has replayed all the WAL it received (and
+# on a server that isn't a standby), otherwise the age of the last replayed transaction. Without a
+# streaming WAL receiver "replayed everything received" says nothing (it also holds for a standby
+# cut off from the primary), so only the replay age counts. NULL: nothing replayed yet.
+# `status` needs pg_read_all_stats; without it a running receiver process counts as streaming.
+_PG_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN EXISTS ("
+    "  SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming'"
+    " ) AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+
+def _engine_kwargs(url: str, *, is_async: bool) -> dict[str, object]:
+    is_sqlite = url.startswith("sqlite")
+    kwargs = pool_kwargs(is_sqlite=is_sqlite, is_async=is_async)
+    if is_sqlite and not is_async:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    return kwargs
+
+
+class Replica:
+    """A read replica's engines plus the lag found by its last check."""
+
+    def __init__(self, url: str) -> None:
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, **_engine_kwargs(url, is_async=False))
+        self.async_engine = create_async_engine(
+            async_driver_url(url), **_engine_kwargs(url, is_async=True)
+        )
+        instrument_engine(self.engine, f"replica {self.name}")
+        instrument_engine(self.async_engine.sync_engine, f"replica {self.name} (async)")
+        for engine in (self.engine, self.async_engine.sync_engine):
+            track_queries(engine)
+        self.session_factory = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
+        self.async_session_factory = async_sessionmaker(
+            self.async_engine, autoflush=False, expire_on_commit=False
+        )
+        self.lag_s: float | None = None
+        self.checked_at: float | None = None  # time.monotonic()
+
+    def check_lag(self) -> float | None:
+        """Measure the replication lag in seconds (None: unreachable or not replaying yet)."""
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    lag = conn.scalar(_PG_LAG_SQL)
+                else:
+                    # No replication to ask about; being reachable is all we can check.
+                    conn.exec_driver_sql("SELECT 1")
+                    lag = 0.0
+        except Exception:
+            logger.warning("Read replica %s is unreachable", self.name, exc_info=True)
+            lag = None
+        self.lag_s = float(lag) if lag is not None else None
+        self.checked_at = time.monotonic()
+        return self.lag_s
+
+    async def dispose(self) -> None:
+        await self.async_engine.dispose()
+        self.engine.dispose()
+
+
+class ReplicaRouter:
+    """
+    Picks the database a read-only request runs on.
+
+    Replicas are used round-robin while their latest lag check (every `check_interval_s`, from a
+    background thread) found them at most `max_lag_s` behind; a replica that stops answering or
+    whose check is older than three intervals is skipped. A workspace that changed in the last
+    `sticky_s` seconds reads from the primary so clients see their own writes: `mark_written` is
+    fed by `events.hub`, which with the Postgres notifier also hears other workers' commits.
+    Without a usable replica every read goes to the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Replica],
+        *,
+        primary: Callable[[], Session] = SessionLocal,
+        async_primary: Callable[[], AsyncSession] = AsyncSessionLocal,
+        max_lag_s: float = REPLICA_MAX_LAG_S,
+        check_interval_s: float = REPLICA_LAG_CHECK_S,
+        sticky_s: float = REPLICA_STICKY_S,
+    ) -> None:
+        self.replicas = replicas
+        self._primary = primary
+        self._async_primary = async_primary
+        self._max_lag_s = max_lag_s
+        self._check_interval_s = check_interval_s
+        self._sticky_s = sticky_s
+        self._lock = threading.Lock()
+        self._sticky_until: dict[str, float] = {}
+        self._round_robin = itertools.count()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def mark_written(self, workspace_id: str, version: int | None = None) -> None:
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._sticky_until) >= _STICKY_PRUNE_SIZE:
+                self._sticky_until = {
+                    ws_id: until for ws_id, until in self._sticky_until.items() if until > now
+                }
+            self._sticky_until[workspace_id] = now + self._sticky_s
+
+    def _usable(self, replica: Replica, now: float) -> bool:
+        return (
+            replica.lag_s is not None
+            and replica.lag_s <= self._max_lag_s
+            and replica.checked_at is not None
+            and now - replica.checked_at <= 3 * self._check_interval_s
+        )
+
+    def pick(self, workspace_id: str) -> Replica | None:
+        """The replica to read `workspace_id` from, or None for the primary."""
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            sticky_until = self._sticky_until.get(workspace_id)
+        if sticky_until is not None and sticky_until > now:
+            return None
+        usable = [replica for replica in self.replicas if self._usable(replica, now)]
+        if not usable:
+            return None
+        return usable[next(self._round_robin) % len(usable)]
+
+    @contextmanager
+    def session(self, workspace_id: str) -> Iterator[Session]:
+        replica = self.pick(workspace_id)
+        with (replica.session_factory if replica else self._primary)() as db:
+            db.info[REPLICA_INFO_KEY] = replica.name if replica else None
+            yield db
+
+    @asynccontextmanager
+    async def async_session(self, workspace_id: str) -> AsyncIterator[AsyncSession]:
+        replica = self.pick(workspace_id)
+        async with (replica.async_session_factory if replica else self._async_primary)() as db:
+            db.info[REPLICA_INFO_KEY] = replica.name if replica else None
+            yield db
+
+    def check_lag(self) -> None:
+        for replica in self.replicas:
+            was_usable = self._usable(replica, time.monotonic())
+            lag_s = replica.check_lag()
+            if was_usable and not self._usable(replica, time.monotonic()):
+                logger.warning(
+                    "Read replica %s is %s; reading from the primary instead",
+                    replica.name,
+                    "unavailable" if lag_s is None else f"{lag_s:.1f}s behind",
+                )
+
+    def start(self) -> None:
+        if not self.replicas:
+            return
+        self.check_lag()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-check", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._check_interval_s):
+            try:
+                self.check_lag()
+            except Exception:
+                logger.exception("Read replica lag check failed")
+
+
+def read_from_replica(db: Session | AsyncSession) -> bool:
+    return db.info.get(REPLICA_INFO_KEY) is not None
+
+
+def _build_router() -> ReplicaRouter:
+    urls = [url.strip() for url in DATABASE_URL_REPLICA.split(",") if url.strip()]
+    router = ReplicaRouter([Replica(url) for url in urls])
+    hub.add_listener(router.mark_written)
+    return router
+
+
+router = _build_router()
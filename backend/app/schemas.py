@@ -10,10 +10,19 @@ from pydantic import (
     field_validator,
     model_validator,
 )
+from typing_extensions import TypedDict
 
 
 ListingSource = Literal["airbnb", "blueground", "post"]
 PricePeriod = Literal["night", "month", "total", "unknown"]
+CompareSort = Literal["captured_at", "distance", "price"]
+CompareFormat = Literal["rows", "columnar", "msgpack"]
+BulkItemStatus = Literal["created", "updated"]
+ExportFormat = Literal["ndjson", "csv"]
+
+# Largest batch accepted by `POST /api/listings/bulk` (and `/api/listings/archive/restore`).
+MAX_BULK_LISTINGS = 500
+MAX_LISTING_RETENTION_DAYS = 3650
 
 
 class ListingUpsert(BaseModel):
@@ -46,18 +55,91 @@ class ListingOut(BaseModel):
     price_value: float | None
     currency: str
     price_period: str
+    monthly_price: float | None = None
+    lat: float | None
+    lng: float | None
+    location_text: str | None
+    captured_at: datetime
+
+
+class ListingRow(TypedDict):
+    """`ListingOut` as a plain dict, for list endpoints that serialize DB rows directly."""
+
+    id: str
+    source: str
+    source_url: str
+    title: str | None
+    price_value: float | None
+    currency: str
+    price_period: str
+    monthly_price: float | None
     lat: float | None
     lng: float | None
     location_text: str | None
     captured_at: datetime
 
 
+class ListingExportRow(ListingRow):
+    """One line of `GET /api/listings/export`: the listing plus its distance to the target."""
+
+    distance_km: float | None
+
+
+class ListingChangesPayload(TypedDict):
+    cursor: str
+    reset: bool
+    upserted: list[ListingRow]
+    deleted: list[str]
+
+
 class ListingSummaryOut(BaseModel):
     count: int
     latest_id: str | None = None
     latest_captured_at: datetime | None = None
 
 
+class ListingChangesOut(BaseModel):
+    cursor: str
+    # True when the client must drop its mirror first: `upserted` is then a full snapshot.
+    reset: bool = False
+    upserted: list[ListingOut]
+    deleted: list[str]
+
+
+class ListingBulkIn(BaseModel):
+    items: list[ListingUpsert] = Field(min_length=1, max_length=MAX_BULK_LISTINGS)
+
+
+class ListingBulkItemOut(BaseModel):
+    # Items repeating a `source_url` from earlier in the batch are applied as updates of the
+    # same listing, exactly as if they had been posted one by one.
+    id: str
+    source_url: str
+    status: BulkItemStatus
+
+
+class ListingBulkOut(BaseModel):
+    items: list[ListingBulkItemOut]  # one per input item, in order
+
+
+class ListingRetention(BaseModel):
+    # Listings captured longer ago move to the archive; None keeps them forever.
+    listing_retention_days: int | None = Field(default=None, ge=1, le=MAX_LISTING_RETENTION_DAYS)
+
+
+class ArchivedListingOut(ListingOut):
+    archived_at: datetime
+
+
+class ArchivedListingsOut(BaseModel):
+    items: list[ArchivedListingOut]
+    next_cursor: str | None = None
+
+
+class ArchiveRestoreIn(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=MAX_BULK_LISTINGS)
+
+
 class ListingFromTextIn(BaseModel):
     text: str = Field(min_length=1, max_length=20000)
     page_url: str = Field(min_length=1, max_length=2048)
@@ -155,6 +237,61 @@ class CompareItem(BaseModel):
 class CompareResponse(BaseModel):
     target: TargetOut
     items: list[CompareItem]
+    next_cursor: str | None = None
+
+
+class MetricsRow(TypedDict):
+    distance_km: float | None
+
+
+class CompareItemRow(TypedDict):
+    listing: ListingRow
+    metrics: MetricsRow
+
+
+class CompareRowsPayload(TypedDict):
+    """`CompareResponse` built from plain rows (see app/serialization.py)."""
+
+    target: TargetOut
+    items: list[CompareItemRow]
+    next_cursor: str | None
+
+
+class CompareColumnsOut(BaseModel):
+    """Parallel arrays (one entry per listing); `source`/`currency`/`price_period` are dictionary codes."""
+
+    ids: list[str]
+    source: list[int]
+    currency: list[int]
+    price_period: list[int]
+    source_url: list[str]
+    title: list[str | None]
+    price_value: list[float | None]
+    monthly_price: list[float | None]
+    lat: list[float | None]
+    lng: list[float | None]
+    location_text: list[str | None]
+    captured_at: list[datetime]
+    distance_km: list[float | None]
+
+
+class CompareColumnarResponse(BaseModel):
+    target: TargetOut
+    count: int
+    dictionaries: dict[str, list[str]]
+    columns: CompareColumnsOut
+    next_cursor: str | None = None
+
+
+class RankedCompareItem(BaseModel):
+    listing: ListingOut
+    metrics: Metrics
+    score: float
+
+
+class RankedCompareResponse(BaseModel):
+    target: TargetOut
+    items: list[RankedCompareItem]
 
 
 class WorkspaceIssueOut(BaseModel):
@@ -167,3 +304,22 @@ class StatsOut(BaseModel):
     workspaces: int
     listings: int
     targets: int
+
+
+class DbPoolOut(BaseModel):
+    name: str
+    pool: str
+    size: int | None
+    overflow: int | None
+    in_use: int
+    peak_in_use: int
+    checkouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    slow_checkouts: int
+    overflow_checkouts: int
+    timeouts: int
+
+
+class DbPoolStatsOut(BaseModel):
+    pools: list[DbPoolOut]
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.engine import Row
+
+from .models import Listing
+from .schemas import CompareRowsPayload, ListingChangesPayload, ListingOut, ListingRow
+
+
+# Listing columns in `ListingOut` field order; select these instead of ORM entities on list
+# endpoints so rows skip identity-map bookkeeping and `from_attributes` validation.
+LISTING_OUT_COLUMNS = tuple(getattr(Listing, name) for name in ListingOut.model_fields)
+
+# Compiled once: serializing through these writes JSON bytes directly (pydantic-core, in Rust)
+# without validating each row again.
+listing_rows_adapter: TypeAdapter[list[ListingRow]] = TypeAdapter(list[ListingRow])
+compare_rows_adapter: TypeAdapter[CompareRowsPayload] = TypeAdapter(CompareRowsPayload)
+listing_changes_adapter: TypeAdapter[ListingChangesPayload] = TypeAdapter(ListingChangesPayload)
+
+
+def listing_row(row: Row[Any]) -> ListingRow:
+    """A row selected with `LISTING_OUT_COLUMNS` (extra trailing columns are ignored)."""
+    return {
+        "id": row.id,
+        "source": row.source,
+        "source_url": row.source_url,
+        "title": row.title,
+        "price_value": row.price_value,
+        "currency": row.currency,
+        "price_period": row.price_period,
+        "monthly_price": row.monthly_price,
+        "lat": row.lat,
+        "lng": row.lng,
+        "location_text": row.location_text,
+        "captured_at": row.captured_at,
+    }
+
+
+def json_response(
+    adapter: TypeAdapter[Any], value: Any, headers: Mapping[str, str] | None = None
+) -> Response:
+    return Response(adapter.dump_json(value), media_type="application/json", headers=headers)
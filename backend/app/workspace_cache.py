@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from .models import Workspace
+
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_AUTH_CACHE_BACKEND = os.getenv("WORKSPACE_AUTH_CACHE_BACKEND", "memory").strip().lower()
+WORKSPACE_AUTH_CACHE_TTL_S = float(os.getenv("WORKSPACE_AUTH_CACHE_TTL_S", "60"))
+WORKSPACE_AUTH_CACHE_SIZE = int(os.getenv("WORKSPACE_AUTH_CACHE_SIZE", "10000"))
+WORKSPACE_AUTH_CACHE_REDIS_URL = os.getenv("WORKSPACE_AUTH_CACHE_REDIS_URL", "").strip()
+
+_PENDING_KEY = "easyrelocate_forgotten_workspaces"
+
+
+@dataclass(frozen=True)
+class AuthenticatedWorkspace:
+    """What `get_workspace` resolves a bearer token to (cacheable: no per-request state)."""
+
+    id: str
+    expires_at: datetime | None  # UTC-aware
+
+    def is_expired(self, now: datetime) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+
+class WorkspaceAuthCache:
+    """
+    token hash -> `AuthenticatedWorkspace`, so authenticated requests skip the token lookup.
+
+    Expiry is checked against `expires_at` on every hit, so the TTL only bounds how long a
+    deleted or re-keyed workspace can stay visible in this process. The base class caches nothing.
+    """
+
+    def get(self, token_hash: str) -> AuthenticatedWorkspace | None:
+        return None
+
+    def generation(self) -> int:
+        return 0
+
+    def put(self, token_hash: str, workspace: AuthenticatedWorkspace, generation: int) -> None:
+        pass
+
+    def invalidate_workspaces(self, workspace_ids: Iterable[str]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryWorkspaceAuthCache(WorkspaceAuthCache):
+    """Bounded TTL + LRU cache private to this process."""
+
+    def __init__(self, max_entries: int, ttl_s: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, AuthenticatedWorkspace]] = OrderedDict()
+        self._generation = 0
+
+    def get(self, token_hash: str) -> AuthenticatedWorkspace | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            stored_at, workspace = entry
+            if now - stored_at >= self._ttl_s:
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return workspace
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def put(self, token_hash: str, workspace: AuthenticatedWorkspace, generation: int) -> None:
+        with self._lock:
+            # An invalidation ran while the caller was reading the DB: its row may be stale.
+            if generation != self._generation:
+                return
+            self._entries[token_hash] = (time.monotonic(), workspace)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_workspaces(self, workspace_ids: Iterable[str]) -> None:
+        ids = set(workspace_ids)
+        if not ids:
+            return
+        with self._lock:
+            self._generation += 1
+            for token_hash in [h for h, (_, ws) in self._entries.items() if ws.id in ids]:
+                del self._entries[token_hash]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisWorkspaceAuthCache(WorkspaceAuthCache):
+    """
+    Cache shared by every worker (and invalidated for all of them at once) through Redis.
+
+    Keys expire after the TTL on the Redis side; a per-workspace set of token hashes lets
+    deletes find the entries to drop. Redis errors fall back to the database lookup.
+    """
+
+    _PREFIX = "easyrelocate:ws_auth:"
+
+    def __init__(self, url: str, ttl_s: float) -> None:
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._ttl_ms = max(1, int(ttl_s * 1000))
+
+    def get(self, token_hash: str) -> AuthenticatedWorkspace | None:
+        try:
+            raw = self._redis.get(self._PREFIX + token_hash)
+        except Exception:
+            logger.warning("Workspace auth cache read failed", exc_info=True)
+            return None
+        if raw is None:
+            return None
+        workspace_id, _, expires_at = raw.decode("utf-8").partition("|")
+        return AuthenticatedWorkspace(
+            id=workspace_id,
+            expires_at=datetime.fromisoformat(expires_at) if expires_at else None,
+        )
+
+    def put(self, token_hash: str, workspace: AuthenticatedWorkspace, generation: int) -> None:
+        expires_at = workspace.expires_at.isoformat() if workspace.expires_at else ""
+        members_key = f"{self._PREFIX}ws:{workspace.id}"
+        try:
+            pipe = self._redis.pipeline()
+            pipe.set(self._PREFIX + token_hash, f"{workspace.id}|{expires_at}", px=self._ttl_ms)
+            pipe.sadd(members_key, token_hash)
+            pipe.pexpire(members_key, self._ttl_ms)
+            pipe.execute()
+        except Exception:
+            logger.warning("Workspace auth cache write failed", exc_info=True)
+
+    def invalidate_workspaces(self, workspace_ids: Iterable[str]) -> None:
+        try:
+            for workspace_id in workspace_ids:
+                members_key = f"{self._PREFIX}ws:{workspace_id}"
+                token_hashes = self._redis.smembers(members_key)
+                keys = [self._PREFIX + h.decode("utf-8") for h in token_hashes]
+                self._redis.delete(members_key, *keys)
+        except Exception:
+            # Entries still expire after the TTL.
+            logger.warning("Workspace auth cache invalidation failed", exc_info=True)
+
+
+def _build_cache() -> WorkspaceAuthCache:
+    backend = WORKSPACE_AUTH_CACHE_BACKEND
+    if backend == "memory":
+        return MemoryWorkspaceAuthCache(WORKSPACE_AUTH_CACHE_SIZE, WORKSPACE_AUTH_CACHE_TTL_S)
+    if backend == "redis":
+        if not WORKSPACE_AUTH_CACHE_REDIS_URL:
+            raise RuntimeError(
+                "WORKSPACE_AUTH_CACHE_BACKEND=redis requires WORKSPACE_AUTH_CACHE_REDIS_URL"
+            )
+        return RedisWorkspaceAuthCache(WORKSPACE_AUTH_CACHE_REDIS_URL, WORKSPACE_AUTH_CACHE_TTL_S)
+    if backend == "off":
+        return WorkspaceAuthCache()
+    raise RuntimeError(f"Unknown WORKSPACE_AUTH_CACHE_BACKEND: {WORKSPACE_AUTH_CACHE_BACKEND}")
+
+
+cache = _build_cache()
+
+
+def forget_workspaces(db: Session, workspace_ids: Iterable[str]) -> None:
+    """Drop cached tokens for `workspace_ids` once `db` commits (use with bulk deletes)."""
+    db.info.setdefault(_PENDING_KEY, set()).update(workspace_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        cache.invalidate_workspaces(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Workspace, "after_delete")
+def _forget_deleted_workspace(mapper, connection, target: Workspace) -> None:
+    db = object_session(target)
+    if db is not None:
+        forget_workspaces(db, [target.id])
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Sequence
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models import Listing, Workspace
+from .queries import latest_listing
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPAIR_BATCH = 500
+
+
+# Workspace.listing_count / latest_listing_id / latest_captured_at back `/api/listings/summary`.
+# Writers update them in the same transaction as the listing change, after
+# `_bump_workspace_version` has locked the workspace row, so concurrent writers of one workspace
+# apply their deltas one at a time. "Latest" follows the (captured_at, id) order of
+# `ix_listings_workspace_captured_at`.
+
+
+def _is_newer(listing_id: str, captured_at: datetime):
+    return or_(
+        Workspace.latest_captured_at.is_(None),
+        Workspace.latest_captured_at < captured_at,
+        and_(Workspace.latest_captured_at == captured_at, Workspace.latest_listing_id < listing_id),
+    )
+
+
+def _latest_listing(workspace_id, column):
+    return latest_listing(workspace_id, column).scalar_subquery()
+
+
+def _recomputed_values(workspace_id) -> dict[str, object]:
+    return {
+        "listing_count": select(func.count(Listing.id))
+        .where(Listing.workspace_id == workspace_id)
+        .scalar_subquery(),
+        "latest_listing_id": _latest_listing(workspace_id, Listing.id),
+        "latest_captured_at": _latest_listing(workspace_id, Listing.captured_at),
+    }
+
+
+def record_listings_saved(
+    db: Session, workspace_id: str, saved: Sequence[tuple[str, datetime, bool]]
+) -> None:
+    """
+    Account for listings that were inserted or updated (call after writing them).
+
+    `saved` holds (listing id, captured_at, created) per listing.
+    """
+    if not saved:
+        return
+    updated = [listing_id for listing_id, _, created in saved if not created]
+    if updated:
+        # The latest listing may have moved back in time: re-pick it from the index. A no-op
+        # unless one of them is the current latest.
+        db.execute(
+            update(Workspace)
+            .where(Workspace.id == workspace_id, Workspace.latest_listing_id.in_(updated))
+            .values(
+                latest_listing_id=_latest_listing(Workspace.id, Listing.id),
+                latest_captured_at=_latest_listing(Workspace.id, Listing.captured_at),
+            )
+        )
+    listing_id, captured_at, _ = max(saved, key=lambda s: (s[1], s[0]))
+    newer = _is_newer(listing_id, captured_at)
+    db.execute(
+        update(Workspace)
+        .where(Workspace.id == workspace_id)
+        .values(
+            listing_count=Workspace.listing_count + sum(created for _, _, created in saved),
+            latest_listing_id=case((newer, listing_id), else_=Workspace.latest_listing_id),
+            latest_captured_at=case((newer, captured_at), else_=Workspace.latest_captured_at),
+        )
+    )
+
+
+def record_listings_deleted(db: Session, workspace_id: str, listing_ids: Iterable[str]) -> None:
+    """Account for deleted listings (call after the DELETE, with the ids it actually removed)."""
+    ids = list(listing_ids)
+    if not ids:
+        return
+    db.execute(
+        update(Workspace)
+        .where(Workspace.id == workspace_id)
+        .values(listing_count=Workspace.listing_count - len(ids))
+    )
+    db.execute(
+        update(Workspace)
+        .where(Workspace.id == workspace_id, Workspace.latest_listing_id.in_(ids))
+        .values(
+            latest_listing_id=_latest_listing(Workspace.id, Listing.id),
+            latest_captured_at=_latest_listing(Workspace.id, Listing.captured_at),
+        )
+    )
+
+
+def recompute_workspace_counters(conn: Connection | Session, workspace_ids: list[str]) -> None:
+    """Set the counters of `workspace_ids` from the listings table."""
+    conn.execute(
+        update(Workspace)
+        .where(Workspace.id.in_(workspace_ids))
+        .values(**_recomputed_values(Workspace.id))
+    )
+
+
+@dataclass
+class RepairReport:
+    checked: int = 0
+    repaired: int = 0
+
+
+def repair_workspace_counters(
+    session_factory: Callable[[], Session], *, batch_size: int = DEFAULT_REPAIR_BATCH
+) -> RepairReport:
+    """
+    Recompute every workspace's listing counters, `batch_size` workspaces per transaction.
+
+    Only rows whose stored values disagree with the listings table are rewritten (and logged:
+    outside of manual edits or writers that bypass this module there should be none).
+    """
+    report = RepairReport()
+    after = ""
+    actual = _recomputed_values(Workspace.id)
+    while True:
+        with session_factory() as db:
+            rows = db.execute(
+                select(
+                    Workspace.id,
+                    Workspace.listing_count,
+                    Workspace.latest_listing_id,
+                    Workspace.latest_captured_at,
+                    actual["listing_count"],
+                    actual["latest_listing_id"],
+                    actual["latest_captured_at"],
+                )
+                .where(Workspace.id > after)
+                .order_by(Workspace.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return report
+            after = rows[-1][0]
+            report.checked += len(rows)
+            stale = [row[0] for row in rows if tuple(row[1:4]) != tuple(row[4:])]
+            if stale:
+                logger.warning("Repairing listing counters of %d workspaces", len(stale))
+                recompute_workspace_counters(db, stale)
+                db.commit()
+                report.repaired += len(stale)
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from .models import (
+    ArchivedListing,
+    InterestingTarget,
+    Listing,
+    ListingTargetMetric,
+    ListingTombstone,
+    Target,
+    Workspace,
+)
+from .workspace_cache import forget_workspaces
+
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the in-process scheduler (run scripts/purge_expired_workspaces.py from cron instead).
+WORKSPACE_GC_INTERVAL_S = float(os.getenv("WORKSPACE_GC_INTERVAL_S", "0"))
+WORKSPACE_GC_GRACE_DAYS = float(os.getenv("WORKSPACE_GC_GRACE_DAYS", "0"))
+# Listing tombstones older than this are pruned by the same job; 0 keeps them forever.
+LISTING_TOMBSTONE_RETENTION_DAYS = float(os.getenv("LISTING_TOMBSTONE_RETENTION_DAYS", "30"))
+
+DEFAULT_WORKSPACE_BATCH = 50
+DEFAULT_ROW_BATCH = 1000
+
+
+@dataclass
+class PurgeReport:
+    """Rows deleted per table."""
+
+    workspaces: int = 0
+    listings: int = 0
+    listing_target_metrics: int = 0
+    listing_tombstones: int = 0
+    archived_listings: int = 0
+    targets: int = 0
+    interesting_targets: int = 0
+
+    @property
+    def total_rows(self) -> int:
+        return sum(getattr(self, f.name) for f in fields(self))
+
+    def add(self, other: PurgeReport) -> None:
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+
+def _expired_before(now: datetime | None, grace: timedelta) -> datetime:
+    return (now or datetime.now(timezone.utc)) - grace
+
+
+def count_expired_workspaces(
+    db: Session, *, now: datetime | None = None, grace: timedelta = timedelta()
+) -> int:
+    cutoff = _expired_before(now, grace)
+    return int(
+        db.scalar(
+            select(func.count(Workspace.id)).where(
+                Workspace.expires_at.is_not(None), Workspace.expires_at <= cutoff
+            )
+        )
+        or 0
+    )
+
+
+def _delete_in_batches(
+    session_factory: Callable[[], Session],
+    id_col,
+    owner_col,
+    workspace_ids: list[str],
+    batch_size: int,
+    before_delete: Callable[[Session, list[str]], int] | None = None,
+) -> tuple[int, int]:
+    """
+    Delete the rows of `id_col`'s table owned by `workspace_ids`, `batch_size` per transaction.
+
+    Returns (rows deleted, rows deleted by `before_delete`).
+    """
+    deleted = 0
+    dependents = 0
+    while True:
+        with session_factory() as db:
+            ids = list(
+                db.scalars(select(id_col).where(owner_col.in_(workspace_ids)).limit(batch_size))
+            )
+            if not ids:
+                return deleted, dependents
+            if before_delete is not None:
+                dependents += before_delete(db, ids)
+            deleted += db.execute(delete(id_col.table).where(id_col.in_(ids))).rowcount
+            db.commit()
+
+
+def _delete_listing_metrics(db: Session, listing_ids: list[str]) -> int:
+    return db.execute(
+        delete(ListingTargetMetric).where(ListingTargetMetric.listing_id.in_(listing_ids))
+    ).rowcount
+
+
+def purge_expired_workspaces(
+    session_factory: Callable[[], Session],
+    *,
+    now: datetime | None = None,
+    grace: timedelta = timedelta(),
+    workspace_batch: int = DEFAULT_WORKSPACE_BATCH,
+    row_batch: int = DEFAULT_ROW_BATCH,
+    max_workspaces: int | None = None,
+) -> PurgeReport:
+    """
+    Delete workspaces that expired more than `grace` ago, with all of their rows.
+
+    Works through `workspace_batch` workspaces at a time and deletes their child rows in
+    transactions of at most `row_batch` rows, so live traffic never waits on a long lock.
+    Children are deleted explicitly (SQLite doesn't enforce ON DELETE CASCADE by default), and
+    an interrupted run simply resumes on the next one. Expired tokens are already rejected by
+    `get_workspace`, so nothing writes into a workspace while it is being purged.
+    """
+    cutoff = _expired_before(now, grace)
+    report = PurgeReport()
+    while max_workspaces is None or report.workspaces < max_workspaces:
+        limit = workspace_batch
+        if max_workspaces is not None:
+            limit = min(limit, max_workspaces - report.workspaces)
+        with session_factory() as db:
+            workspace_ids = list(
+                db.scalars(
+                    select(Workspace.id)
+                    .where(Workspace.expires_at.is_not(None), Workspace.expires_at <= cutoff)
+                    .order_by(Workspace.expires_at, Workspace.id)
+                    .limit(limit)
+                )
+            )
+        if not workspace_ids:
+            break
+
+        batch = PurgeReport()
+        batch.listings, batch.listing_target_metrics = _delete_in_batches(
+            session_factory,
+            Listing.id,
+            Listing.workspace_id,
+            workspace_ids,
+            row_batch,
+            before_delete=_delete_listing_metrics,
+        )
+        batch.listing_tombstones, _ = _delete_in_batches(
+            session_factory,
+            ListingTombstone.listing_id,
+            ListingTombstone.workspace_id,
+            workspace_ids,
+            row_batch,
+        )
+        batch.archived_listings, _ = _delete_in_batches(
+            session_factory,
+            ArchivedListing.id,
+            ArchivedListing.workspace_id,
+            workspace_ids,
+            row_batch,
+        )
+        # Metrics rows pointing at targets went with their listings above.
+        batch.targets, _ = _delete_in_batches(
+            session_factory, Target.id, Target.workspace_id, workspace_ids, row_batch
+        )
+        batch.interesting_targets, _ = _delete_in_batches(
+            session_factory,
+            InterestingTarget.id,
+            InterestingTarget.workspace_id,
+            workspace_ids,
+            row_batch,
+        )
+        with session_factory() as db:
+            batch.workspaces = db.execute(
+                delete(Workspace).where(Workspace.id.in_(workspace_ids))
+            ).rowcount
+            forget_workspaces(db, workspace_ids)
+            db.commit()
+
+        report.add(batch)
+        if not batch.workspaces:
+            # Someone else purged them concurrently; don't spin on the same ids.
+            break
+        logger.info("Purged %d expired workspaces (%d rows)", batch.workspaces, batch.total_rows)
+    return report
+
+
+def listing_tombstone_max_age() -> timedelta | None:
+    """`LISTING_TOMBSTONE_RETENTION_DAYS` as a timedelta (None when pruning is off)."""
+    if LISTING_TOMBSTONE_RETENTION_DAYS <= 0:
+        return None
+    return timedelta(days=LISTING_TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_listing_tombstones(
+    session_factory: Callable[[], Session],
+    *,
+    now: datetime | None = None,
+    max_age: timedelta,
+    batch_size: int = DEFAULT_ROW_BATCH,
+) -> int:
+    """
+    Delete listing tombstones older than `max_age`, `batch_size` per transaction.
+
+    Each batch raises the owning workspaces' `tombstones_pruned_seq` in the same transaction, so
+    `/api/listings/changes` answers a cursor from before a pruned delete with a full snapshot.
+    Returns the number of tombstones deleted.
+    """
+    cutoff = _expired_before(now, max_age)
+    deleted = 0
+    while True:
+        with session_factory() as db:
+            rows = db.execute(
+                select(
+                    ListingTombstone.listing_id,
+                    ListingTombstone.workspace_id,
+                    ListingTombstone.change_seq,
+                )
+                .where(ListingTombstone.deleted_at < cutoff)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return deleted
+            marks: dict[str, int] = {}
+            for _, workspace_id, change_seq in rows:
+                marks[workspace_id] = max(marks.get(workspace_id, 0), change_seq)
+            for workspace_id, change_seq in marks.items():
+                db.execute(
+                    update(Workspace)
+                    .where(Workspace.id == workspace_id)
+                    .values(
+                        tombstones_pruned_seq=case(
+                            (Workspace.tombstones_pruned_seq < change_seq, change_seq),
+                            else_=Workspace.tombstones_pruned_seq,
+                        )
+                    )
+                )
+            deleted += db.execute(
+                delete(ListingTombstone).where(
+                    ListingTombstone.listing_id.in_([row.listing_id for row in rows])
+                )
+            ).rowcount
+            db.commit()
+
+
+class WorkspaceGcScheduler:
+    """
+    Optional background purge every `interval_s` seconds (`WORKSPACE_GC_INTERVAL_S`), followed by
+    pruning listing tombstones older than `tombstone_max_age` (None keeps them).
+
+    Safe to run in several workers at once: every step is an idempotent, bounded delete.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval_s: float,
+        grace: timedelta = timedelta(),
+        tombstone_max_age: timedelta | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval_s = interval_s
+        self._grace = grace
+        self._tombstone_max_age = tombstone_max_age
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._interval_s <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="workspace-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_s):
+            try:
+                purge_expired_workspaces(self._session_factory, grace=self._grace)
+                if self._tombstone_max_age is not None:
+                    prune_listing_tombstones(
+                        self._session_factory, max_age=self._tombstone_max_age
+                    )
+            except Exception:
+                logger.exception("Expired workspace purge failed")
+
+
+def _build_scheduler() -> WorkspaceGcScheduler:
+    from .db import WriteSessionLocal
+
+    return WorkspaceGcScheduler(
+        WriteSessionLocal,
+        WORKSPACE_GC_INTERVAL_S,
+        timedelta(days=WORKSPACE_GC_GRACE_DAYS),
+        tombstone_max_age=listing_tombstone_max_age(),
+    )
+
+
+scheduler = _build_scheduler()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from .events import record_workspace_version
+from .models import ListingTombstone, Workspace
+
+
+def bump_workspace_version(db: Session, workspace_id: str) -> int | None:
+    """
+    Mark the workspace's listings/targets as changed (commits with the caller's transaction).
+
+    Open `/api/workspace/events` streams are notified once the transaction commits. Returns the
+    new version, or None when the workspace no longer exists (e.g. purged after its token was
+    cached).
+    """
+    version = db.execute(
+        update(Workspace)
+        .where(Workspace.id == workspace_id)
+        .values(version=Workspace.version + 1)
+        .returning(Workspace.version)
+    ).scalar_one_or_none()
+    if version is not None:
+        record_workspace_version(db, workspace_id, version)
+    return version
+
+
+def record_listing_tombstones(
+    db: Session, workspace_id: str, listing_ids: list[str], change_seq: int
+) -> None:
+    """Leave tombstones for removed listings so `/api/listings/changes` reports them."""
+    if not listing_ids:
+        return
+    db.execute(delete(ListingTombstone).where(ListingTombstone.listing_id.in_(listing_ids)))
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(ListingTombstone),
+        [
+            {
+                "listing_id": listing_id,
+                "workspace_id": workspace_id,
+                "change_seq": change_seq,
+                "deleted_at": now,
+            }
+            for listing_id in listing_ids
+        ],
+    )
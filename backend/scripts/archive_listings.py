@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import argparse
+
+from app.db import WriteSessionLocal, init_db
+from app.listing_archive import DEFAULT_ARCHIVE_BATCH, archive_expired_listings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Move listings older than their workspace's retention setting to the archive."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_ARCHIVE_BATCH,
+        help="Max listings moved per transaction.",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    report = archive_expired_listings(WriteSessionLocal, batch_size=args.batch_size)
+    print(f"workspaces={report.workspaces}")
+    print(f"listings={report.listings}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, Listing, Workspace
+from app.schemas import ListingOut
+from app.serialization import LISTING_OUT_COLUMNS, listing_row, listing_rows_adapter
+
+
+def _seed(session: Session, n: int) -> str:
+    ws = Workspace(token_hash="bench")
+    session.add(ws)
+    session.flush()
+    now = datetime.now(timezone.utc)
+    session.execute(
+        insert(Listing),
+        [
+            {
+                "workspace_id": ws.id,
+                "source": "airbnb",
+                "source_url": f"https://www.airbnb.com/rooms/{i}",
+                "title": f"Room {i}",
+                "price_value": 1000.0 + i,
+                "currency": "USD",
+                "price_period": "month",
+                "monthly_price": 1000.0 + i,
+                "lat": 37.0 + i * 1e-4,
+                "lng": -122.0,
+                "location_text": "Mountain View, CA",
+                "captured_at": now - timedelta(minutes=i),
+            }
+            for i in range(n)
+        ],
+    )
+    session.commit()
+    return ws.id
+
+
+def _model_path(session: Session, workspace_id: str) -> bytes:
+    """What /api/listings did before: ORM entities, validated by FastAPI's response_model."""
+    listings = list(
+        session.scalars(
+            select(Listing)
+            .where(Listing.workspace_id == workspace_id)
+            .order_by(Listing.captured_at.desc())
+        )
+    )
+    adapter = TypeAdapter(list[ListingOut], config={"from_attributes": True})
+    return adapter.dump_json(adapter.validate_python(listings, from_attributes=True))
+
+
+def _row_path(session: Session, workspace_id: str) -> bytes:
+    rows = session.execute(
+        select(*LISTING_OUT_COLUMNS)
+        .where(Listing.workspace_id == workspace_id)
+        .order_by(Listing.captured_at.desc())
+    )
+    return listing_rows_adapter.dump_json([listing_row(row) for row in rows])
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare list-endpoint serialization paths.")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        workspace_id = _seed(session, args.rows)
+
+        def run(path):
+            # Fresh session per run so the ORM path pays for loading entities every time.
+            with Session(engine) as s:
+                return path(s, workspace_id)
+
+        assert run(_model_path) == run(_row_path)
+        for name, path in (("model", _model_path), ("row", _row_path)):
+            seconds = _best_of(lambda: run(path), args.repeat)
+            print(
+                f"{name:>5}: {seconds * 1000:8.1f} ms for {args.rows} rows "
+                f"({seconds / args.rows * 1e6:.1f} us/row)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from app.db import engine, init_db
+from app.query_plans import check_hot_queries, explain, hot_queries
+
+
+def main() -> int:
+    """EXPLAIN the hot workspace queries against DATABASE_URL; exit 1 if any scans or sorts."""
+    init_db()
+    with engine.connect() as conn:
+        failures = check_hot_queries(conn)
+        for name, stmt in hot_queries().items():
+            status = "FAIL" if name in failures else "ok"
+            print(f"[{status}] {name}")
+            for line in explain(conn, stmt):
+                print(f"    {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
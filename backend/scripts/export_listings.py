@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from app.db import SessionLocal, init_db
+from app.export import EXPORT_BATCH_SIZE, ExportTarget, export_listings
+from app.models import Target, Workspace
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Stream a workspace's listings as NDJSON or CSV (same format as "
+        "GET /api/listings/export)."
+    )
+    parser.add_argument("workspace_id")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--target-id", help="Target to measure distances to (default: none).")
+    parser.add_argument(
+        "--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows fetched per round trip."
+    )
+    parser.add_argument("--output", help="File to write (default: stdout).")
+    args = parser.parse_args()
+
+    init_db()
+    with SessionLocal() as db:
+        if db.get(Workspace, args.workspace_id) is None:
+            print(f"Unknown workspace: {args.workspace_id}", file=sys.stderr)
+            return 1
+        target: ExportTarget | None = None
+        if args.target_id:
+            row = db.scalar(
+                select(Target).where(
+                    Target.workspace_id == args.workspace_id, Target.id == args.target_id
+                )
+            )
+            if row is None:
+                print(f"Unknown target: {args.target_id}", file=sys.stderr)
+                return 1
+            target = ExportTarget(row.id, row.lat, row.lng)
+
+        chunks = export_listings(
+            db, args.workspace_id, target, args.format, batch_size=args.batch_size
+        )
+        out = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
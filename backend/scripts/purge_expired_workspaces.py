@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import fields
+from datetime import timedelta
+
+from app.db import SessionLocal, WriteSessionLocal, init_db
+from app.workspace_gc import (
+    DEFAULT_ROW_BATCH,
+    DEFAULT_WORKSPACE_BATCH,
+    LISTING_TOMBSTONE_RETENTION_DAYS,
+    count_expired_workspaces,
+    prune_listing_tombstones,
+    purge_expired_workspaces,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Delete expired EasyRelocate workspaces and all of their data."
+    )
+    parser.add_argument(
+        "--grace-days",
+        type=float,
+        default=0,
+        help="Only purge workspaces that expired at least this many days ago.",
+    )
+    parser.add_argument(
+        "--workspace-batch",
+        type=int,
+        default=DEFAULT_WORKSPACE_BATCH,
+        help="Workspaces handled per batch.",
+    )
+    parser.add_argument(
+        "--row-batch",
+        type=int,
+        default=DEFAULT_ROW_BATCH,
+        help="Max rows deleted per transaction.",
+    )
+    parser.add_argument(
+        "--max-workspaces", type=int, default=None, help="Stop after this many workspaces."
+    )
+    parser.add_argument(
+        "--tombstone-days",
+        type=float,
+        default=LISTING_TOMBSTONE_RETENTION_DAYS,
+        help="Also prune listing tombstones older than this many days (0 = keep them).",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only count the expired workspaces."
+    )
+    args = parser.parse_args()
+
+    init_db()
+    grace = timedelta(days=args.grace_days)
+
+    if args.dry_run:
+        with SessionLocal() as db:
+            print(f"expired_workspaces={count_expired_workspaces(db, grace=grace)}")
+        return 0
+
+    report = purge_expired_workspaces(
+        WriteSessionLocal,
+        grace=grace,
+        workspace_batch=args.workspace_batch,
+        row_batch=args.row_batch,
+        max_workspaces=args.max_workspaces,
+    )
+    for f in fields(report):
+        print(f"{f.name}={getattr(report, f.name)}")
+    print(f"total_rows={report.total_rows}")
+    if args.tombstone_days > 0:
+        pruned = prune_listing_tombstones(
+            WriteSessionLocal,
+            max_age=timedelta(days=args.tombstone_days),
+            batch_size=args.row_batch,
+        )
+        print(f"pruned_listing_tombstones={pruned}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import argparse
+
+from app.db import WriteSessionLocal, init_db
+from app.workspace_counters import DEFAULT_REPAIR_BATCH, repair_workspace_counters
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Recompute the per-workspace listing counters behind /api/listings/summary."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_REPAIR_BATCH,
+        help="Workspaces checked per transaction.",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    report = repair_workspace_counters(WriteSessionLocal, batch_size=args.batch_size)
+    print(f"checked={report.checked}")
+    print(f"repaired={report.repaired}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
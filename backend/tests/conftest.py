@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
@@ -16,7 +17,22 @@ os.environ.setdefault("ENABLE_GEOCODING", "0")
 def _reset_db() -> None:
     from app import models  # noqa: F401
     from app.db import Base, engine
+    from app.workspace_cache import cache
 
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    cache.clear()
 
+
+@pytest.fixture
+def max_queries():
+    """`with max_queries(n): ...` fails the test if the block runs more than `n` SQL statements."""
+    from app.query_stats import capture_queries
+
+    @contextmanager
+    def check(limit: int):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.statements <= limit, f"{stats.statements} SQL statements, budget is {limit}"
+
+    return check
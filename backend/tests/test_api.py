@@ -45,3 +45,304 @@ def test_create_and_delete_listing() -> None:
         after = client.get("/api/listings", headers=headers)
         assert after.status_code == 200, after.text
         assert after.json() == []
+
+
+def test_read_endpoints_answer_if_none_match_with_304() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        token = client.post("/api/workspaces/issue").json()["workspace_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        first = client.get("/api/listings", headers=headers)
+        assert first.status_code == 200, first.text
+        etag = first.headers["etag"]
+
+        again = client.get("/api/listings", headers={**headers, "If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        targets = client.get("/api/targets", headers={**headers, "If-None-Match": etag})
+        assert targets.status_code == 304
+
+        created = client.post(
+            "/api/listings",
+            json={"source": "airbnb", "source_url": "https://www.airbnb.com/rooms/9"},
+            headers=headers,
+        )
+        assert created.status_code == 200, created.text
+
+        changed = client.get("/api/listings", headers={**headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert len(changed.json()) == 1
+
+        deleted = client.delete(f"/api/listings/{created.json()['id']}", headers=headers)
+        assert deleted.status_code == 200
+        after_delete = client.get(
+            "/api/listings", headers={**headers, "If-None-Match": changed.headers["etag"]}
+        )
+        assert after_delete.status_code == 200
+        assert after_delete.json() == []
+
+
+def test_workspace_events_stream_relays_changes(monkeypatch) -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    import threading
+
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    monkeypatch.setattr(main, "WORKSPACE_EVENTS_STREAM_S", 2.0)
+
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+
+        # TestClient runs the whole stream before returning, so publish from another thread.
+        threading.Timer(0.5, main.workspace_events.publish, args=(issued["workspace_id"], 4)).start()
+        lines: list[str] = []
+        with client.stream("GET", "/api/workspace/events", headers=headers) as res:
+            assert res.status_code == 200
+            assert res.headers["content-type"].startswith("text/event-stream")
+            for line in res.iter_lines():
+                if line.startswith(("event: ", "data: ")):
+                    lines.append(line)
+
+        assert lines == [
+            "event: version",
+            'data: {"version": 0}',
+            "event: change",
+            'data: {"version": 4}',
+        ]
+
+
+def test_committed_mutations_publish_workspace_versions() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    import asyncio
+
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+
+        async def capture_version_after(method: str, url: str, version: int, **kwargs) -> int:
+            with main.workspace_events.subscribe(issued["workspace_id"], version) as queue:
+                res = await asyncio.to_thread(client.request, method, url, headers=headers, **kwargs)
+                assert res.status_code == 200, res.text
+                return await asyncio.wait_for(queue.get(), timeout=2)
+
+        listing = {"source": "airbnb", "source_url": "https://www.airbnb.com/rooms/5"}
+        assert asyncio.run(capture_version_after("POST", "/api/listings", 0, json=listing)) == 1
+        target = {"name": "Workplace", "lat": 37.4, "lng": -122.0}
+        assert asyncio.run(capture_version_after("POST", "/api/targets", 1, json=target)) == 2
+
+
+def test_polling_notifier_delivers_changes_made_before_its_first_poll() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    import asyncio
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import update
+
+    import app.main as main
+    from app.db import SessionLocal, engine
+    from app.events import PollingChangeNotifier
+    from app.models import Workspace
+
+    with TestClient(main.app) as client:
+        workspace_id = client.post("/api/workspaces/issue").json()["workspace_id"]
+
+    poller = PollingChangeNotifier(engine, interval_s=60)
+
+    async def versions_seen() -> list[int]:
+        with main.workspace_events.subscribe(workspace_id, 0) as queue:
+            # Another worker commits before this one polls (nothing is published in-process).
+            with SessionLocal() as db:
+                db.execute(update(Workspace).where(Workspace.id == workspace_id).values(version=1))
+                db.commit()
+            await asyncio.to_thread(poller.poll)
+            await asyncio.to_thread(poller.poll)
+            await asyncio.sleep(0)
+            seen = []
+            while not queue.empty():
+                seen.append(queue.get_nowait())
+            return seen
+
+    assert asyncio.run(versions_seen()) == [1]
+
+
+def test_listing_changes_returns_deltas_and_tombstones() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        token = client.post("/api/workspaces/issue").json()["workspace_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def upsert(room: int, title: str) -> str:
+            res = client.post(
+                "/api/listings",
+                json={
+                    "source": "airbnb",
+                    "source_url": f"https://www.airbnb.com/rooms/{room}",
+                    "title": title,
+                },
+                headers=headers,
+            )
+            assert res.status_code == 200, res.text
+            return res.json()["id"]
+
+        first_id = upsert(1, "One")
+        second_id = upsert(2, "Two")
+
+        snapshot = client.get("/api/listings/changes", headers=headers).json()
+        assert snapshot["reset"] is True
+        assert [it["id"] for it in snapshot["upserted"]] == [first_id, second_id]
+        assert snapshot["deleted"] == []
+
+        upsert(2, "Two (edited)")
+        assert client.delete(f"/api/listings/{first_id}", headers=headers).status_code == 200
+
+        delta = client.get(
+            "/api/listings/changes", params={"since": snapshot["cursor"]}, headers=headers
+        ).json()
+        assert delta["reset"] is False
+        assert [it["title"] for it in delta["upserted"]] == ["Two (edited)"]
+        assert delta["deleted"] == [first_id]
+
+        empty = client.get(
+            "/api/listings/changes", params={"since": delta["cursor"]}, headers=headers
+        ).json()
+        assert empty["upserted"] == [] and empty["deleted"] == []
+
+        other_token = client.post("/api/workspaces/issue").json()["workspace_token"]
+        foreign = client.get(
+            "/api/listings/changes",
+            params={"since": delta["cursor"]},
+            headers={"Authorization": f"Bearer {other_token}"},
+        )
+        assert foreign.status_code == 400
+
+
+def test_list_listings_pages_by_keyset_cursor() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.pagination import encode_cursor
+
+    with TestClient(app) as client:
+        token = client.post("/api/workspaces/issue").json()["workspace_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for room, captured_at in enumerate(
+            # Ties on captured_at are broken by id.
+            ["2026-01-10T10:00:00Z"] * 3 + ["2026-01-11T10:00:00Z", "2026-01-09T10:00:00Z"]
+        ):
+            res = client.post(
+                "/api/listings",
+                json={
+                    "source": "airbnb",
+                    "source_url": f"https://www.airbnb.com/rooms/{room}",
+                    "captured_at": captured_at,
+                },
+                headers=headers,
+            )
+            assert res.status_code == 200, res.text
+
+        everything = client.get("/api/listings", headers=headers)
+        assert everything.headers["x-total-count"] == "5"
+        assert "x-next-cursor" not in everything.headers
+        expected = [row["id"] for row in everything.json()]
+        assert len(expected) == 5
+
+        pages: list[list[str]] = []
+        params: dict[str, object] = {"limit": 2}
+        while True:
+            res = client.get("/api/listings", params=params, headers=headers)
+            assert res.status_code == 200, res.text
+            assert res.headers["x-total-count"] == "5"
+            pages.append([row["id"] for row in res.json()])
+            if "x-next-cursor" not in res.headers:
+                break
+            params["cursor"] = res.headers["x-next-cursor"]
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [listing_id for page in pages for listing_id in page] == expected
+
+        bad = client.get("/api/listings", params={"cursor": "nope"}, headers=headers)
+        assert bad.status_code == 400
+        # A well-formed cursor whose key was tampered with to a number.
+        tampered = client.get(
+            "/api/listings", params={"cursor": encode_cursor("listings", 5, "x")}, headers=headers
+        )
+        assert tampered.status_code == 400
+
+
+def test_workspace_auth_is_cached_until_the_workspace_is_deleted() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.db import SessionLocal, async_engine
+    from app.main import app
+    from app.models import Workspace
+
+    # Auth runs on the async engine.
+    engine = async_engine.sync_engine
+    token_lookups: list[str] = []
+
+    def count_token_lookups(conn, cursor, statement, parameters, context, executemany) -> None:
+        if "token_hash" in statement:
+            token_lookups.append(statement)
+
+    with TestClient(app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        event.listen(engine, "before_cursor_execute", count_token_lookups)
+        try:
+            assert client.get("/api/listings/summary", headers=headers).status_code == 200
+            assert client.get("/api/listings/summary", headers=headers).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", count_token_lookups)
+        assert len(token_lookups) == 1
+
+        with SessionLocal() as db:
+            db.delete(db.get(Workspace, issued["workspace_id"]))
+            db.commit()
+        gone = client.get("/api/listings/summary", headers=headers)
+        assert gone.status_code == 401
+        assert gone.json()["detail"] == "Invalid workspace token"
+
+
+def test_writes_to_a_deleted_workspace_with_a_cached_token_are_rejected() -> None:
+    os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+    from app.db import SessionLocal
+    from app.models import Workspace
+    from app.workspaces import hash_workspace_token
+
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        # A write (not a read) is the first request to notice the deletion.
+        assert client.get("/api/targets", headers=headers).status_code == 200
+        with SessionLocal() as db:
+            db.delete(db.get(Workspace, issued["workspace_id"]))
+            db.commit()
+        gone = client.post(
+            "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+        )
+        assert gone.status_code == 401
+        assert gone.json()["detail"] == "Invalid workspace token"
+        token_hash = hash_workspace_token(issued["workspace_token"])
+        assert main.workspace_auth_cache.get(token_hash) is None
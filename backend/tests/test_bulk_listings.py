@@ -0,0 +1,129 @@
+import os
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import engine
+from app.geocoding import ReverseGeocodeResult
+from app.schemas import MAX_BULK_LISTINGS
+
+
+def _item(n: int, **fields) -> dict:
+    return {
+        "source": "airbnb",
+        "source_url": f"https://www.airbnb.com/rooms/{n}",
+        "currency": "USD",
+        "price_period": "month",
+        "captured_at": "2026-01-30T10:00:00Z",
+        **fields,
+    }
+
+
+def test_bulk_upsert_dedupes_and_writes_in_one_transaction() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        client.post(
+            "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+        )
+        existing = client.post("/api/listings", json=_item(1), headers=headers).json()
+
+        statements: list[str] = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            res = client.post(
+                "/api/listings/bulk",
+                json={
+                    "items": [
+                        _item(1, price_value=900),
+                        _item(2, lat=37.01, lng=-122.0, price_value=1200),
+                        _item(3),
+                        _item(2, title="Sunny studio"),
+                    ]
+                },
+                headers=headers,
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert res.status_code == 200, res.text
+        items = res.json()["items"]
+        assert [i["status"] for i in items] == ["updated", "created", "created", "updated"]
+        assert items[0]["id"] == existing["id"]
+        assert items[1]["id"] == items[3]["id"]
+
+        inserts = [s for s in statements if s.startswith("INSERT INTO listings ")]
+        assert len(inserts) == 1
+        # One lookup of the existing rows, nothing re-read after the commit.
+        assert sum(s.count("FROM listings") for s in statements if s.startswith("SELECT")) == 1
+
+        listings = {
+            row["source_url"]: row for row in client.get("/api/listings", headers=headers).json()
+        }
+        assert len(listings) == 3
+        merged = listings["https://www.airbnb.com/rooms/2"]
+        assert (merged["title"], merged["price_value"]) == ("Sunny studio", 1200)
+        assert listings["https://www.airbnb.com/rooms/1"]["price_value"] == 900
+
+        assert client.get("/api/listings/summary", headers=headers).json()["count"] == 3
+        compare = client.get("/api/compare", headers=headers).json()["items"]
+        distances = {c["listing"]["id"]: c["metrics"]["distance_km"] for c in compare}
+        assert distances[items[1]["id"]] is not None
+
+
+def test_bulk_upsert_rejects_oversized_batches() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        items = [_item(n) for n in range(MAX_BULK_LISTINGS + 1)]
+        res = client.post("/api/listings/bulk", json={"items": items}, headers=headers)
+        assert res.status_code == 422
+
+
+def test_bulk_upsert_geocodes_before_the_write_transaction(monkeypatch) -> None:
+    statements: list[str] = []
+    geocoded: list[tuple[float, float, int]] = []
+
+    def fake_reverse_geocode(lat: float, lng: float, *, zoom: int = 10) -> ReverseGeocodeResult:
+        # Statements run so far: none of them may have started the write transaction.
+        geocoded.append((lat, lng, len(statements)))
+        return ReverseGeocodeResult(
+            display_name=None, address={"city": "Mountain View", "state": "CA"}
+        )
+
+    monkeypatch.setattr(main, "ENABLE_GEOCODING", True)
+    monkeypatch.setattr(main, "reverse_geocode", fake_reverse_geocode)
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        client.post(
+            "/api/listings",
+            json=_item(1, lat=37.0, lng=-122.0, location_text="Palo Alto, CA"),
+            headers=headers,
+        )
+        geocoded.clear()
+
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            res = client.post(
+                "/api/listings/bulk",
+                json={"items": [_item(1, lat=37.1, lng=-122.0), _item(2, lat=37.2, lng=-122.0)]},
+                headers=headers,
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert res.status_code == 200, res.text
+
+        # Room 1 keeps its stored location text; only room 2 needed the geocoder.
+        assert [(lat, lng) for lat, lng, _ in geocoded] == [(37.2, -122.0)]
+        # Only the pre-read of the stored locations ran before the geocoder.
+        assert geocoded[0][2] == 1 and "FROM listings" in statements[0]
+        listings = {
+            row["source_url"][-1]: row for row in client.get("/api/listings", headers=headers).json()
+        }
+        assert listings["1"]["location_text"] == "Palo Alto, CA"
+        assert listings["2"]["location_text"] == "Mountain View, CA"
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import SessionLocal
+from app.export import EXPORT_FIELDS, export_batches
+from app.models import ListingTargetMetric
+
+
+def _setup(client: TestClient) -> tuple[dict[str, str], str, str]:
+    issued = client.post("/api/workspaces/issue").json()
+    headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+    target = client.post(
+        "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+    ).json()
+    for n, extra in enumerate([{"lat": 37.01, "lng": -122.0}, {}, {"title": 'Loft, "sunny"'}]):
+        res = client.post(
+            "/api/listings",
+            json={
+                "source": "airbnb",
+                "source_url": f"https://www.airbnb.com/rooms/{n}",
+                "price_value": 1000 + n,
+                "price_period": "month",
+                "captured_at": f"2026-01-1{n}T10:00:00Z",
+                **extra,
+            },
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+    return headers, issued["workspace_id"], target["id"]
+
+
+def test_ndjson_export_streams_listings_with_target_distance() -> None:
+    with TestClient(main.app) as client:
+        headers, _, target_id = _setup(client)
+        # Distances missing from the metrics table are computed on the fly.
+        with SessionLocal() as db:
+            db.execute(delete(ListingTargetMetric))
+            db.commit()
+
+        res = client.get("/api/listings/export", headers=headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"] == "application/x-ndjson"
+        assert res.headers["x-export-target-id"] == target_id
+        assert "attachment" in res.headers["content-disposition"]
+        rows = [json.loads(line) for line in res.text.splitlines()]
+        assert [row["source_url"][-1] for row in rows] == ["2", "1", "0"]
+        assert tuple(rows[0]) == EXPORT_FIELDS
+        assert [row["distance_km"] is None for row in rows] == [True, True, False]
+        assert round(rows[2]["distance_km"], 2) == 1.11
+
+        missing = client.get("/api/listings/export?target_id=nope", headers=headers)
+        assert missing.status_code == 404
+
+
+def test_csv_export_matches_the_json_values() -> None:
+    with TestClient(main.app) as client:
+        headers, _, _ = _setup(client)
+        res = client.get("/api/listings/export", params={"format": "csv"}, headers=headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"].startswith("text/csv")
+        reader = csv.DictReader(io.StringIO(res.text))
+        assert tuple(reader.fieldnames or ()) == EXPORT_FIELDS
+        rows = list(reader)
+        assert rows[0]["title"] == 'Loft, "sunny"'
+        assert rows[0]["captured_at"].startswith("2026-01-12T10:00:00")
+        assert (rows[1]["lat"], rows[2]["price_value"]) == ("", "1000.0")
+
+        issued = client.post("/api/workspaces/issue").json()
+        empty = client.get(
+            "/api/listings/export",
+            params={"format": "csv"},
+            headers={"Authorization": f"Bearer {issued['workspace_token']}"},
+        )
+        assert empty.text.splitlines() == [",".join(EXPORT_FIELDS)]
+
+
+def test_export_fetches_rows_in_batches() -> None:
+    with TestClient(main.app) as client:
+        _, workspace_id, _ = _setup(client)
+    with SessionLocal() as db:
+        assert [len(batch) for batch in export_batches(db, workspace_id, None, batch_size=2)] == [
+            2,
+            1,
+        ]
@@ -0,0 +1,42 @@
+import random
+
+from app.geohash import PREFIX_END, bbox_around, cover_bbox, encode
+from app.distance import haversine_km
+
+
+def test_encode_known_vector() -> None:
+    assert encode(57.64911, 10.40744) == "u4pruydqq"
+    assert encode(57.64911, 10.40744, precision=5) == "u4pru"
+
+
+def _covered(h: str, cells: list[str]) -> bool:
+    return any(cell <= h < cell + PREFIX_END for cell in cells)
+
+
+def test_cover_bbox_contains_every_point_in_box() -> None:
+    rng = random.Random(7)
+    south, west, north, east = 37.3, -122.2, 37.5, -121.9
+    cells = cover_bbox(south, west, north, east)
+    assert 0 < len(cells) <= 32
+    for _ in range(500):
+        lat = rng.uniform(south, north)
+        lng = rng.uniform(west, east)
+        assert _covered(encode(lat, lng), cells)
+
+
+def test_cover_bbox_across_antimeridian() -> None:
+    cells = cover_bbox(-10.0, 179.5, 10.0, -179.5)
+    assert _covered(encode(0.0, 179.9), cells)
+    assert _covered(encode(0.0, -179.9), cells)
+
+
+def test_bbox_around_contains_radius() -> None:
+    rng = random.Random(11)
+    lat0, lng0, radius = 60.0, 25.0, 5.0
+    south, west, north, east = bbox_around(lat0, lng0, radius)
+    for _ in range(500):
+        lat = lat0 + rng.uniform(-0.1, 0.1)
+        lng = lng0 + rng.uniform(-0.2, 0.2)
+        if haversine_km(lat0, lng0, lat, lng) <= radius:
+            assert south <= lat <= north
+            assert west <= lng <= east
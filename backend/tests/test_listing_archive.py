@@ -0,0 +1,153 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, update
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import SessionLocal, WriteSessionLocal
+from app.listing_archive import archive_expired_listings, archive_listing_batch
+from app.models import Workspace
+from app.pagination import encode_cursor
+from app.workspace_gc import purge_expired_workspaces
+
+
+OLD = "2025-01-10T10:00:00Z"
+
+
+def _post_listing(client: TestClient, headers: dict[str, str], n: int, captured_at: str, **extra):
+    res = client.post(
+        "/api/listings",
+        json={
+            "source": "airbnb",
+            "source_url": f"https://www.airbnb.com/rooms/{n}",
+            "price_value": 1000,
+            "price_period": "month",
+            "captured_at": captured_at,
+            **extra,
+        },
+        headers=headers,
+    )
+    assert res.status_code == 200, res.text
+    return res.json()["id"]
+
+
+def test_retention_archives_old_listings_and_restore_brings_them_back() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        client.post(
+            "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+        )
+        located = _post_listing(client, headers, 1, OLD, lat=37.01, lng=-122.0)
+        _post_listing(client, headers, 2, "2025-01-11T10:00:00Z")
+        recent = _post_listing(client, headers, 3, datetime.now(timezone.utc).isoformat())
+        cursor = client.get("/api/listings/changes", headers=headers).json()["cursor"]
+
+        assert client.get("/api/workspace/retention", headers=headers).json() == {
+            "listing_retention_days": None
+        }
+        # Without a setting nothing is archived.
+        assert archive_expired_listings(WriteSessionLocal).listings == 0
+        res = client.put(
+            "/api/workspace/retention", json={"listing_retention_days": 0}, headers=headers
+        )
+        assert res.status_code == 422
+        res = client.put(
+            "/api/workspace/retention", json={"listing_retention_days": 90}, headers=headers
+        )
+        assert res.json() == {"listing_retention_days": 90}
+
+        report = archive_expired_listings(WriteSessionLocal, batch_size=1)
+        assert (report.workspaces, report.listings) == (1, 2)
+
+        assert [row["id"] for row in client.get("/api/listings", headers=headers).json()] == [
+            recent
+        ]
+        assert client.get("/api/listings/summary", headers=headers).json()["count"] == 1
+        assert len(client.get("/api/compare", headers=headers).json()["items"]) == 1
+        changes = client.get(
+            "/api/listings/changes", params={"since": cursor}, headers=headers
+        ).json()
+        assert located in changes["deleted"] and len(changes["deleted"]) == 2
+
+        page = client.get("/api/listings/archive", params={"limit": 1}, headers=headers).json()
+        assert [item["source_url"][-1] for item in page["items"]] == ["2"]
+        rest = client.get(
+            "/api/listings/archive", params={"cursor": page["next_cursor"]}, headers=headers
+        ).json()
+        assert [item["id"] for item in rest["items"]] == [located]
+        assert rest["next_cursor"] is None
+
+        cursor = changes["cursor"]
+        res = client.post(
+            "/api/listings/archive/restore", json={"ids": [located, "nope"]}, headers=headers
+        )
+        assert res.status_code == 200, res.text
+        assert [row["id"] for row in res.json()] == [located]
+        assert res.json()[0]["captured_at"].startswith("2025-01-10T10:00:00")
+
+        compare = client.get("/api/compare", headers=headers).json()["items"]
+        distances = {item["listing"]["id"]: item["metrics"]["distance_km"] for item in compare}
+        assert round(distances[located], 2) == 1.11
+        assert client.get("/api/listings/summary", headers=headers).json()["count"] == 2
+        changes = client.get(
+            "/api/listings/changes", params={"since": cursor}, headers=headers
+        ).json()
+        assert ([row["id"] for row in changes["upserted"]], changes["deleted"]) == ([located], [])
+        assert len(client.get("/api/listings/archive", headers=headers).json()["items"]) == 1
+
+        # A restored listing gets a full retention period before it is archived again.
+        assert archive_expired_listings(WriteSessionLocal).listings == 0
+
+        with SessionLocal() as db:
+            db.execute(
+                update(Workspace)
+                .where(Workspace.id == issued["workspace_id"])
+                .values(expires_at=datetime.now(timezone.utc) - timedelta(days=1))
+            )
+            db.commit()
+        assert purge_expired_workspaces(SessionLocal).archived_listings == 1
+
+
+def test_restore_skips_listings_saved_again_since() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        archived = _post_listing(client, headers, 1, OLD)
+        client.put("/api/workspace/retention", json={"listing_retention_days": 30}, headers=headers)
+        assert archive_expired_listings(WriteSessionLocal).listings == 1
+
+        live = _post_listing(client, headers, 1, datetime.now(timezone.utc).isoformat())
+        res = client.post(
+            "/api/listings/archive/restore", json={"ids": [archived]}, headers=headers
+        )
+        assert res.json() == []
+        assert [row["id"] for row in client.get("/api/listings", headers=headers).json()] == [live]
+        assert client.get("/api/listings/archive", headers=headers).json()["items"] == []
+
+
+def test_archive_rejects_cursors_without_a_timestamp_key() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        for key in (None, 5):
+            res = client.get(
+                "/api/listings/archive",
+                params={"cursor": encode_cursor("archive", key, "x")},
+                headers=headers,
+            )
+            assert res.status_code == 400, res.text
+
+
+def test_archive_batch_skips_a_workspace_deleted_meanwhile() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        _post_listing(client, headers, 1, OLD)
+    with SessionLocal() as db:
+        db.execute(delete(Workspace).where(Workspace.id == issued["workspace_id"]))
+        now = datetime.now(timezone.utc)
+        assert archive_listing_batch(db, issued["workspace_id"], now, now=now, batch_size=10) == 0
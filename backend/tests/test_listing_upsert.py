@@ -0,0 +1,116 @@
+import os
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import engine
+from app.geocoding import ReverseGeocodeResult
+from app.listing_upsert import listing_upsert
+from app.models import Listing
+
+
+URL = "https://www.airbnb.com/rooms/upsert"
+
+
+def _post(client: TestClient, headers: dict[str, str], **fields) -> dict:
+    res = client.post(
+        "/api/listings", json={"source": "airbnb", "source_url": URL, **fields}, headers=headers
+    )
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def test_upsert_is_one_statement_and_keeps_non_null_merge() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        client.post(
+            "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+        )
+        created = _post(
+            client,
+            headers,
+            title="Studio",
+            price_value=100,
+            price_period="night",
+            currency="EUR",
+            lat=37.01,
+            lng=-122.0,
+        )
+
+        statements: list[str] = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            # NULLs and unset fields (including the `currency` default) keep the stored values.
+            updated = _post(client, headers, title=None, price_value=None, lat=37.02)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert updated["id"] == created["id"]
+        assert (updated["title"], updated["price_value"], updated["currency"]) == (
+            "Studio",
+            100,
+            "EUR",
+        )
+        assert updated["monthly_price"] == 3000
+        assert updated["lat"] == 37.02
+
+        # No lookup first: the upsert is the first statement touching listings.
+        touching_listings = [s for s in statements if " listings" in s]
+        assert touching_listings[0].startswith("INSERT INTO listings ")
+        assert "ON CONFLICT (workspace_id, source_url) DO UPDATE" in touching_listings[0]
+
+        # The coordinate change refreshed the stored distance.
+        compare = client.get("/api/compare", headers=headers).json()["items"]
+        assert round(compare[0]["metrics"]["distance_km"], 2) == 2.22
+        summary = client.get("/api/listings/summary", headers=headers).json()
+        assert (summary["count"], summary["latest_id"]) == (1, created["id"])
+
+
+def test_postgres_upsert_statement() -> None:
+    stmt = listing_upsert(
+        "postgresql",
+        {"id": "l1", "workspace_id": "ws", "source": "airbnb", "source_url": URL},
+        overwrite=["title", "lat"],
+    ).returning(Listing.id)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (workspace_id, source_url) DO UPDATE SET" in sql
+    assert "title = coalesce(excluded.title, listings.title)" in sql
+    assert "IS NOT DISTINCT FROM" in sql
+    assert "RETURNING listings.id" in sql
+
+
+def test_upsert_geocodes_before_the_write_transaction(monkeypatch) -> None:
+    statements: list[str] = []
+    geocoded: list[int] = []
+
+    def fake_reverse_geocode(lat: float, lng: float, *, zoom: int = 10) -> ReverseGeocodeResult:
+        geocoded.append(len(statements))
+        return ReverseGeocodeResult(
+            display_name=None, address={"city": "Mountain View", "state": "CA"}
+        )
+
+    monkeypatch.setattr(main, "ENABLE_GEOCODING", True)
+    monkeypatch.setattr(main, "reverse_geocode", fake_reverse_geocode)
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            created = _post(client, headers, lat=37.4, lng=-122.0)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert created["location_text"] == "Mountain View, CA"
+        # Only the read of the stored location ran before the geocoder.
+        assert geocoded == [1] and "FROM listings" in statements[0]
+
+        # The stored location text is kept: no provider call.
+        assert _post(client, headers, lat=37.5, lng=-122.0)["location_text"] == "Mountain View, CA"
+        assert len(geocoded) == 1
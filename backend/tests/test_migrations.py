@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, event, insert, select, text
+
+from app.db import Base
+from app.migrations import HEAD, MIGRATIONS, current_version, migrate, schema_migrations
+from app.models import Listing, Target, Workspace
+
+
+def test_migrate_backfills_once_then_only_checks_the_version(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Workspace).values(id="ws", token_hash="h", version=0))
+        # A row written before geohash/monthly_price existed.
+        conn.execute(
+            insert(Listing).values(
+                id="l1",
+                workspace_id="ws",
+                source="airbnb",
+                source_url="https://www.airbnb.com/rooms/1",
+                currency="USD",
+                price_value=80.0,
+                price_period="night",
+                lat=37.0,
+                lng=-122.0,
+                captured_at=datetime(2026, 1, 30, tzinfo=timezone.utc),
+            )
+        )
+        # ... and a target saved before listing_target_metrics existed.
+        conn.execute(
+            insert(Target).values(id="t1", workspace_id="ws", name="Office", lat=37.0, lng=-122.01)
+        )
+
+    assert migrate(engine, Base.metadata) == len(MIGRATIONS)
+    with engine.connect() as conn:
+        assert current_version(conn) == HEAD
+        assert [r.name for r in conn.execute(select(schema_migrations.c.name))] == [
+            m.name for m in MIGRATIONS
+        ]
+        geohash, monthly = conn.execute(
+            text("SELECT geohash, monthly_price FROM listings WHERE id = 'l1'")
+        ).one()
+        counters = conn.execute(
+            text("SELECT listing_count, latest_listing_id FROM workspaces WHERE id = 'ws'")
+        ).one()
+        metrics = conn.execute(
+            text("SELECT listing_id, target_id, distance_km FROM listing_target_metrics")
+        ).all()
+    assert tuple(counters) == (1, "l1")
+    assert [(m.listing_id, m.target_id, round(m.distance_km, 2)) for m in metrics] == [
+        ("l1", "t1", 0.89)
+    ]
+    assert geohash and geohash.startswith("9q")
+    assert monthly == 2400.0
+
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert migrate(engine, Base.metadata) == 0
+    assert len(statements) == 1 and "schema_migrations" in statements[0]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+    pool_snapshots,
+)
+
+
+def test_instrumented_pool_counts_waits_overflow_and_timeouts(tmp_path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    metrics = instrument_engine(engine, "test")
+
+    first = engine.connect()
+    second = engine.connect()  # beyond pool_size: overflow
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    snapshot = metrics.snapshot(engine)
+    assert snapshot["checkouts"] == 2
+    assert snapshot["overflow_checkouts"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["in_use"] == 2 and snapshot["overflow"] == 1
+
+    second.close()
+    first.execute(text("SELECT 1"))
+    first.close()
+    snapshot = metrics.snapshot(engine)
+    assert snapshot["in_use"] == 0 and snapshot["peak_in_use"] == 2
+    engine.dispose()
+
+
+def test_async_pool_times_every_contended_checkout(tmp_path) -> None:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    metrics = instrument_engine(engine.sync_engine, "test (async)")
+
+    async def query() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        # Four coroutines on one event loop thread queue for the single connection.
+        await asyncio.gather(*(query() for _ in range(4)))
+        await engine.dispose()
+
+    asyncio.run(run())
+    snapshot = metrics.snapshot(engine.sync_engine)
+    assert snapshot["checkouts"] == 4
+    assert snapshot["wait_max_ms"] >= 10
+    assert snapshot["name"] in {pool["name"] for pool in pool_snapshots()}
+
+
+def test_db_pool_stats_endpoint_requires_admin_token(monkeypatch) -> None:
+    from fastapi.testclient import TestClient
+
+    import app.main as main
+
+    monkeypatch.setattr(main, "ADMIN_STATS_TOKEN", "admin")
+    with TestClient(main.app) as client:
+        assert client.get("/api/stats/db_pool").status_code == 401
+        res = client.get("/api/stats/db_pool", headers={"Authorization": "Bearer admin"})
+        assert res.status_code == 200, res.text
+        pools = {pool["name"]: pool for pool in res.json()["pools"]}
+        assert pools["primary"]["pool"] == "StaticPool"
+        assert pools["primary (async)"]["pool"] == "NullPool"
@@ -0,0 +1,12 @@
+from app.pricing import monthly_price
+
+
+def test_monthly_price_conversions() -> None:
+    assert monthly_price(2500.0, "month") == 2500.0
+    assert monthly_price(80.0, "night") == 2400.0
+
+
+def test_monthly_price_unknown_duration_is_none() -> None:
+    assert monthly_price(9000.0, "total") is None
+    assert monthly_price(2500.0, "unknown") is None
+    assert monthly_price(None, "month") is None
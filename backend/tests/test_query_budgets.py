@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app import query_stats
+
+
+def _listing(n: int) -> dict:
+    return {
+        "source": "airbnb",
+        "source_url": f"https://www.airbnb.com/rooms/{n}",
+        "currency": "USD",
+        "price_period": "month",
+        "price_value": 1000 + n,
+        "lat": 37.0 + n / 100,
+        "lng": -122.0,
+        "captured_at": "2026-01-30T10:00:00Z",
+    }
+
+
+@pytest.fixture
+def workspace():
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        client.post(
+            "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+        )
+        for n in range(5):
+            client.post("/api/listings", json=_listing(n), headers=headers)
+        yield client, headers
+
+
+# Statements per request with a cached workspace token. Raise a budget only for a deliberate
+# change; an N+1 loop shows up here as a count that grows with the number of listings.
+@pytest.mark.parametrize(
+    ("method", "path", "body", "budget"),
+    [
+        ("get", "/api/listings", None, 2),
+        ("get", "/api/listings?limit=2", None, 2),
+        ("get", "/api/listings/summary", None, 1),
+        ("get", "/api/compare", None, 3),
+        ("get", "/api/compare?format=columnar", None, 3),
+        ("get", "/api/targets", None, 2),
+        ("get", "/api/listings/changes", None, 2),
+        ("get", "/api/listings/export?format=csv", None, 2),
+        ("post", "/api/listings", _listing(9), 9),
+        ("post", "/api/listings", {**_listing(1), "title": "Updated"}, 5),
+        ("post", "/api/listings/bulk", {"items": [_listing(n) for n in range(10, 30)]}, 8),
+    ],
+)
+def test_endpoint_query_budgets(workspace, max_queries, method, path, body, budget) -> None:
+    client, headers = workspace
+    with max_queries(budget):
+        res = getattr(client, method)(path, headers=headers, **({"json": body} if body else {}))
+    assert res.status_code == 200, res.text
+
+
+def test_query_stats_headers(workspace, monkeypatch) -> None:
+    client, headers = workspace
+    assert "x-db-queries" not in client.get("/api/listings/summary", headers=headers).headers
+
+    monkeypatch.setattr(query_stats, "SQL_QUERY_STATS_HEADER", True)
+    res = client.get("/api/compare", headers=headers)
+    assert res.headers["x-db-queries"] == "3"
+    assert float(res.headers["x-db-time-ms"]) >= 0
+    # Sync endpoints run in the threadpool and still report into the request's stats.
+    assert client.get("/api/targets", headers=headers).headers["x-db-queries"] == "2"
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, delete, text
+
+from app.db import Base
+from app.migrations import HEAD, migrate, schema_migrations
+from app.query_plans import check_hot_queries
+
+
+def _migrated_engine(url: str):
+    engine = create_engine(url)
+    migrate(engine, Base.metadata)
+    return engine
+
+
+def test_hot_queries_use_indexes_on_sqlite(tmp_path) -> None:
+    engine = _migrated_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.connect() as conn:
+        assert check_hot_queries(conn) == {}
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_listings_workspace_captured_at"))
+    # sqlite3 caches prepared EXPLAIN statements per connection; start from a fresh one.
+    engine.dispose()
+    with engine.connect() as conn:
+        failures = check_hot_queries(conn)
+    assert "list_listings" in failures
+    assert any("TEMP B-TREE" in line for line in failures["list_listings"])
+
+
+def test_recency_index_migration_upgrades_an_existing_database(tmp_path) -> None:
+    engine = _migrated_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    with engine.begin() as conn:
+        for index in (
+            "ix_listings_workspace_captured_at",
+            "ix_targets_workspace_updated_at",
+            "ix_interesting_targets_workspace_updated_at",
+        ):
+            conn.execute(text(f"DROP INDEX {index}"))
+        conn.execute(delete(schema_migrations).where(schema_migrations.c.version >= 8))
+
+    assert migrate(engine, Base.metadata) == HEAD - 7
+    with engine.connect() as conn:
+        assert check_hot_queries(conn) == {}
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"), reason="set TEST_POSTGRES_URL to check Postgres plans"
+)
+def test_hot_queries_use_indexes_on_postgres() -> None:
+    engine = _migrated_engine(os.environ["TEST_POSTGRES_URL"])
+    with engine.connect() as conn:
+        assert check_hot_queries(conn) == {}
@@ -0,0 +1,33 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.ranking import FeatureRange, ListingScorer, RankingWeights, top_k
+
+
+def test_top_k_matches_full_sort() -> None:
+    rng = random.Random(3)
+    scored = [(round(rng.random(), 2), f"id-{i:03d}") for i in range(300)]
+    assert top_k(iter(scored), 7) == sorted(scored)[:7]
+
+
+def test_top_k_small_inputs() -> None:
+    assert top_k([], 5) == []
+    assert top_k([(0.5, "b"), (0.5, "a")], 5) == [(0.5, "a"), (0.5, "b")]
+
+
+def test_scorer_prefers_close_cheap_fresh_and_penalizes_missing() -> None:
+    now = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    scorer = ListingScorer(
+        weights=RankingWeights(distance=1.0, price=1.0, recency=1.0),
+        distance=FeatureRange(1.0, 11.0),
+        price=FeatureRange(1000.0, 3000.0),
+        captured_at=FeatureRange((now - timedelta(days=10)).timestamp(), now.timestamp()),
+    )
+    assert scorer.score(1.0, 1000.0, now) == 0.0
+    assert scorer.score(11.0, 3000.0, now - timedelta(days=10)) == 1.0
+    assert scorer.score(6.0, None, now.replace(tzinfo=None)) == (0.5 + 1.0 + 0.0) / 3
+
+
+def test_feature_range_clamps_values_outside_the_range() -> None:
+    distance = FeatureRange(1.0, 11.0)
+    assert (distance.normalize(0.0), distance.normalize(21.0)) == (0.0, 1.0)
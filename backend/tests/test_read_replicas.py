@@ -0,0 +1,124 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import Base
+from app.events import hub
+from app.models import Listing, Target, Workspace
+from app.replicas import Replica, ReplicaRouter
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """A file database standing in for a replica (its rows differ from the primary's on purpose)."""
+    replica = Replica(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(replica.engine)
+    router = ReplicaRouter([replica], max_lag_s=2, check_interval_s=60, sticky_s=60)
+    monkeypatch.setattr(main, "replica_router", router)
+    hub.add_listener(router.mark_written)
+    try:
+        yield replica
+    finally:
+        hub.remove_listener(router.mark_written)
+        replica.engine.dispose()
+
+
+def _count(client: TestClient, headers: dict[str, str]) -> int:
+    res = client.get("/api/listings/summary", headers=headers)
+    assert res.status_code == 200, res.text
+    return res.json()["count"]
+
+
+def test_reads_use_a_caught_up_replica_until_the_workspace_writes(replica) -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        with replica.session_factory() as db:
+            db.add(Workspace(id=issued["workspace_id"], token_hash="x", listing_count=42))
+            db.commit()
+
+        # The app checked the replica's lag on startup.
+        assert replica.lag_s == 0.0
+        assert _count(client, headers) == 42
+        assert client.get("/api/targets", headers=headers).json() == []
+
+        # Too far behind: back to the primary.
+        replica.lag_s = 10.0
+        assert _count(client, headers) == 0
+        main.replica_router.check_lag()
+        assert _count(client, headers) == 42
+
+        # Read-your-writes: once the workspace changes, its reads stay on the primary.
+        res = client.post(
+            "/api/listings",
+            json={"source": "airbnb", "source_url": "https://www.airbnb.com/rooms/1"},
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+        assert _count(client, headers) == 1
+        assert len(client.get("/api/listings", headers=headers).json()) == 1
+
+        # Other workspaces are unaffected.
+        other = client.post("/api/workspaces/issue").json()
+        with replica.session_factory() as db:
+            db.add(Workspace(id=other["workspace_id"], token_hash="y", listing_count=7))
+            db.commit()
+        assert _count(client, {"Authorization": f"Bearer {other['workspace_token']}"}) == 7
+
+
+def test_change_cursor_ahead_of_the_replica_is_served_by_the_primary(replica) -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        client.post(
+            "/api/listings",
+            json={"source": "airbnb", "source_url": "https://www.airbnb.com/rooms/1"},
+            headers=headers,
+        )
+        cursor = client.get("/api/listings/changes", headers=headers).json()["cursor"]
+        with replica.session_factory() as db:
+            db.add(Workspace(id=issued["workspace_id"], token_hash="x", version=0))
+            db.commit()
+        main.replica_router._sticky_until.clear()
+
+        # The replica hasn't seen version 1 yet; a reset would make the client refetch everything.
+        res = client.get("/api/listings/changes", params={"since": cursor}, headers=headers)
+        assert res.status_code == 200, res.text
+        assert (res.json()["reset"], res.json()["upserted"]) == (False, [])
+
+
+def test_compare_reads_from_the_replica(replica) -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        with replica.session_factory() as db:
+            db.add(Workspace(id=issued["workspace_id"], token_hash="x"))
+            db.add(
+                Target(id="t1", workspace_id=issued["workspace_id"], name="Office", lat=37, lng=-122)
+            )
+            db.add(
+                Listing(
+                    id="l1",
+                    workspace_id=issued["workspace_id"],
+                    source="airbnb",
+                    source_url="https://www.airbnb.com/rooms/1",
+                    lat=37.01,
+                    lng=-122.0,
+                    captured_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                )
+            )
+            db.commit()
+
+        # The primary has no target, so these would 404 there.
+        res = client.get("/api/compare", headers=headers)
+        assert res.status_code == 200, res.text
+        [item] = res.json()["items"]
+        assert (item["listing"]["id"], round(item["metrics"]["distance_km"], 2)) == ("l1", 1.11)
+        res = client.get("/api/compare/top", headers=headers)
+        assert res.status_code == 200, res.text
+        assert [item["listing"]["id"] for item in res.json()["items"]] == ["l1"]
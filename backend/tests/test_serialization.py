@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.schemas import ListingOut, ListingRow
+from app.serialization import LISTING_OUT_COLUMNS, listing_row, listing_rows_adapter
+
+
+def test_listing_row_matches_listing_out_fields() -> None:
+    assert list(ListingRow.__annotations__) == list(ListingOut.model_fields)
+    assert [col.key for col in LISTING_OUT_COLUMNS] == list(ListingOut.model_fields)
+
+
+def test_row_path_serializes_like_listing_out() -> None:
+    values = {
+        "id": "l1",
+        "source": "airbnb",
+        "source_url": "https://www.airbnb.com/rooms/1",
+        "title": "Room",
+        "price_value": 80.5,
+        "currency": "USD",
+        "price_period": "night",
+        "monthly_price": 2415.0,
+        "lat": 37.4,
+        "lng": None,
+        "location_text": None,
+        "captured_at": datetime(2026, 1, 30, 12, 0, tzinfo=timezone.utc),
+    }
+    row = SimpleNamespace(**values)
+    fast = listing_rows_adapter.dump_json([listing_row(row)])
+    assert fast == b"[" + ListingOut.model_validate(row).model_dump_json().encode() + b"]"
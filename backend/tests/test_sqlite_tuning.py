@@ -0,0 +1,54 @@
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import configure_sqlite_engine
+
+
+def test_tuned_sqlite_serializes_read_modify_write_transactions(tmp_path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'tuned.db'}", connect_args={"check_same_thread": False}
+    )
+    configure_sqlite_engine(engine, busy_timeout_ms=5000)
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        conn.execute(text("CREATE TABLE counter (n INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO counter VALUES (0)"))
+
+    Writer = sessionmaker(bind=engine.execution_options(sqlite_writer=True))
+    Reader = sessionmaker(bind=engine)
+    errors: list[Exception] = []
+
+    def write() -> None:
+        try:
+            for _ in range(20):
+                with Writer() as db:
+                    # Read first, write later: a deferred transaction would lose updates or
+                    # fail with "database is locked".
+                    n = db.execute(text("SELECT n FROM counter")).scalar_one()
+                    db.execute(text("UPDATE counter SET n = :n"), {"n": n + 1})
+                    db.commit()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    def read() -> None:
+        try:
+            for _ in range(50):
+                with Reader() as db:
+                    db.execute(text("SELECT n FROM counter")).scalar_one()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(6)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with Reader() as db:
+        assert db.execute(text("SELECT n FROM counter")).scalar_one() == 120
+    engine.dispose()
@@ -1,13 +1,18 @@
 import os
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import delete, event, func, select
 
 os.environ["DATABASE_URL"] = "sqlite+pysqlite:///:memory:"
 os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
 
 import app.main as main
+from app.db import SessionLocal, engine
 from app.distance import haversine_km
 from app.geocoding import GeocodeResult, ReverseGeocodeResult
+from app.models import ListingTargetMetric
+from app.pagination import encode_cursor
 
 
 def _auth_headers(client: TestClient) -> dict[str, str]:
@@ -241,3 +246,323 @@ def test_upsert_listing_accepts_blueground_source() -> None:
         assert created.status_code == 200, created.text
         data = created.json()
         assert data["source"] == "blueground"
+
+
+def test_compare_distances_follow_target_and_listing_moves() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        t = client.post(
+            "/api/targets",
+            json={"name": "Workplace", "lat": 37.416, "lng": -122.077},
+            headers=headers,
+        )
+        assert t.status_code == 200, t.text
+        target_id = t.json()["id"]
+
+        listing = {
+            "source": "airbnb",
+            "source_url": "https://www.airbnb.com/rooms/1",
+            "location_text": "Mountain View, CA",
+            "lat": 37.426,
+            "lng": -122.087,
+        }
+        assert client.post("/api/listings", json=listing, headers=headers).status_code == 200
+
+        def distance() -> float:
+            res = client.get("/api/compare", params={"target_id": target_id}, headers=headers)
+            assert res.status_code == 200, res.text
+            return res.json()["items"][0]["metrics"]["distance_km"]
+
+        assert abs(distance() - haversine_km(37.426, -122.087, 37.416, -122.077)) < 1e-6
+
+        moved = client.post(
+            "/api/targets",
+            json={"id": target_id, "name": "Workplace", "lat": 37.5, "lng": -122.2},
+            headers=headers,
+        )
+        assert moved.status_code == 200, moved.text
+        assert abs(distance() - haversine_km(37.426, -122.087, 37.5, -122.2)) < 1e-6
+
+        listing.update({"lat": 37.3, "lng": -121.9})
+        assert client.post("/api/listings", json=listing, headers=headers).status_code == 200
+        assert abs(distance() - haversine_km(37.3, -121.9, 37.5, -122.2)) < 1e-6
+
+
+def _seed_compare_listings(client: TestClient, headers: dict[str, str]) -> str:
+    t = client.post(
+        "/api/targets",
+        json={"name": "Workplace", "lat": 37.416, "lng": -122.077},
+        headers=headers,
+    )
+    assert t.status_code == 200, t.text
+    seeds = [
+        # (room, lat offset, price, period, source); room 4 has no coordinates.
+        (1, 0.03, 3000, "month", "airbnb"),
+        (2, 0.01, 2800, "month", "blueground"),
+        (3, 0.02, None, "unknown", "airbnb"),
+        (4, None, 2500, "month", "airbnb"),
+        (5, 0.05, 65, "night", "airbnb"),
+    ]
+    for room, dlat, price, period, source in seeds:
+        body: dict[str, object] = {
+            "source": source,
+            "source_url": f"https://www.example.com/rooms/{room}",
+            "location_text": "Mountain View, CA",
+            "price_value": price,
+            "price_period": period,
+            "captured_at": f"2026-01-30T1{room}:00:00Z",
+        }
+        if dlat is not None:
+            body.update({"lat": 37.416 + dlat, "lng": -122.077})
+        res = client.post("/api/listings", json=body, headers=headers)
+        assert res.status_code == 200, res.text
+    return t.json()["id"]
+
+
+def _rooms(items: list[dict]) -> list[int]:
+    return [int(it["listing"]["source_url"].rsplit("/", 1)[1]) for it in items]
+
+
+def test_compare_reads_only_and_fills_missing_distances_inline() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+        with SessionLocal() as db:
+            db.execute(delete(ListingTargetMetric))
+            db.commit()
+
+        statements: list[str] = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            rows = client.get("/api/compare", headers=headers).json()["items"]
+            top = client.get("/api/compare/top", headers=headers).json()["items"]
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert all(s.lstrip().upper().startswith("SELECT") for s in statements), statements
+        expected = haversine_km(37.416 + 0.01, -122.077, 37.416, -122.077)
+        by_room = {room: it["metrics"]["distance_km"] for room, it in zip(_rooms(rows), rows)}
+        assert abs(by_room[2] - expected) < 1e-6 and by_room[4] is None
+        top_by_room = {room: it["metrics"]["distance_km"] for room, it in zip(_rooms(top), top)}
+        assert abs(top_by_room[2] - expected) < 1e-6
+        with SessionLocal() as db:
+            assert db.scalar(select(func.count()).select_from(ListingTargetMetric)) == 0
+
+
+def test_compare_top_scales_fallback_distances_with_the_stored_ones() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+        params = {"k": 5, "w_price": 0, "w_recency": 0}
+        expected = client.get("/api/compare/top", params=params, headers=headers).json()["items"]
+
+        # The farthest listing loses its stored distance: its fallback is beyond the stored max.
+        farthest = next(it["listing"]["id"] for it in expected if _rooms([it]) == [5])
+        with SessionLocal() as db:
+            db.execute(delete(ListingTargetMetric).where(ListingTargetMetric.listing_id == farthest))
+            db.commit()
+        top = client.get("/api/compare/top", params=params, headers=headers).json()["items"]
+
+        assert _rooms(top) == _rooms(expected)
+        assert _rooms(top)[:3] == [2, 3, 1]
+        assert [it["score"] for it in top] == pytest.approx([it["score"] for it in expected])
+        assert all(0 <= it["score"] <= 1 for it in top)
+
+
+def test_compare_sorts_by_distance_with_keyset_pages() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+
+        seen: list[int] = []
+        cursor = None
+        for _ in range(5):
+            params: dict[str, object] = {"sort": "distance", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            res = client.get("/api/compare", params=params, headers=headers)
+            assert res.status_code == 200, res.text
+            data = res.json()
+            seen += _rooms(data["items"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        # Listings without coordinates sort last.
+        assert seen == [2, 3, 1, 5, 4]
+
+
+def test_compare_filters_and_price_sort() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+
+        res = client.get(
+            "/api/compare",
+            params={"sort": "price", "max_price": 2900, "source": "airbnb"},
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+        assert _rooms(res.json()["items"]) == [5, 4]
+        # Nightly prices are compared as monthly estimates.
+        assert res.json()["items"][0]["listing"]["monthly_price"] == 65 * 30
+
+        res = client.get(
+            "/api/compare", params={"max_distance_km": 3.0}, headers=headers
+        )
+        assert res.status_code == 200, res.text
+        assert _rooms(res.json()["items"]) == [3, 2]
+        assert res.json()["next_cursor"] is None
+
+
+def test_compare_captured_at_pages_and_rejects_foreign_cursor() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+
+        first = client.get("/api/compare", params={"limit": 3}, headers=headers)
+        assert first.status_code == 200, first.text
+        assert _rooms(first.json()["items"]) == [5, 4, 3]
+        cursor = first.json()["next_cursor"]
+
+        second = client.get("/api/compare", params={"limit": 3, "cursor": cursor}, headers=headers)
+        assert second.status_code == 200, second.text
+        assert _rooms(second.json()["items"]) == [2, 1]
+        assert second.json()["next_cursor"] is None
+
+        mismatched = client.get(
+            "/api/compare", params={"sort": "price", "cursor": cursor}, headers=headers
+        )
+        assert mismatched.status_code == 400, mismatched.text
+        garbage = client.get("/api/compare", params={"cursor": "not-a-cursor"}, headers=headers)
+        assert garbage.status_code == 400, garbage.text
+
+        # Well-formed cursors whose key doesn't match the sort column's type.
+        for sort, key in (("captured_at", 5), ("captured_at", None), ("distance", True)):
+            tampered = client.get(
+                "/api/compare",
+                params={"sort": sort, "cursor": encode_cursor(sort, key, "x")},
+                headers=headers,
+            )
+            assert tampered.status_code == 400, (sort, key)
+        nulls_last = client.get(
+            "/api/compare",
+            params={"sort": "price", "cursor": encode_cursor("price", None, "x")},
+            headers=headers,
+        )
+        assert nulls_last.status_code == 200, nulls_last.text
+
+
+def test_nearby_and_viewport_queries() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+
+        res = client.get(
+            "/api/listings/nearby",
+            params={"lat": 37.416, "lng": -122.077, "radius_km": 3.0},
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+        items = res.json()
+        assert _rooms(items) == [2, 3]
+        assert abs(
+            items[0]["metrics"]["distance_km"] - haversine_km(37.426, -122.077, 37.416, -122.077)
+        ) < 1e-6
+
+        res = client.get(
+            "/api/listings/within",
+            params={"south": 37.43, "west": -122.1, "north": 37.47, "east": -122.0},
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+        assert [int(it["source_url"].rsplit("/", 1)[1]) for it in res.json()] == [5, 3, 1]
+
+        bad = client.get(
+            "/api/listings/within",
+            params={"south": 38.0, "west": -122.1, "north": 37.0, "east": -122.0},
+            headers=headers,
+        )
+        assert bad.status_code == 400, bad.text
+
+
+def test_compare_top_ranks_by_weighted_score() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+
+        by_distance = client.get(
+            "/api/compare/top",
+            params={"k": 2, "w_distance": 1, "w_price": 0, "w_recency": 0},
+            headers=headers,
+        )
+        assert by_distance.status_code == 200, by_distance.text
+        items = by_distance.json()["items"]
+        assert _rooms(items) == [2, 3]
+        assert items[0]["score"] == 0.0
+        assert items[0]["metrics"]["distance_km"] is not None
+
+        by_price = client.get(
+            "/api/compare/top",
+            params={"k": 3, "w_distance": 0, "w_price": 1, "w_recency": 0},
+            headers=headers,
+        )
+        assert by_price.status_code == 200, by_price.text
+        assert _rooms(by_price.json()["items"]) == [5, 4, 2]
+
+        no_weights = client.get(
+            "/api/compare/top",
+            params={"w_distance": 0, "w_price": 0, "w_recency": 0},
+            headers=headers,
+        )
+        assert no_weights.status_code == 400, no_weights.text
+
+
+def _decode_columnar(data: dict) -> list[dict]:
+    cols = data["columns"]
+    decoded = []
+    for i, listing_id in enumerate(cols["ids"]):
+        listing = {"id": listing_id}
+        for field, values in cols.items():
+            if field in {"ids", "distance_km"}:
+                continue
+            value = values[i]
+            if field in data["dictionaries"]:
+                value = data["dictionaries"][field][value]
+            listing[field] = value
+        decoded.append({"listing": listing, "metrics": {"distance_km": cols["distance_km"][i]}})
+    return decoded
+
+
+def test_compare_columnar_format_matches_rows() -> None:
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+        params = {"sort": "distance", "limit": 4}
+
+        rows = client.get("/api/compare", params=params, headers=headers)
+        columnar = client.get("/api/compare", params={**params, "format": "columnar"}, headers=headers)
+        assert rows.status_code == 200, rows.text
+        assert columnar.status_code == 200, columnar.text
+        assert columnar.headers["etag"] == rows.headers["etag"]
+
+        data = columnar.json()
+        assert data["count"] == 4
+        assert data["next_cursor"] == rows.json()["next_cursor"]
+        assert data["dictionaries"]["source"] == ["blueground", "airbnb"]
+        assert _decode_columnar(data) == rows.json()["items"]
+
+
+def test_compare_msgpack_format() -> None:
+    msgpack = pytest.importorskip("msgpack")
+    with TestClient(main.app) as client:
+        headers = _auth_headers(client)
+        _seed_compare_listings(client, headers)
+
+        res = client.get("/api/compare", params={"format": "msgpack"}, headers=headers)
+        assert res.status_code == 200, res.text
+        assert res.headers["content-type"] == "application/msgpack"
+        data = msgpack.unpackb(res.content)
+        assert data["count"] == 5
+        assert len(data["columns"]["ids"]) == 5
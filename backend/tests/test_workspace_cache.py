@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.workspace_cache import AuthenticatedWorkspace, MemoryWorkspaceAuthCache
+
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    cache = MemoryWorkspaceAuthCache(max_entries=2, ttl_s=60)
+    for name in ("a", "b"):
+        cache.put(name, AuthenticatedWorkspace(id=name, expires_at=None), cache.generation())
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", AuthenticatedWorkspace(id="c", expires_at=None), cache.generation())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert len(cache) == 2
+
+
+def test_memory_cache_entries_expire_after_ttl() -> None:
+    cache = MemoryWorkspaceAuthCache(max_entries=10, ttl_s=0)
+    cache.put("a", AuthenticatedWorkspace(id="a", expires_at=None), cache.generation())
+    assert cache.get("a") is None
+
+
+def test_memory_cache_ignores_fills_that_race_an_invalidation() -> None:
+    cache = MemoryWorkspaceAuthCache(max_entries=10, ttl_s=60)
+    generation = cache.generation()
+    cache.invalidate_workspaces(["a"])
+    cache.put("a", AuthenticatedWorkspace(id="a", expires_at=None), generation)
+    assert cache.get("a") is None
+
+
+def test_cached_workspace_expiry_is_checked_on_every_request(monkeypatch) -> None:
+    from app import main
+    from app.workspaces import hash_workspace_token
+
+    cache = MemoryWorkspaceAuthCache(max_entries=10, ttl_s=3600)
+    monkeypatch.setattr(main, "workspace_auth_cache", cache)
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    cache.put(
+        hash_workspace_token("tok"),
+        AuthenticatedWorkspace(id="ws", expires_at=expires_at),
+        cache.generation(),
+    )
+
+    assert asyncio.run(main.get_workspace(authorization="Bearer tok")).id == "ws"
+    monkeypatch.setattr(main, "_utcnow", lambda: expires_at)
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(main.get_workspace(authorization="Bearer tok"))
+    assert excinfo.value.detail == "Workspace token expired"
@@ -0,0 +1,77 @@
+import os
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import SessionLocal
+from app.models import Workspace
+from app.workspace_counters import repair_workspace_counters
+
+
+def _post_listing(client: TestClient, headers: dict[str, str], n: int, captured_at: str) -> str:
+    res = client.post(
+        "/api/listings",
+        json={
+            "source": "airbnb",
+            "source_url": f"https://www.airbnb.com/rooms/{n}",
+            "currency": "USD",
+            "price_period": "month",
+            "captured_at": captured_at,
+        },
+        headers=headers,
+    )
+    assert res.status_code == 200, res.text
+    return res.json()["id"]
+
+
+def _summary(client: TestClient, headers: dict[str, str]) -> tuple[int, str | None]:
+    data = client.get("/api/listings/summary", headers=headers).json()
+    return data["count"], data["latest_id"]
+
+
+def test_summary_counters_follow_inserts_updates_and_deletes() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+
+        older = _post_listing(client, headers, 1, "2026-01-10T10:00:00Z")
+        newer = _post_listing(client, headers, 2, "2026-01-20T10:00:00Z")
+        assert _summary(client, headers) == (2, newer)
+
+        # Re-saving an existing URL doesn't change the count; moving it back in time hands
+        # "latest" to the other listing.
+        assert _post_listing(client, headers, 2, "2026-01-01T10:00:00Z") == newer
+        assert _summary(client, headers) == (2, older)
+
+        assert client.delete(f"/api/listings/{older}", headers=headers).status_code == 200
+        assert _summary(client, headers) == (1, newer)
+        assert client.delete(f"/api/listings/{newer}", headers=headers).status_code == 200
+        assert client.get("/api/listings/summary", headers=headers).json() == {
+            "count": 0,
+            "latest_id": None,
+            "latest_captured_at": None,
+        }
+
+
+def test_repair_recomputes_drifted_counters() -> None:
+    with TestClient(main.app) as client:
+        issued = client.post("/api/workspaces/issue").json()
+        headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+        listing_id = _post_listing(client, headers, 1, "2026-01-10T10:00:00Z")
+        client.post("/api/workspaces/issue")  # an empty workspace that is already correct
+
+        with SessionLocal() as db:
+            db.execute(
+                update(Workspace)
+                .where(Workspace.id == issued["workspace_id"])
+                .values(listing_count=7, latest_listing_id=None, latest_captured_at=None)
+            )
+            db.commit()
+
+        report = repair_workspace_counters(SessionLocal, batch_size=1)
+        assert (report.checked, report.repaired) == (2, 1)
+        assert _summary(client, headers) == (1, listing_id)
+        assert repair_workspace_counters(SessionLocal).repaired == 0
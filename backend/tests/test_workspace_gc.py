@@ -0,0 +1,103 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, update
+
+os.environ["ENABLE_PUBLIC_WORKSPACE_ISSUE"] = "1"
+
+import app.main as main
+from app.db import SessionLocal
+from app.models import Listing, ListingTargetMetric, ListingTombstone, Target, Workspace
+from app.workspace_gc import (
+    count_expired_workspaces,
+    prune_listing_tombstones,
+    purge_expired_workspaces,
+)
+
+
+def _seed_workspace(client: TestClient) -> tuple[str, dict[str, str]]:
+    issued = client.post("/api/workspaces/issue").json()
+    headers = {"Authorization": f"Bearer {issued['workspace_token']}"}
+    assert client.post(
+        "/api/targets", json={"name": "Office", "lat": 37.0, "lng": -122.0}, headers=headers
+    ).status_code == 200
+    for i in range(3):
+        res = client.post(
+            "/api/listings",
+            json={
+                "source": "airbnb",
+                "source_url": f"https://www.airbnb.com/rooms/{i}",
+                "currency": "USD",
+                "price_period": "month",
+                "lat": 37.0 + i / 100,
+                "lng": -122.0,
+                "captured_at": "2026-01-30T10:00:00Z",
+            },
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+    assert client.delete(f"/api/listings/{res.json()['id']}", headers=headers).status_code == 200
+    return issued["workspace_id"], headers
+
+
+def test_purge_deletes_expired_workspaces_in_batches() -> None:
+    with TestClient(main.app) as client:
+        expired_id, expired_headers = _seed_workspace(client)
+        live_id, live_headers = _seed_workspace(client)
+
+        with SessionLocal() as db:
+            db.execute(
+                update(Workspace)
+                .where(Workspace.id == expired_id)
+                .values(expires_at=datetime.now(timezone.utc) - timedelta(days=2))
+            )
+            db.commit()
+            assert count_expired_workspaces(db) == 1
+            assert count_expired_workspaces(db, grace=timedelta(days=3)) == 0
+
+        assert purge_expired_workspaces(SessionLocal, grace=timedelta(days=3)).total_rows == 0
+        report = purge_expired_workspaces(SessionLocal, row_batch=1)
+        assert (
+            report.workspaces,
+            report.listings,
+            report.listing_target_metrics,
+            report.listing_tombstones,
+            report.targets,
+        ) == (1, 2, 2, 1, 1)
+
+        with SessionLocal() as db:
+            for model in (Listing, ListingTombstone, Target, ListingTargetMetric):
+                owners = set(db.scalars(select(model.workspace_id).distinct()))
+                assert owners == {live_id}, model.__tablename__
+            assert db.scalar(select(func.count(Workspace.id))) == 1
+
+        gone = client.get("/api/listings", headers=expired_headers)
+        assert gone.status_code == 401
+        assert gone.json()["detail"] == "Invalid workspace token"
+        assert len(client.get("/api/listings", headers=live_headers).json()) == 2
+
+
+def test_pruned_tombstones_reset_older_change_cursors() -> None:
+    with TestClient(main.app) as client:
+        workspace_id, headers = _seed_workspace(client)
+        stale = client.get("/api/listings/changes", headers=headers).json()["cursor"]
+        listing_id = client.get("/api/listings", headers=headers).json()[0]["id"]
+        assert client.delete(f"/api/listings/{listing_id}", headers=headers).status_code == 200
+        fresh = client.get("/api/listings/changes", headers=headers).json()["cursor"]
+
+        assert prune_listing_tombstones(SessionLocal, max_age=timedelta(days=1)) == 0
+        now = datetime.now(timezone.utc) + timedelta(days=2)
+        assert prune_listing_tombstones(SessionLocal, now=now, max_age=timedelta(days=1)) == 2
+        with SessionLocal() as db:
+            workspace = db.get(Workspace, workspace_id)
+            assert workspace is not None
+            assert workspace.tombstones_pruned_seq == workspace.version
+
+        # The delete this cursor hasn't seen is gone with its tombstone: full snapshot.
+        res = client.get("/api/listings/changes", params={"since": stale}, headers=headers)
+        assert res.status_code == 200, res.text
+        assert res.json()["reset"] is True
+        assert len(res.json()["upserted"]) == 1
+        current = client.get("/api/listings/changes", params={"since": fresh}, headers=headers)
+        assert (current.json()["reset"], current.json()["upserted"]) == (False, [])
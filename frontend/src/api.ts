@@ -55,6 +55,7 @@ export type Listing = {
   price_value: number | null
   currency: string
   price_period: string
+  monthly_price?: number | null
   lat: number | null
   lng: number | null
   location_text: string | null
@@ -87,6 +88,7 @@ export type CompareItem = {
 export type CompareResponse = {
   target: Target
   items: CompareItem[]
+  next_cursor?: string | null
 }
 
 export type ListingSummary = {
@@ -141,6 +143,57 @@ export async function fetchListingsSummary(): Promise<ListingSummary> {
   return (await parseJsonOrThrow(res)) as ListingSummary
 }
 
+export type WorkspaceEvent = {
+  event: 'version' | 'change'
+  version: number
+}
+
+/**
+ * Reads the workspace change stream (Server-Sent Events) until the server ends it or `signal`
+ * aborts. Uses fetch rather than EventSource so the token stays in the Authorization header.
+ */
+export async function streamWorkspaceEvents(
+  onEvent: (ev: WorkspaceEvent) => void,
+  signal: AbortSignal,
+): Promise<void> {
+  const res = await fetch(apiUrl('/api/workspace/events'), {
+    method: 'GET',
+    headers: { ...authHeaders(), Accept: 'text/event-stream' },
+    cache: 'no-store',
+    signal,
+  })
+  if (!res.ok || !res.body) throw new Error(`${res.status} ${res.statusText}`)
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) return
+    buffer += value
+
+    let sep = buffer.indexOf('\n\n')
+    while (sep !== -1) {
+      const block = buffer.slice(0, sep)
+      buffer = buffer.slice(sep + 2)
+      sep = buffer.indexOf('\n\n')
+
+      let event = ''
+      let data = ''
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      if ((event !== 'version' && event !== 'change') || !data) continue
+      try {
+        const parsed = JSON.parse(data) as { version: number }
+        onEvent({ event, version: parsed.version })
+      } catch {
+        // ignore malformed events
+      }
+    }
+  }
+}
+
 export async function upsertTarget(payload: {
   id?: string
   name: string
@@ -14,6 +14,7 @@ import {
   geocodeAddress,
   listInterestingTargets,
   reverseGeocode,
+  streamWorkspaceEvents,
   upsertInterestingTarget,
   upsertTarget,
 } from '../api'
@@ -494,9 +495,37 @@ function App() {
 
     void checkForNewListings({ force: true })
 
-    const interval = window.setInterval(() => {
-      void checkForNewListings()
-    }, 7000)
+    // Prefer the backend's change stream; fall back to polling if it keeps failing
+    // (e.g. an older backend without /api/workspace/events).
+    const streamAbort = new AbortController()
+    let interval: number | null = null
+    const startPolling = () => {
+      if (cancelled || interval != null) return
+      interval = window.setInterval(() => {
+        void checkForNewListings()
+      }, 7000)
+    }
+    const runStream = async () => {
+      let failures = 0
+      while (!cancelled) {
+        try {
+          // The stream opens with the current version, so a reconnect also re-checks once.
+          await streamWorkspaceEvents(() => {
+            void checkForNewListings()
+          }, streamAbort.signal)
+          failures = 0
+        } catch {
+          if (cancelled) return
+          failures += 1
+          if (failures >= 3) {
+            startPolling()
+            return
+          }
+        }
+        await new Promise((resolve) => window.setTimeout(resolve, 3000))
+      }
+    }
+    void runStream()
 
     const onVisibilityChange = () => {
       if (!document.hidden) void checkForNewListings({ force: true })
@@ -505,7 +534,8 @@ function App() {
 
     return () => {
       cancelled = true
-      window.clearInterval(interval)
+      streamAbort.abort()
+      if (interval != null) window.clearInterval(interval)
       document.removeEventListener('visibilitychange', onVisibilityChange)
     }
   }, [refresh, targetId])